@@ -0,0 +1,217 @@
+"""Headless batch runner: replays a JSONL file of messages through the chatbot
+
+Each input line is a JSON object with the message under ``message`` (or
+``body``/``text``/``title``, so a ``requests.jsonl`` style file works as is)
+and an optional ``session_id``; lines without one get their own session.
+Messages are spread over worker processes by session, so every session keeps
+its conversation memory in one process and its messages run in file order.
+Results are written as JSONL as soon as they are ready, with the detected
+intent, the response and the per-message latency::
+
+    python batch_runner.py queries.jsonl -o results.jsonl [--workers 8] [--seed 1]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+MESSAGE_FIELDS = ("message", "body", "text", "title")
+SESSION_FIELDS = ("session_id", "session", "request_id")
+
+Query = Tuple[int, str, str]
+
+# How often a blocked queue operation stops to check that the worker processes are still alive
+POLL_SECONDS = 0.5
+
+
+def read_queries(lines: Iterable[str]) -> Iterator[Query]:
+    """Yield (line number, session id, message) for every non-blank input line"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        message = next((record[field] for field in MESSAGE_FIELDS if record.get(field)), None)
+        if message is None:
+            raise ValueError(f"line {number}: no message field ({', '.join(MESSAGE_FIELDS)})")
+        session_id = next((str(record[field]) for field in SESSION_FIELDS if record.get(field)), f"line-{number}")
+        yield number, session_id, message
+
+
+def worker_for(session_id: str, workers: int) -> int:
+    """The worker that owns ``session_id``; crc32 keeps the assignment stable across runs"""
+    return zlib.crc32(session_id.encode()) % workers
+
+
+def process_query(app, query: Query, seed: Optional[str] = None) -> Dict[str, Any]:
+    """Run one message through intent detection and response generation in its session"""
+    number, session_id, message = query
+    if seed is not None:
+        # Seeding per line makes responses independent of worker count and scheduling; the shared
+        # market snapshot is pinned to the seed by pin_snapshots
+        app.random.seed(f"{seed}:{number}")
+    result: Dict[str, Any] = {"line": number, "session_id": session_id, "message": message}
+    start = time.perf_counter()
+    try:
+        memory = app.SESSIONS.get(session_id)
+        memory.add_message("user", message)
+        intent_data = app.identify_intent(message)
+        response = app.generate_response(intent_data, message, memory)
+        memory.add_message("assistant", response)
+        app.SESSIONS.touch(session_id, memory)
+        result["intent"] = intent_data["primary_intent"]
+        result["response"] = response
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def pin_snapshots(app, seed: Optional[str]):
+    """Serve the market snapshot of a bucket derived from ``seed`` rather than the wall clock"""
+    if app.MARKET_SNAPSHOTS is not None:
+        app.MARKET_SNAPSHOTS.pin(None if seed is None else zlib.crc32(seed.encode()))
+
+
+def _worker(number: int, inbox, outbox, seed: Optional[str]):
+    import engine as app
+    pin_snapshots(app, seed)
+    while True:
+        query = inbox.get()
+        if query is None:
+            break
+        outbox.put(process_query(app, query, seed))
+    # The worker's number (rather than a bare sentinel) tells the parent which one finished cleanly
+    outbox.put(number)
+
+
+def _put(inbox, item, process, stop: threading.Event) -> bool:
+    """Put ``item`` on a bounded inbox; False once its worker is gone or the run was stopped"""
+    while not stop.is_set() and process.is_alive():
+        try:
+            inbox.put(item, timeout=POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _feed(queries: Iterable[Query], inboxes, processes, failures, stop: threading.Event):
+    try:
+        for query in queries:
+            number = worker_for(query[1], len(inboxes))
+            if not _put(inboxes[number], query, processes[number], stop):
+                return
+    except Exception as exc:
+        failures.append(exc)
+    finally:
+        for inbox, process in zip(inboxes, processes):
+            _put(inbox, None, process, stop)
+
+
+def run_batch(queries: Iterable[Query], output: TextIO, workers: int = 0, seed: Optional[str] = None,
+              queue_depth: int = 256) -> Dict[str, Any]:
+    """Process ``queries``, writing one JSON result per line to ``output``, and return summary stats.
+
+    ``workers=0`` runs everything in this process.
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+
+    def write(result: Dict[str, Any]):
+        nonlocal errors
+        output.write(json.dumps(result) + "\n")
+        latencies.append(result["latency_ms"])
+        errors += "error" in result
+
+    if workers <= 0:
+        import engine as app
+        pin_snapshots(app, seed)
+        try:
+            for query in queries:
+                write(process_query(app, query, seed))
+        finally:
+            pin_snapshots(app, None)
+    else:
+        # Inboxes are bounded so a huge input file is streamed rather than loaded
+        inboxes = [multiprocessing.Queue(maxsize=queue_depth) for _ in range(workers)]
+        outbox = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_worker, args=(number, inbox, outbox, seed), daemon=True)
+                     for number, inbox in enumerate(inboxes)]
+        for process in processes:
+            process.start()
+        failures = []
+        stop = threading.Event()
+        feeder = threading.Thread(target=_feed, args=(queries, inboxes, processes, failures, stop), daemon=True)
+        feeder.start()
+        finished = set()
+        try:
+            while len(finished) < workers:
+                try:
+                    result = outbox.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    # A worker that died (import error, OOM, crash) never sends its number; whatever
+                    # it did send has been flushed by the time it exits, so check only when idle
+                    dead = [number for number, process in enumerate(processes)
+                            if number not in finished and process.exitcode is not None]
+                    if dead and outbox.empty():
+                        raise RuntimeError(f"worker {dead[0]} exited with code {processes[dead[0]].exitcode} "
+                                           "before finishing its messages")
+                    continue
+                if isinstance(result, int):
+                    finished.add(result)
+                else:
+                    write(result)
+        except BaseException:
+            stop.set()
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+        feeder.join()
+        if failures:
+            raise failures[0]
+    output.flush()
+
+    elapsed = time.perf_counter() - start
+    stats: Dict[str, Any] = {"messages": len(latencies), "errors": errors, "seconds": round(elapsed, 3),
+                             "messages_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0}
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        stats.update(p50_ms=round(cuts[49], 3), p95_ms=round(cuts[94], 3), p99_ms=round(cuts[98], 3))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of messages, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes; 0 runs in this process")
+    parser.add_argument("--seed", help="seed responses per line so runs are reproducible")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(read_queries(source), output, workers=args.workers, seed=args.seed)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Small timing helpers shared by the benchmark scripts"""
+import gc
+import statistics
+import time
+from typing import Any, Callable, Dict, Sequence
+
+
+def measure(fn: Callable[[Any], Any], inputs: Sequence[Any], rounds: int = 20, warmup: int = 2) -> Dict[str, float]:
+    """Call ``fn`` on every input ``rounds`` times and report per-call latency in microseconds"""
+    for _ in range(warmup):
+        for item in inputs:
+            fn(item)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for item in inputs:
+                start = time.perf_counter_ns()
+                fn(item)
+                samples.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": _percentile(samples, 50) / 1000,
+        "p95_us": _percentile(samples, 95) / 1000,
+        "p99_us": _percentile(samples, 99) / 1000,
+        "ops_per_sec": 1e9 / statistics.fmean(samples) if samples else 0.0
+    }
+
+
+def _percentile(sorted_samples: Sequence[int], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return float(sorted_samples[index])
+
+
+def format_row(name: str, stats: Dict[str, float], width: int = 28) -> str:
+    """One aligned line of benchmark output"""
+    return (f"{name:<{width}} mean {stats['mean_us']:9.2f}us  p50 {stats['p50_us']:9.2f}us  "
+            f"p95 {stats['p95_us']:9.2f}us  p99 {stats['p99_us']:9.2f}us  {stats['ops_per_sec']:12,.0f} ops/s")
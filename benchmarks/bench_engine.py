@@ -0,0 +1,170 @@
+"""Latency of every intent path of generate_response, identify_intent and ConversationMemory.add_message
+
+Run from the repository root::
+
+    python -m benchmarks.bench_engine [--rounds 50] [--seed 1234] [--json results.json]
+                                      [--baseline previous.json --max-regression 0.25]
+
+Every case is seeded, the FinBERT case talks to an in-process stub server
+(``--stub-latency-ms``) with the client cache disabled so each call makes the
+request, and the LLM API stays disabled so general queries use the templates.
+``--json`` writes machine-readable results; ``--baseline`` compares p50 and p95
+against an earlier ``--json`` file and exits 1 when any case got slower than
+``--max-regression`` (and ``--min-delta-us``) allows.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from benchmarks._harness import format_row, measure
+from benchmarks.bench_sentiment_backends import start_stub_server
+
+import engine
+
+# Messages for each generate_response branch; each is checked to classify as its intent
+INTENT_MESSAGES = {
+    "greeting": ["hi", "hello", "hey there", "good morning"],
+    "market_sentiment": ["What is your opinion on the market?", "How is the technology sector sentiment?",
+                         "What is the sentiment in the energy and finance sectors?"],
+    "stock_sentiment": ["What is your opinion on AAPL stock?", "What is the sentiment on MSFT and NVDA stock?",
+                        "Any feeling about this stock?"],
+    "product_information": ["What are fixed deposits?", "Tell me about mutual fund policies",
+                            "Should I buy insurance products?", "Recommend a fixed deposit product"],
+    "investment_recommendation": ["Where should I invest my money?",
+                                  "What stocks should I invest in for aggressive growth?",
+                                  "Recommend investments for a conservative investor"],
+    "educational": ["Explain compound interest", "I want to learn about retirement planning",
+                    "What is diversification? explain", "Help me learn about investing basics"],
+    "analyze_sentiment": ["Can you analyze this statement: Apple reported strong quarterly growth and raised guidance",
+                          "Analyze this news: Exxon shares fall after a profit warning"],
+    "general_query": ["What do you think about bonds?", "Tell me something about the economy",
+                      "I got a bonus this year, any thoughts?"],
+}
+
+def seeded(fn: Callable[[Any], Any], seed: int) -> Callable[[Any], Any]:
+    """Reseed the engine's random module before every call so each run draws the same values"""
+    def call(item):
+        engine.random.seed(seed)
+        return fn(item)
+    return call
+
+
+def use_sentiment_backend(name: str):
+    engine.SENTIMENT_BACKEND = name
+    if hasattr(engine.get_sentiment_backend, "backend"):
+        del engine.get_sentiment_backend.backend
+
+
+def response_case(intent: str, messages: Sequence[str], seed: int):
+    memory = engine.ConversationMemory()
+    inputs = []
+    for message in messages:
+        intent_data = engine.identify_intent(message)
+        if intent_data["primary_intent"] != intent:
+            raise SystemExit(f"benchmark message {message!r} classifies as {intent_data['primary_intent']}, "
+                             f"not {intent}")
+        inputs.append((intent_data, message))
+    return seeded(lambda item: engine.generate_response(item[0], item[1], memory), seed), inputs
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, max_regression: float,
+            min_delta_us: float) -> List[str]:
+    """Cases whose p50 or p95 grew by more than ``max_regression`` (and ``min_delta_us``) over the baseline file"""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)["results"]
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            growth = stats[metric] - before[metric]
+            if growth > before[metric] * max_regression and growth > min_delta_us:
+                regressions.append(f"{name} {metric}: {before[metric]:.2f}us -> {stats[metric]:.2f}us")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--min-delta-us", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    engine.LLM_API_ENABLED = False
+    server = start_stub_server(args.stub_latency_ms)
+    engine.API_URL = f"http://127.0.0.1:{server.server_port}/"
+    engine.FINBERT_CACHE_SIZE = 0
+
+    cases = []
+    for intent, messages in INTENT_MESSAGES.items():
+        if intent == "analyze_sentiment":
+            continue
+        fn, inputs = response_case(intent, messages, args.seed)
+        cases.append((f"generate_response[{intent}]", fn, inputs, args.rounds))
+
+    use_sentiment_backend("simulated")
+    fn, inputs = response_case("analyze_sentiment", INTENT_MESSAGES["analyze_sentiment"], args.seed)
+    cases.append(("generate_response[analyze_sentiment]", fn, inputs, args.rounds))
+
+    all_messages = [message for messages in INTENT_MESSAGES.values() for message in messages]
+    cases.append(("identify_intent", engine.identify_intent, all_messages, args.rounds))
+    memory = engine.ConversationMemory()
+    cases.append(("ConversationMemory.add_message", lambda message: memory.add_message("user", message),
+                  all_messages, args.rounds))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn, inputs, rounds in cases:
+        results[name] = measure(fn, inputs, rounds=rounds)
+        print(format_row(name, results[name], width=52))
+
+    # Network-bound: fewer rounds, and measured after the in-process cases so the stub's threads stay out of them
+    use_sentiment_backend("finbert")
+    fn, inputs = response_case("analyze_sentiment", INTENT_MESSAGES["analyze_sentiment"], args.seed)
+    name = "generate_response[analyze_sentiment/finbert-stub]"
+    results[name] = measure(fn, inputs, rounds=max(1, args.rounds // 10), warmup=1)
+    print(format_row(name, results[name], width=52))
+    server.shutdown()
+
+    if args.json:
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "seed": args.seed,
+                "rounds": args.rounds,
+                "stub_latency_ms": args.stub_latency_ms,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression, args.min_delta_us)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Typo-tolerant ticker/name lookup: trigram index vs comparing the query with every alias
+
+Run from the repository root::
+
+    python -m benchmarks.bench_fuzzy [--sizes 1000 10000] [--queries 200] [--rounds 5]
+
+Each size is a synthetic universe of pronounceable company names. Queries
+are listed names with one random typo (swap, drop, double or replace a
+letter); recall@1 counts how often the intended symbol ranks first, and
+typos that turn one name into another keep it below 100%. The linear
+baseline scores every alias with the same edit similarity.
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from benchmarks._harness import format_row, measure
+
+from fuzzy_matcher import normalize, similarity
+from market_index import MarketIndex
+
+SYLLABLES = ["ab", "ac", "al", "an", "ar", "bel", "bro", "can", "cor", "dex", "el", "fin", "gen", "hal", "in",
+             "ka", "lex", "lo", "mar", "med", "mo", "nex", "no", "or", "pa", "quan", "ra", "sol", "ta", "tri",
+             "ul", "ver", "vi", "wex", "zen"]
+SUFFIXES = ["Inc.", "Corporation", "Holdings", "Group", "Ltd", "Systems", "Energy", "Pharma", "Capital"]
+
+
+def make_universe(size: int, seed: int = 3):
+    rng = random.Random(seed)
+    universe, names = {}, set()
+    while len(names) < size:
+        stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        name = f"{stem} {rng.choice(SUFFIXES)}"
+        if name in names:
+            continue
+        names.add(name)
+        symbol = f"{stem[:3].upper()}{len(names)}"
+        universe.setdefault(f"sector{len(names) % 11}", {})[symbol] = {"name": name, "description": ""}
+    return universe
+
+
+def typo(word: str, rng: random.Random) -> str:
+    position = rng.randrange(len(word) - 1)
+    kind = rng.choice(("swap", "drop", "double", "replace"))
+    if kind == "swap":
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    if kind == "drop":
+        return word[:position] + word[position + 1:]
+    if kind == "double":
+        return word[:position] + word[position] + word[position:]
+    return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[position + 1:]
+
+
+def make_queries(index: MarketIndex, count: int, seed: int = 9) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    queries = []
+    for record in rng.sample(list(index), count):
+        queries.append((typo(record.name.lower().rstrip("."), rng), record.symbol))
+    return queries
+
+
+def linear_search(aliases: List[Tuple[str, str]], query: str, min_score: float = 0.75):
+    text = normalize(query)
+    best = max(((similarity(text, alias, min_score), symbol) for alias, symbol in aliases), default=(0.0, None))
+    return [best[1]] if best[0] >= min_score else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        index = MarketIndex(make_universe(size))
+        start = time.perf_counter()
+        fuzzy = index.fuzzy
+        built_ms = (time.perf_counter() - start) * 1000
+        aliases = [(normalize(alias), symbol) for alias, symbol in index.by_alias.items()]
+        queries = make_queries(index, min(args.queries, size))
+
+        def indexed(query):
+            return [key for key, _, _ in fuzzy.search(query, limit=1)]
+
+        for name, search, rounds in (("trigram index", indexed, args.rounds),
+                                     ("linear scan", lambda query: linear_search(aliases, query), 1)):
+            hits = sum(search(query)[:1] == [symbol] for query, symbol in queries)
+            stats = measure(search, [query for query, _ in queries], rounds=rounds, warmup=0)
+            print(format_row(f"{name}[{size}]", stats, width=24) + f"  recall@1 {hits / len(queries):.0%}")
+        messages = [f"What is your opinion on {query} stock?" for query, _ in queries]
+        print(format_row(f"find in message[{size}]", measure(fuzzy.find, messages, rounds=args.rounds, warmup=0),
+                         width=24) + f"  (index built in {built_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Per-message latency of the compiled intent classifier against the original regex cascade
+
+Run from the repository root::
+
+    python -m benchmarks.bench_intent [--rounds N]
+
+Queries listed in EXPECTED_DIFFERENCES classify differently on purpose and
+do extra work the cascade never did, so the like-for-like row times the
+classifier on the rest of the corpus only.
+"""
+import argparse
+import re
+from typing import Any, Dict
+
+from benchmarks._harness import format_row, measure
+from engine import FINANCIAL_CONCEPTS, STOCK_INFO, identify_intent
+
+CORPUS = [
+    "hi",
+    "Hello there!",
+    "how's it going?",
+    "thanks!",
+    "bye",
+    "Tell me a joke about bankers",
+    "Can you analyze this statement: Apple reported strong quarterly growth and raised guidance",
+    "Please analyze the following news - Oil prices decline as demand weakens",
+    "What's the current market sentiment?",
+    "What is the sentiment in the tech and energy sectors right now?",
+    "Tell me about AAPL stock sentiment",
+    "What's the sentiment on MSFT and NVDA stock today?",
+    "How is the market feeling about healthcare?",
+    "What are the best fixed deposit rates for a 2 year term?",
+    "Should I buy term insurance or a ULIP policy?",
+    "Compare mutual fund and ETF options for me",
+    "What is an ETF?",
+    "Which insurance plan is better for a family of four?",
+    "I want to invest in safe dividend stocks",
+    "Can you recommend an aggressive growth strategy for crypto?",
+    "What's a good stock to buy for a balanced portfolio?",
+    "Any advice on real estate investing with medium risk?",
+    "Suggest some bond funds for a conservative investor",
+    "How should I start investing in stocks?",
+    "Explain compound interest to me",
+    "What is diversification and why does it matter?",
+    "What is dollar cost averaging?",
+    "I'd like to learn about retirement planning",
+    "How to get into personal finance and budgeting",
+    "Explain the p e ratio",
+    "What are the basics of the stock market?",
+    "I'm worried about my credit card debt and my mortgage",
+    "How much money should I keep in my savings account?",
+    "My bank raised the interest rate on my loan, which is frustrating",
+    "What's the weather like today?",
+    "I just got a promotion and I'm excited to plan my retirement",
+    "Is now a good time to refinance?",
+    "ok",
+    "What happens to bonds when interest rates rise and inflation stays high for several quarters?",
+    "Can you give me an overview of how index investing compares with picking individual growth stocks "
+    "in the technology, healthcare and consumer sectors over a ten year horizon?"
+]
+
+# Query -> (entity, value) the engine returns instead of the cascade's
+EXPECTED_DIFFERENCES = {
+    # The cascade's "retirement" topic has no content; the knowledge base search finds the article
+    "I'd like to learn about retirement planning": ("topic", "retirement_planning")
+}
+
+
+def legacy_identify_intent(message: str) -> Dict[str, Any]:
+    """The original regex-cascade identify_intent, kept as the baseline for comparison"""
+    message_lower = message.lower()
+
+    intent_data = {
+        "primary_intent": "general_query",
+        "secondary_intent": None,
+        "entities": {},
+        "sentiment": "neutral",
+        "is_question": False
+    }
+
+    # Check if it's a question
+    if re.search(r'\?$|^(what|how|why|when|where|who|can|could|would|will|should|is|are|do|does)', message_lower):
+        intent_data["is_question"] = True
+
+    # Extract sentiment in the query itself
+    if re.search(r'\b(happy|excited|pleased|good|great)\b', message_lower):
+        intent_data["sentiment"] = "positive"
+    elif re.search(r'\b(sad|unhappy|disappointed|frustrated|bad|awful)\b', message_lower):
+        intent_data["sentiment"] = "negative"
+
+    # Basic conversation patterns
+    if re.search(r'^(hi|hello|hey|greetings|good morning|good afternoon|good evening)( there)?[.!]?$', message_lower):
+        intent_data["primary_intent"] = "greeting"
+        return intent_data
+
+    if re.search(r"^how are you|how(?:'s)? it going|how have you been|what(?:'s)? up$", message_lower):
+        intent_data["primary_intent"] = "how_are_you"
+        return intent_data
+
+    if re.search(r'^(bye|goodbye|farewell|see you|talk to you later)[.!]?$', message_lower):
+        intent_data["primary_intent"] = "goodbye"
+        return intent_data
+
+    if re.search(r'^(thanks|thank you|appreciate it|thx)[.!]?$', message_lower):
+        intent_data["primary_intent"] = "thanks"
+        return intent_data
+
+    if re.search(r'\bjoke\b|\bfunny\b|\bmake me laugh\b', message_lower):
+        intent_data["primary_intent"] = "joke"
+        return intent_data
+
+    # Sentiment analysis specific patterns
+    if re.search(r'analyze (this|the|my|following) (statement|sentence|text|news)', message_lower):
+        intent_data["primary_intent"] = "analyze_sentiment"
+
+        # Extract the statement to analyze
+        match = re.search(r'analyze (this|the|my|following).*?[:\-] *(.*)', message_lower)
+        if match and match.group(2):
+            intent_data["entities"]["statement"] = match.group(2)
+        return intent_data
+
+    # Market/Stock Sentiment patterns
+    if re.search(r'\b(sentiment|feeling|opinion|mood)\b', message_lower):
+        if re.search(r'\b(market|markets|sector|sectors|industry|industries)\b', message_lower):
+            intent_data["primary_intent"] = "market_sentiment"
+
+            # Extract specific sectors if mentioned
+            for sector in STOCK_INFO.keys():
+                if sector.lower() in message_lower:
+                    if "sectors" not in intent_data["entities"]:
+                        intent_data["entities"]["sectors"] = []
+                    intent_data["entities"]["sectors"].append(sector)
+            return intent_data
+
+        elif re.search(r'\b(stock|ticker|company|symbol)\b', message_lower):
+            intent_data["primary_intent"] = "stock_sentiment"
+
+            # Check if specific stocks are mentioned
+            for sector, stocks in STOCK_INFO.items():
+                for stock in stocks:
+                    if stock.lower() in message_lower:
+                        if "stocks" not in intent_data["entities"]:
+                            intent_data["entities"]["stocks"] = []
+                        intent_data["entities"]["stocks"].append(stock)
+            return intent_data
+
+    # Financial product information patterns
+    if re.search(r'\b(fd|fixed deposit|deposits|deposit rates|insurance|policy|policies|plan|protection|mutual fund|etf|ulip)\b', message_lower):
+        intent_data["primary_intent"] = "product_information"
+
+        # Extract specific product types
+        product_keywords = {
+            "fixed_deposit": ["fd", "fixed deposit", "deposits", "deposit rates"],
+            "insurance": ["insurance", "policy", "protection", "coverage"],
+            "mutual_fund": ["mutual fund", "mf", "fund"],
+            "etf": ["etf", "exchange traded fund", "exchange-traded fund"],
+            "ulip": ["ulip", "unit linked", "unit-linked"]
+        }
+
+        for product, keywords in product_keywords.items():
+            if any(keyword in message_lower for keyword in keywords):
+                intent_data["entities"]["product_type"] = product
+                break
+
+        # Check if it's a recommendation request
+        if re.search(r'\b(recommend|suggest|best|top|good|should I|which one|better|compare)\b', message_lower):
+            intent_data["secondary_intent"] = "recommendation"
+
+        return intent_data
+
+    # Investment recommendation patterns
+    if re.search(r'\b(recommend|suggest|buy|invest|good stock|pick|advice|strategy|approach)\b', message_lower):
+        intent_data["primary_intent"] = "investment_recommendation"
+
+        # Extract investment type
+        investment_types = {
+            "stock": ["stock", "share", "equity"],
+            "mutual_fund": ["mutual fund", "fund"],
+            "etf": ["etf", "exchange traded"],
+            "bond": ["bond", "fixed income"],
+            "real_estate": ["real estate", "property", "reit"],
+            "crypto": ["crypto", "bitcoin", "ethereum", "digital currency"]
+        }
+
+        for inv_type, keywords in investment_types.items():
+            if any(keyword in message_lower for keyword in keywords):
+                intent_data["entities"]["investment_type"] = inv_type
+                break
+
+        # Look for risk preference
+        risk_levels = {
+            "conservative": ["safe", "low risk", "conservative", "secure"],
+            "moderate": ["balanced", "moderate", "medium risk"],
+            "aggressive": ["aggressive", "high risk", "growth"]
+        }
+
+        for risk, keywords in risk_levels.items():
+            if any(keyword in message_lower for keyword in keywords):
+                intent_data["entities"]["risk_preference"] = risk
+                break
+
+        return intent_data
+
+    # Educational content patterns
+    if re.search(r'(how to|get into|start|begin|learn about|explain|what is|what are)\b', message_lower):
+        intent_data["primary_intent"] = "educational"
+
+        # Check for specific financial concepts
+        for concept in FINANCIAL_CONCEPTS:
+            concept_term = concept.replace('_', ' ')
+            if concept_term in message_lower:
+                intent_data["entities"]["concept"] = concept
+                return intent_data
+
+        # Check for educational topics
+        edu_topics = {
+            "investing_basics": ["investing basics", "start investing", "begin investing"],
+            "stock_market": ["stock market", "how stocks work", "buying stocks"],
+            "retirement": ["retirement", "retirement planning", "retirement account"],
+            "personal_finance": ["personal finance", "budgeting", "saving money"]
+        }
+
+        for topic, keywords in edu_topics.items():
+            if any(keyword in message_lower for keyword in keywords):
+                intent_data["entities"]["topic"] = topic
+                break
+
+        return intent_data
+
+    # If no specific intent is identified, treat as a general query
+    return intent_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200, help="passes over the query corpus")
+    args = parser.parse_args()
+
+    mismatches = []
+    for message in CORPUS:
+        result, expected = identify_intent(message), legacy_identify_intent(message)
+        if message in EXPECTED_DIFFERENCES:
+            entity, value = EXPECTED_DIFFERENCES[message]
+            expected["entities"].pop("topic", None)
+            expected["entities"][entity] = value
+        if result != expected:
+            mismatches.append(message)
+    print(f"corpus: {len(CORPUS)} queries, {len(CORPUS) - len(mismatches)} classified as expected "
+          f"({len(EXPECTED_DIFFERENCES)} differ from the cascade on purpose)")
+    for message in mismatches:
+        print(f"  differs: {message!r}")
+
+    comparable = [message for message in CORPUS if message not in EXPECTED_DIFFERENCES]
+    legacy = measure(legacy_identify_intent, CORPUS, rounds=args.rounds)
+    compiled = measure(identify_intent, CORPUS, rounds=args.rounds)
+    print(format_row("regex cascade (original)", legacy, width=34))
+    print(format_row("compiled classifier", compiled, width=34))
+    print(format_row("regex cascade, like for like", measure(legacy_identify_intent, comparable, rounds=args.rounds),
+                     width=34))
+    print(format_row("compiled, like for like", measure(identify_intent, comparable, rounds=args.rounds), width=34))
+    print(f"speedup (mean): {legacy['mean_us'] / compiled['mean_us']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
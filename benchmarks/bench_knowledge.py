@@ -0,0 +1,83 @@
+"""Knowledge base retrieval: inverted-index TF-IDF search vs scoring every document
+
+Run from the repository root::
+
+    python -m benchmarks.bench_knowledge [--sizes 1000 10000] [--rounds 20]
+
+The first rows use the engine's own knowledge dicts; the rest add synthetic
+articles drawn from a Zipf-like vocabulary so the collection grows to each
+size. The linear baseline computes the same cosine similarity against every
+document vector in Python.
+"""
+import argparse
+import math
+import random
+from typing import Dict, List
+
+from benchmarks._harness import format_row, measure
+
+import engine
+from knowledge_index import Document, KnowledgeIndex, build_documents, tokenize
+
+QUERIES = ["explain interest on interest", "how to learn about retirement", "explain value stocks buffett",
+           "explain index funds", "explain spreading risk across assets", "learn about term life insurance"]
+
+
+def synthetic_documents(count: int, seed: int = 5) -> List[Document]:
+    rng = random.Random(seed)
+    vocabulary = [f"term{number}" for number in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return [Document("article", f"article_{number}", f"Article {number}",
+                     " ".join(rng.choices(vocabulary, weights=weights, k=120)))
+            for number in range(count)]
+
+
+class LinearScan:
+    """Same TF-IDF weighting, but every query is scored against every document vector"""
+
+    def __init__(self, index: KnowledgeIndex):
+        self.index = index
+        self.vectors: List[Dict[str, float]] = [{} for _ in index.documents]
+        for term, (ids, values) in index._postings.items():
+            for doc_id, value in zip(ids.tolist(), values.tolist()):
+                self.vectors[doc_id][term] = value
+
+    def search(self, query: str, limit: int = 3):
+        terms: Dict[str, int] = {}
+        for token in tokenize(query):
+            if token in self.index.idf:
+                terms[token] = terms.get(token, 0) + 1
+        weights = {term: (1 + math.log(count)) * self.index.idf[term] for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        scored = [(sum(vector.get(term, 0.0) * weight for term, weight in weights.items()) / norm, doc_id)
+                  for doc_id, vector in enumerate(self.vectors)]
+        scored.sort(reverse=True)
+        return [(self.index.documents[doc_id], score) for score, doc_id in scored[:limit] if score > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    base = build_documents({
+        "concept": engine.FINANCIAL_CONCEPTS,
+        "education": engine.FINANCIAL_EDUCATION,
+        "strategy": engine.INVESTMENT_STRATEGIES,
+        "product": engine.FINANCIAL_PRODUCTS
+    })
+    for size in [len(base)] + args.sizes:
+        index = KnowledgeIndex(base + synthetic_documents(max(0, size - len(base))))
+        linear = LinearScan(index)
+        for query in QUERIES:
+            if index.search(query, limit=1)[0][0] != linear.search(query, limit=1)[0][0]:
+                raise SystemExit(f"index and linear scan disagree on {query!r}")
+        print(format_row(f"index.search[{len(index)} docs]", measure(index.search, QUERIES, rounds=args.rounds),
+                         width=34))
+        print(format_row(f"linear scan[{len(index)} docs]", measure(linear.search, QUERIES,
+                                                                    rounds=max(1, args.rounds // 10)), width=34))
+
+
+if __name__ == "__main__":
+    main()
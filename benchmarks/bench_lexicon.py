@@ -0,0 +1,54 @@
+"""Throughput of the weighted lexicon scorer used by generate_simulated_sentiment
+
+Run from the repository root::
+
+    python -m benchmarks.bench_lexicon [--headlines 50000]
+"""
+import argparse
+import time
+
+from benchmarks.bench_sentiment_backends import make_headlines
+from lexicons import NEGATIVE_WORDS, POSITIVE_WORDS, SENTIMENT_SCORER
+
+
+def two_pass_scoring(statement: str):
+    """The original scoring: substring checks of every lexicon word, then a second pass for key phrases"""
+    statement_lower = statement.lower()
+    positive_count = sum(1 for word in POSITIVE_WORDS if word in statement_lower)
+    negative_count = sum(1 for word in NEGATIVE_WORDS if word in statement_lower)
+    sentiment = "positive" if positive_count > negative_count else "negative" if negative_count > positive_count else "neutral"
+
+    words = statement.split()
+    key_phrases = []
+    for i, word in enumerate(words):
+        word_lower = word.lower().strip(".,!?;:")
+        if (word_lower in POSITIVE_WORDS and sentiment == "positive") or \
+                (word_lower in NEGATIVE_WORDS and sentiment == "negative"):
+            key_phrases.append(" ".join(words[max(0, i - 2):min(len(words), i + 3)]))
+    return sentiment, key_phrases[:2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--headlines", type=int, default=50000)
+    args = parser.parse_args()
+
+    headlines = make_headlines(args.headlines)
+
+    start = time.perf_counter()
+    for headline in headlines:
+        two_pass_scoring(headline)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for result in SENTIMENT_SCORER.score_batch(headlines):
+        result.key_phrases()
+    scored = time.perf_counter() - start
+
+    print(f"{len(headlines):,} headlines")
+    print(f"original two-pass substring scoring: {len(headlines) / baseline:12,.0f} headlines/s")
+    print(f"single-pass weighted scorer:         {len(headlines) / scored:12,.0f} headlines/s")
+
+
+if __name__ == "__main__":
+    main()
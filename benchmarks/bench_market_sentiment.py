@@ -0,0 +1,102 @@
+"""Whole-market sentiment: per-sector/per-symbol random loops vs one vectorized NumPy pass
+
+Run from the repository root::
+
+    python -m benchmarks.bench_market_sentiment [--sizes 25 1000 10000] [--rounds 5]
+
+The loop baseline is the logic of generate_market_sentiment plus one
+generate_dynamic_stock_sentiment call per symbol, run over a synthetic
+universe of the requested size.
+"""
+import argparse
+import random
+import time
+
+from market_index import MarketIndex
+from market_sentiment import STOCK_REASONS, simulate_market_sentiment
+
+SECTORS = ["technology", "finance", "healthcare", "energy", "consumer", "industrials", "utilities",
+           "materials", "real_estate", "telecom", "transport"]
+
+
+def make_universe(size: int, seed: int = 11):
+    rng = random.Random(seed)
+    universe = {sector: {} for sector in SECTORS}
+    for number in range(size):
+        symbol = f"S{number:05d}"
+        universe[rng.choice(SECTORS)][symbol] = {"name": f"Synthetic {number} Inc.", "description": ""}
+    return universe
+
+
+def loop_stock_sentiment(index: MarketIndex, symbol: str):
+    """generate_dynamic_stock_sentiment as written, against ``index``"""
+    sentiment = random.choices(["positive", "neutral", "negative"], weights=[0.5, 0.3, 0.2])[0]
+    record = index.get(symbol)
+    if sentiment == "positive":
+        score = round(random.uniform(0.65, 0.95), 2)
+    elif sentiment == "neutral":
+        score = round(random.uniform(0.45, 0.65), 2)
+    else:
+        score = round(random.uniform(0.15, 0.45), 2)
+    reasons = STOCK_REASONS[("positive", "neutral", "negative").index(sentiment)]
+    return {
+        "symbol": symbol,
+        "name": record.name if record else symbol,
+        "sentiment": sentiment,
+        "score": score,
+        "news_count": random.randint(3, 25),
+        "trending": "up" if sentiment == "positive" else "down" if sentiment == "negative" else "steady",
+        "key_reasons": random.sample(reasons, k=2)
+    }
+
+
+def loop_market_sentiment(index: MarketIndex):
+    """generate_market_sentiment as written, against ``index``"""
+    sentiments = {}
+    for sector in index.sectors:
+        value = random.choice(["positive", "neutral", "negative"])
+        if value == "positive":
+            score = round(random.uniform(0.65, 0.95), 2)
+        elif value == "neutral":
+            score = round(random.uniform(0.45, 0.65), 2)
+        else:
+            score = round(random.uniform(0.15, 0.45), 2)
+        stocks = list(index.sector_symbols(sector))
+        sentiments[sector] = {
+            "sentiment": value,
+            "score": score,
+            "trending": "up" if value == "positive" else "down" if value == "negative" else "stable",
+            "top_performers": random.sample(stocks, k=min(2, len(stocks)))
+        }
+    return sentiments
+
+
+def loop_overview(index: MarketIndex):
+    return loop_market_sentiment(index), [loop_stock_sentiment(index, symbol) for symbol in index.symbols]
+
+
+def time_call(fn, rounds: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8}  {'loops ms':>10}  {'numpy ms':>10}  {'speedup':>8}")
+    for size in args.sizes:
+        index = MarketIndex(make_universe(size))
+        seeds = iter(range(10**9))
+        loops = time_call(lambda: loop_overview(index), args.rounds)
+        vectorized = time_call(lambda: simulate_market_sentiment(index, seed=next(seeds)), args.rounds)
+        print(f"{size:>8}  {loops * 1000:10.3f}  {vectorized * 1000:10.3f}  {loops / vectorized:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Bytes per session and add_message latency: list-of-dicts history vs the MessageRing buffer
+
+Run from the repository root::
+
+    python -m benchmarks.bench_memory [--sessions 10000] [--turns 12] [--history 10] [--rounds 20]
+
+Both layouts keep ``--history`` messages per session and run the same topic
+extraction; the baseline is ConversationMemory's previous storage (a
+``__dict__`` instance holding a list of ``{"role", "content"}`` dicts with
+``pop(0)`` eviction). Memory is the tracemalloc delta of building every
+session, so it includes message contents, which are identical for both.
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from benchmarks._harness import format_row, measure
+
+import engine
+
+USER_MESSAGES = ["What is your opinion on AAPL stock?", "Explain compound interest",
+                 "Where should I invest my money for retirement?", "How is the technology sector doing?"]
+
+
+class ListMemory:
+    """ConversationMemory's previous message storage"""
+
+    def __init__(self, max_history: int = 10):
+        self.max_history = max_history
+        self.messages = []
+        self.topics_discussed = set()
+        self.user_interests = set()
+        self.user_profile = {"persona": "beginner", "interests": [], "knowledge_areas": [], "goals": []}
+
+    def add_message(self, role: str, content: str):
+        self.messages.append({"role": role, "content": content})
+        if len(self.messages) > self.max_history:
+            self.messages.pop(0)
+        if role == "user":
+            engine.ConversationMemory._extract_topics_and_interests(self, content)
+
+    def get_recent_messages(self, count: int = 3):
+        return self.messages[-count:] if len(self.messages) >= count else self.messages
+
+
+def fill(memory, session: int, turns: int):
+    for turn in range(turns):
+        # Distinct strings per session, as real conversations would have
+        memory.add_message("user", f"{USER_MESSAGES[turn % len(USER_MESSAGES)]} ({session}.{turn})")
+        memory.add_message("assistant", f"Here is what I found for session {session}, turn {turn}.")
+
+
+def bytes_per_session(factory, sessions: int, turns: int, history: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = {}
+    for session in range(sessions):
+        memory = store[f"session-{session}"] = factory(history)
+        fill(memory, session, turns)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # The store dict and its keys are the same for both layouts
+    overhead = sys.getsizeof(store) + sum(sys.getsizeof(key) for key in store)
+    return (used - overhead) / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=12, help="user/assistant pairs per session")
+    parser.add_argument("--history", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    layouts = (("list of dicts", ListMemory), ("MessageRing", engine.ConversationMemory))
+    print(f"{args.sessions} sessions, {args.turns} turns each, history {args.history}")
+    for name, factory in layouts:
+        per_session = bytes_per_session(factory, args.sessions, args.turns, args.history)
+        print(f"  {name:<14} {per_session:10,.0f} bytes/session  "
+              f"{per_session * args.sessions / 2**20:8.1f} MiB total")
+
+    print()
+    messages = [f"{message} (timing)" for message in USER_MESSAGES]
+    for name, factory in layouts:
+        memory = factory(args.history)
+        fill(memory, 0, args.turns)
+        # A full history, so every call evicts; assistant turns skip topic extraction
+        print(format_row(f"add_message[{name}]", measure(lambda message: memory.add_message("assistant", message),
+                                                         messages, rounds=args.rounds), width=36))
+        print(format_row(f"get_recent_messages[{name}]", measure(lambda count: memory.get_recent_messages(count),
+                                                                 [3, 6], rounds=args.rounds), width=36))
+    # The zero-copy view the engine itself reads recent messages through
+    print(format_row("messages.recent[MessageRing]", measure(lambda count: memory.messages.recent(count),
+                                                             [3, 6], rounds=args.rounds), width=36))
+
+
+if __name__ == "__main__":
+    main()
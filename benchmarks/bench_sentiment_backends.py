@@ -0,0 +1,109 @@
+"""Latency and throughput of the sentiment backends behind analyze_sentiment
+
+Run from the repository root::
+
+    python -m benchmarks.bench_sentiment_backends [--batch-sizes 1 32 1024] [--stub-latency-ms 40]
+
+The FinBERT backend is measured against an in-process stub server that
+answers after ``--stub-latency-ms`` to stand in for the network hop.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks._harness import format_row, measure
+from lexicons import NEGATIVE_WORDS, POSITIVE_WORDS
+from local_sentiment import HashedLinearBackend
+from sentiment_backends import FinBertBackend
+from sentiment_client import CircuitBreaker, FinBertClient
+
+TEMPLATES = [
+    "{company} reports {adjective} quarterly earnings as revenue {movement}",
+    "Analysts see {adjective} outlook for {company} after {event}",
+    "{company} shares {movement} on {event}",
+    "Investors weigh {event} at {company} amid {adjective} guidance"
+]
+COMPANIES = ["Apple", "Microsoft", "Exxon", "Pfizer", "JPMorgan", "Walmart", "Nvidia", "Chevron"]
+ADJECTIVES = ["strong", "weak", "mixed", "improving", "bearish", "bullish", "steady", "negative"]
+MOVEMENTS = ["rise", "decline", "gain", "fall", "increase", "decrease", "hold steady"]
+EVENTS = ["the product launch", "a debt downgrade", "a profit warning", "record growth", "a merger",
+          "regulatory issue", "a buyback"]
+
+
+def make_headlines(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(company=rng.choice(COMPANIES), adjective=rng.choice(ADJECTIVES),
+                                         movement=rng.choice(MOVEMENTS), event=rng.choice(EVENTS))
+            for _ in range(count)]
+
+
+def start_stub_server(latency_ms: float):
+    """A FinBERT look-alike that labels every input neutral after a fixed delay"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without TCP_NODELAY the body waits on a delayed ACK
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["inputs"]
+            prediction = [{"label": "neutral", "score": 0.9}]
+            result = [prediction for _ in inputs] if isinstance(inputs, list) else [prediction]
+            time.sleep(latency_ms / 1000)
+            payload = json.dumps(result).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024, 16384])
+    parser.add_argument("--stub-latency-ms", type=float, default=40.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    headlines = make_headlines(max(args.batch_sizes))
+    local = HashedLinearBackend.from_lexicon(POSITIVE_WORDS, NEGATIVE_WORDS)
+
+    server = start_stub_server(args.stub_latency_ms)
+    client = FinBertClient(f"http://127.0.0.1:{server.server_port}/", cache_size=1,
+                           breaker=CircuitBreaker(failure_threshold=10**9))
+    finbert = FinBertBackend(client)
+
+    print("single statement latency")
+    print(format_row("local (hashed linear)", measure(local.predict, headlines[:200], rounds=args.rounds)))
+    print(format_row("finbert (stub server)", measure(finbert.predict, headlines[:20], rounds=1)))
+
+    print("\nbatch throughput")
+    for backend in (local, finbert):
+        for size in args.batch_sizes:
+            if backend is finbert and size > 1024:
+                continue
+            batch = headlines[:size]
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                backend.predict_batch(batch)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"{backend.name:<8} batch {size:>6}: {elapsed * 1000:9.2f} ms/batch  "
+                  f"{size / elapsed:12,.0f} statements/s")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
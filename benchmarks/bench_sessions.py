@@ -0,0 +1,71 @@
+"""chatbot() latency with sessions in memory only, with the write-behind SQLite log, and with synchronous commits
+
+Run from the repository root::
+
+    python -m benchmarks.bench_sessions [--sessions 2000] [--turns 5] [--db /tmp/bench-sessions.db]
+
+Every mode replays the same messages round-robin over ``--sessions``
+sessions. "write-behind" is the SESSION_DB_PATH setup; "synchronous" commits
+each turn at once (no batching window) and waits for it before returning,
+which is what writing in the request path would cost. The database file is
+recreated for each mode.
+"""
+import argparse
+import os
+import time
+
+from benchmarks._harness import format_row, measure
+
+import engine
+from session_log import SQLiteSessionLog
+
+MESSAGES = ["hi", "What is your opinion on AAPL stock?", "Explain compound interest",
+            "I want safe low risk retirement investments", "What do you think about bonds?"]
+
+
+def use_log(path, flush_ms: float = engine.SESSION_FLUSH_MS):
+    """Point the engine's session store at a fresh database, or at none"""
+    for suffix in ("", "-wal", "-shm"):
+        if path and os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    engine.get_session_log.log = SQLiteSessionLog(path, flush_ms=flush_ms) if path else None
+    engine.SESSIONS.load = engine.load_session if path else None
+    engine.SESSIONS.on_update = engine.save_session if path else None
+    for session_id in list(engine.SESSIONS._sessions):
+        engine.SESSIONS._remove(session_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--db", default="/tmp/bench-sessions.db")
+    args = parser.parse_args()
+
+    engine.LLM_API_ENABLED = False
+    calls = [(f"session-{number % args.sessions}", MESSAGES[(number // args.sessions) % len(MESSAGES)])
+             for number in range(args.sessions * args.turns)]
+
+    for mode, path in (("memory only", None), ("write-behind", args.db), ("synchronous", args.db)):
+        use_log(path, flush_ms=0 if mode == "synchronous" else engine.SESSION_FLUSH_MS)
+        log = engine.get_session_log.log
+
+        def call(item):
+            engine.chatbot(item[1], [], item[0])
+            if mode == "synchronous":
+                log.flush()
+
+        start = time.perf_counter()
+        stats = measure(call, calls, rounds=1, warmup=0)
+        if log is not None:
+            log.flush()
+        elapsed = time.perf_counter() - start
+        extra = f"  {len(calls) / elapsed:8,.0f} turns/s end to end"
+        if log is not None:
+            extra += f", {log.batches_written} commits"
+            log.close()
+        print(format_row(f"chatbot[{mode}]", stats, width=24) + extra)
+
+
+if __name__ == "__main__":
+    main()
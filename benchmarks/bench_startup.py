@@ -0,0 +1,88 @@
+"""Import-time report for the chatbot engine and, optionally, the Gradio UI
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup [--module engine] [--runs 5] [--top 15] [--budget-ms 50] [--ui]
+
+The repository's modules are byte-compiled first, as an installed copy would
+be, so stale bytecode (or ``PYTHONDONTWRITEBYTECODE``) does not add compile
+time to every run. Every run imports the module in a fresh interpreter under
+``-X importtime``; the report shows the median wall time, the slowest imports
+by self and cumulative time, and whether heavy optional dependencies got
+pulled in. The exit status is 1 when the median exceeds ``--budget-ms``.
+"""
+import argparse
+import compileall
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Imports the engine must not trigger; they belong behind lazy getters or the launch path
+HEAVY_MODULES = ("gradio", "requests", "httpx", "numpy", "pyarrow")
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, Tuple[int, int]], List[str]]:
+    """Import ``module`` in a fresh interpreter: wall ms, {name: (self us, cumulative us)}, heavy modules loaded"""
+    probe = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"print(elapsed, *[name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                               capture_output=True, text=True, check=True)
+    fields = completed.stdout.split()
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return float(fields[0]), timings, fields[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="engine")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--ui", action="store_true", help="also time importing code.py and building the UI")
+    args = parser.parse_args()
+
+    compileall.compile_dir(".", maxlevels=0, quiet=1)
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    walls = sorted(profile[0] for profile in profiles)
+    median = statistics.median(walls)
+    _, timings, heavy = profiles[len(profiles) // 2]
+
+    print(f"import {args.module}: median {median:.1f} ms  min {walls[0]:.1f} ms  max {walls[-1]:.1f} ms "
+          f"over {args.runs} fresh interpreters (budget {args.budget_ms:.0f} ms)")
+    print(f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+    for title, column in (("self", 0), ("cumulative", 1)):
+        print(f"\nslowest imports by {title} time")
+        ranked = sorted(timings.items(), key=lambda item: item[1][column], reverse=True)[:args.top]
+        for name, (self_us, cumulative_us) in ranked:
+            print(f"  {name:<40} self {self_us / 1000:8.2f} ms  cumulative {cumulative_us / 1000:8.2f} ms")
+
+    if args.ui:
+        ui_probe = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import code\n"
+            "imported = time.perf_counter()\n"
+            "code.build_ui()\n"
+            "print((imported - start) * 1000, (time.perf_counter() - imported) * 1000)\n"
+        )
+        completed = subprocess.run([sys.executable, "-W", "ignore", "-c", ui_probe],
+                                   capture_output=True, text=True, check=True)
+        imported_ms, built_ms = map(float, completed.stdout.split()[-2:])
+        print(f"\nimport code (gradio UI module): {imported_ms:.1f} ms, build_ui(): {built_ms:.1f} ms")
+
+    sys.exit(1 if median > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""chatbot() throughput with several worker processes sharing sessions through SESSION_BACKEND=shared
+
+Run from the repository root::
+
+    python -m benchmarks.bench_workers [--workers 1 2 4] [--sessions 500] [--turns 6] [--db /tmp/bench-workers.db]
+
+Every turn of every session goes to a random worker, as behind a load
+balancer without sticky sessions; a session's turns still run one after
+the other, like a user waiting for each reply. Afterwards every stored
+session must hold all of its messages, so a turn that saw stale history
+shows up as an error. Throughput can only grow with workers up to the
+number of cores.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+MESSAGES = ["hi", "What is your opinion on AAPL stock?", "Explain compound interest",
+            "I want safe low risk retirement investments", "What do you think about bonds?"]
+
+
+def _init(path: str):
+    # Configured before the engine is imported, as a worker started with these variables would be
+    os.environ.update(SESSION_BACKEND="shared", SESSION_DB_PATH=path, LLM_API_ENABLED="false")
+    global engine
+    import engine
+
+
+def _turn(call):
+    session_id, message = call
+    engine.chatbot(message, [], session_id)
+
+
+def stored_sizes(path: str, messages: int):
+    """(sessions with a complete history, mean encoded bytes) read back from the database"""
+    import sqlite3
+    from session_codec import decode_session
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT data FROM shared_sessions WHERE session_id LIKE 'session-%'").fetchall()
+    connection.close()
+    complete = sum(decode_session(data)[1][-1][0] == messages for data, in rows)
+    return complete, sum(len(data) for data, in rows) / max(len(rows), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--db", default="/tmp/bench-workers.db")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    for workers in args.workers:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+        rng = random.Random(workers)
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init, initargs=(args.db,)) as pool:
+            # Imports the engine in every worker before the clock starts
+            pool.map(_turn, [(f"warmup-{number}", "hi") for number in range(workers)], chunksize=1)
+            start = time.perf_counter()
+            for turn in range(args.turns):
+                calls = [(f"session-{number}", MESSAGES[turn % len(MESSAGES)]) for number in range(args.sessions)]
+                rng.shuffle(calls)
+                pool.map(_turn, calls, chunksize=8)
+            elapsed = time.perf_counter() - start
+
+        complete, mean_bytes = stored_sizes(args.db, 2 * args.turns)
+        total = args.sessions * args.turns
+        print(f"workers {workers:<3} {total / elapsed:10,.0f} turns/s  "
+              f"{complete}/{args.sessions} sessions complete  {mean_bytes:,.0f} bytes/session stored")
+
+
+if __name__ == "__main__":
+    main()
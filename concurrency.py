@@ -0,0 +1,56 @@
+"""Per-key concurrency limits with non-blocking admission"""
+import threading
+from typing import Dict, Mapping, Optional
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Parse ``"intent=4,other=8"`` into a limit per key; empty entries are ignored"""
+    limits = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        key, _, value = entry.partition("=")
+        if not value.strip():
+            raise ValueError(f"Expected key=limit, got {entry.strip()!r}")
+        limits[key.strip()] = int(value)
+    return limits
+
+
+class ConcurrencyLimiter:
+    """Caps how many calls per key may run at once; keys without a limit are never held back.
+
+    :meth:`try_acquire` never waits, so it is safe to call from an event loop:
+    a caller that gets False should answer "busy" straight away instead of
+    queueing behind slow work. Every successful acquire must be paired with
+    :meth:`release`.
+    """
+
+    def __init__(self, limits: Mapping[str, int]):
+        self.limits = dict(limits)
+        self.rejected: Dict[str, int] = {key: 0 for key in self.limits}
+        self._active: Dict[str, int] = {key: 0 for key in self.limits}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str) -> bool:
+        limit = self.limits.get(key)
+        if limit is None:
+            return True
+        with self._lock:
+            if self._active[key] >= limit:
+                self.rejected[key] += 1
+                return False
+            self._active[key] += 1
+            return True
+
+    def release(self, key: str):
+        if key not in self.limits:
+            return
+        with self._lock:
+            self._active[key] -= 1
+
+    def active(self, key: Optional[str] = None) -> int:
+        """Calls currently admitted for ``key``, or across every limited key"""
+        with self._lock:
+            if key is not None:
+                return self._active.get(key, 0)
+            return sum(self._active.values())
@@ -0,0 +1,1521 @@
+"""Chatbot engine: intent detection, response generation and session memory, free of any UI code"""
+import random
+import importlib.util
+import os
+import sys
+import time
+from typing import List, Dict, Any, AsyncIterator, Iterator, Tuple, Optional
+
+import lexicons
+import metrics
+from concurrency import ConcurrencyLimiter, parse_limits
+from cache import TTLCache
+from intent_engine import IntentClassifier
+from knowledge_base import KnowledgeBase
+from market_universe import MarketUniverse
+from message_ring import MessageRing
+from session_codec import decode_session, encode_session
+from session_store import SessionStore
+from snapshot_cache import SnapshotCache
+
+# Configuration for optional LLM API integration
+LLM_API_ENABLED = os.environ.get("LLM_API_ENABLED", "false").lower() == "true"  # Set to true when you have your LLM API ready
+LLM_API_URL = os.environ.get("LLM_API_URL", "")
+LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
+LLM_MODEL = os.environ.get("LLM_MODEL", "")
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "2.0"))
+LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", "30.0"))
+LLM_TOTAL_TIMEOUT = float(os.environ.get("LLM_TOTAL_TIMEOUT", "60.0"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "20"))
+LLM_SYSTEM_PROMPT = (
+    "You are a friendly financial assistant. Give clear, balanced, educational answers about "
+    "personal finance, investing and markets, and never present them as personalized financial advice."
+)
+# Appended to a streamed reply the API stopped sending partway; a reply that fails before its
+# first chunk is answered from the templates instead
+LLM_INTERRUPTED_NOTICE = os.environ.get(
+    "LLM_INTERRUPTED_NOTICE", "\n\n[The rest of this answer could not be loaded. Please ask again.]")
+
+# Configuration for FinBERT (used as fallback for sentiment analysis)
+FINBERT_ENABLED = False  # Toggle for using FinBERT API
+API_TOKEN = os.environ.get("HF_API_TOKEN", "")
+MODEL_NAME = "ProsusAI/finbert"
+API_URL = f"https://api-inference.huggingface.co/models/{MODEL_NAME}"
+HEADERS = {"Authorization": f"Bearer {API_TOKEN}"} if API_TOKEN else {}
+FINBERT_CONNECT_TIMEOUT = float(os.environ.get("FINBERT_CONNECT_TIMEOUT", "2.0"))
+FINBERT_READ_TIMEOUT = float(os.environ.get("FINBERT_READ_TIMEOUT", "5.0"))
+FINBERT_POOL_SIZE = int(os.environ.get("FINBERT_POOL_SIZE", "10"))
+FINBERT_WAIT_FOR_MODEL = os.environ.get("FINBERT_WAIT_FOR_MODEL", "false").lower() == "true"
+FINBERT_CACHE_SIZE = int(os.environ.get("FINBERT_CACHE_SIZE", "4096"))
+FINBERT_CACHE_TTL = float(os.environ.get("FINBERT_CACHE_TTL", "600"))
+FINBERT_BREAKER_THRESHOLD = int(os.environ.get("FINBERT_BREAKER_THRESHOLD", "3"))
+FINBERT_BREAKER_RESET = float(os.environ.get("FINBERT_BREAKER_RESET", "30"))
+FINBERT_SLOW_CALL_SECONDS = float(os.environ.get("FINBERT_SLOW_CALL_SECONDS", "3.0"))
+# Concurrent requests are coalesced into one batched call per window; 0 disables batching
+FINBERT_BATCH_WINDOW_MS = float(os.environ.get("FINBERT_BATCH_WINDOW_MS", "15"))
+FINBERT_MAX_BATCH = int(os.environ.get("FINBERT_MAX_BATCH", "32"))
+
+# Sentiment backend used by analyze_sentiment: "finbert" (remote API), "local" (in-process
+# hashed n-gram model) or "simulated" (keyword heuristics only)
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "finbert" if FINBERT_ENABLED else "simulated")
+SENTIMENT_MODEL_PATH = os.environ.get("SENTIMENT_MODEL_PATH", "")
+
+# Limits for the per-session conversation memory store
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "10000"))
+SESSION_TTL_SECONDS = float(os.environ.get("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Optional SQLite file that keeps sessions across restarts; turns are written behind the
+# request path in batches every SESSION_FLUSH_MS
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", "")
+SESSION_FLUSH_MS = float(os.environ.get("SESSION_FLUSH_MS", "50"))
+# Where sessions live between turns: "memory" (this process, plus the log above) or "shared"
+# (the SESSION_DB_PATH file, read and written every turn, so any worker process can answer a
+# session's next message). The Gradio UI still needs sticky routing across workers: its queue
+# keeps each event's join request and result stream in the process that accepted it
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+
+# Rendered responses for the deterministic intents (products, recommendations, education)
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+
+# The UI app serves Prometheus metrics at /metrics; set a port to also serve them from a separate
+# local server (one per process, so only for a single worker)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+# Most concurrent replies per intent ("intent=limit,..."); the network-bound intents are capped
+# so they cannot tie up every worker, and requests over the cap get BUSY_RESPONSE at once
+INTENT_CONCURRENCY = parse_limits(os.environ.get(
+    "INTENT_CONCURRENCY", f"analyze_sentiment={FINBERT_MAX_BATCH},general_query={2 * LLM_MAX_CONCURRENCY}"))
+BUSY_RESPONSE = ("I'm handling a lot of requests like this one right now. "
+                 "Please try again in a moment, or ask me something else in the meantime.")
+
+# Enhanced stock data with more context and information
+STOCK_INFO = {
+    "tech": {
+        "AAPL": {"name": "Apple Inc.", "description": "Consumer electronics, software, and services"},
+        "MSFT": {"name": "Microsoft Corporation", "description": "Software, cloud computing, hardware"},
+        "GOOGL": {"name": "Alphabet Inc.", "description": "Internet services, software, hardware"},
+        "AMZN": {"name": "Amazon.com Inc.", "description": "E-commerce, cloud computing, digital streaming"},
+        "NVDA": {"name": "NVIDIA Corporation", "description": "Graphics processing units, AI computing"}
+    },
+    "healthcare": {
+        "JNJ": {"name": "Johnson & Johnson", "description": "Pharmaceuticals, medical devices, consumer goods"},
+        "PFE": {"name": "Pfizer Inc.", "description": "Pharmaceuticals and biotechnology"},
+        "UNH": {"name": "UnitedHealth Group", "description": "Health insurance and healthcare services"},
+        "ABBV": {"name": "AbbVie Inc.", "description": "Biopharmaceuticals"},
+        "MRK": {"name": "Merck & Co.", "description": "Pharmaceuticals and vaccines"}
+    },
+    "finance": {
+        "JPM": {"name": "JPMorgan Chase & Co.", "description": "Banking and financial services"},
+        "BAC": {"name": "Bank of America Corp.", "description": "Banking and financial services"},
+        "WFC": {"name": "Wells Fargo & Company", "description": "Banking and financial services"},
+        "GS": {"name": "Goldman Sachs Group", "description": "Investment banking and financial services"},
+        "MS": {"name": "Morgan Stanley", "description": "Investment banking and financial services"}
+    },
+    "energy": {
+        "XOM": {"name": "Exxon Mobil Corporation", "description": "Oil and gas exploration, production, refining"},
+        "CVX": {"name": "Chevron Corporation", "description": "Oil and gas exploration, production, refining"},
+        "COP": {"name": "ConocoPhillips", "description": "Oil and gas exploration and production"},
+        "SLB": {"name": "Schlumberger Limited", "description": "Oilfield services and equipment"},
+        "EOG": {"name": "EOG Resources", "description": "Oil and gas exploration and production"}
+    },
+    "consumer": {
+        "PG": {"name": "Procter & Gamble", "description": "Consumer goods, personal care products"},
+        "KO": {"name": "Coca-Cola Company", "description": "Beverages"},
+        "PEP": {"name": "PepsiCo, Inc.", "description": "Beverages and snack foods"},
+        "WMT": {"name": "Walmart Inc.", "description": "Retail, wholesale, and other services"},
+        "MCD": {"name": "McDonald's Corporation", "description": "Fast food restaurants"}
+    }
+}
+
+# Stock universe behind every symbol and sector lookup: the listing file named by
+# MARKET_UNIVERSE_PATH (.csv, .parquet or .arrow) when set, otherwise STOCK_INFO.
+# It is indexed on first use; after MARKET_UNIVERSE.start() a watcher thread re-reads the
+# file when it changes and swaps the new index in, so requests only read a reference.
+MARKET_UNIVERSE = MarketUniverse(
+    os.environ.get("MARKET_UNIVERSE_PATH") or None,
+    default=STOCK_INFO,
+    refresh_seconds=float(os.environ.get("MARKET_UNIVERSE_REFRESH_SECONDS", "60")),
+    # Compile the classifier for the new symbols in the watcher thread rather than in a request
+    on_swap=lambda index: get_intent_classifier()
+)
+
+# Sector and symbol sentiment is drawn once per time bucket and shared by every session;
+# 0 regenerates it on every request
+MARKET_SNAPSHOT_SECONDS = float(os.environ.get("MARKET_SNAPSHOT_SECONDS", "300"))
+
+# Educational questions that name no known concept or topic are matched against the whole
+# knowledge base by TF-IDF; weaker matches than this get the general education answer
+KNOWLEDGE_MIN_SCORE = float(os.environ.get("KNOWLEDGE_MIN_SCORE", "0.2"))
+
+# Stock questions naming no listed ticker or company are retried with typo-tolerant matching;
+# a name must be at least this similar (1 - edits / length) to count
+FUZZY_MATCH_MIN_SCORE = float(os.environ.get("FUZZY_MATCH_MIN_SCORE", "0.75"))
+
+# Optional directory of knowledge base JSON files (concepts.json, education.json, strategies.json,
+# products.json, personas.json) replacing the built-in content below; re-checked in the background
+KNOWLEDGE_DIR = os.environ.get("KNOWLEDGE_DIR", "")
+KNOWLEDGE_REFRESH_SECONDS = float(os.environ.get("KNOWLEDGE_REFRESH_SECONDS", "5"))
+
+# Financial education content - expanded with more resources
+FINANCIAL_EDUCATION = {
+    "investing_basics": {
+        "title": "Investing Basics",
+        "content": "Investing involves allocating resources (usually money) with the expectation of generating income or profit. The main investment types include stocks, bonds, mutual funds, ETFs, real estate, and commodities.",
+        "resources": [
+            {"name": "Investment Fundamentals", "type": "guide"},
+            {"name": "Risk vs. Return", "type": "concept"},
+            {"name": "Asset Allocation", "type": "strategy"}
+        ]
+    },
+    "stock_market": {
+        "title": "Understanding the Stock Market",
+        "content": "The stock market is where shares of publicly traded companies are bought and sold. It provides companies with capital while giving investors the opportunity to share in the profits of businesses.",
+        "resources": [
+            {"name": "How Stock Markets Work", "type": "guide"},
+            {"name": "Bull vs. Bear Markets", "type": "concept"},
+            {"name": "Market Indices Explained", "type": "concept"}
+        ]
+    },
+    "personal_finance": {
+        "title": "Personal Finance Management",
+        "content": "Personal finance covers budgeting, saving, investing, debt management, and retirement planning. It's about making informed decisions to achieve your financial goals.",
+        "resources": [
+            {"name": "Budgeting Strategies", "type": "guide"},
+            {"name": "Emergency Fund Planning", "type": "strategy"},
+            {"name": "Debt Reduction Methods", "type": "strategy"}
+        ]
+    },
+    "retirement_planning": {
+        "title": "Retirement Planning",
+        "content": "Retirement planning involves defining retirement income goals and the actions needed to achieve those goals. It includes identifying sources of income, estimating expenses, and implementing a savings program.",
+        "resources": [
+            {"name": "Retirement Accounts Explained", "type": "guide"},
+            {"name": "The 4% Withdrawal Rule", "type": "concept"},
+            {"name": "Social Security Benefits", "type": "guide"}
+        ]
+    }
+}
+
+# Financial concepts dictionary - expanded with more detailed explanations
+FINANCIAL_CONCEPTS = {
+    "inflation": {
+        "short": "The rate at which the general level of prices for goods and services rises, causing purchasing power to fall.",
+        "detailed": "Inflation is the gradual increase in prices and fall in the purchasing value of money. It affects everything from your grocery bill to investment returns. Central banks like the Federal Reserve typically target a moderate inflation rate of about 2% annually. Investments need to outpace inflation to generate real returns."
+    },
+    "compound_interest": {
+        "short": "Interest calculated on the initial principal and also on the accumulated interest over previous periods.",
+        "detailed": "Compound interest is essentially 'interest on interest' and is the reason why investing early is so powerful. For example, $1,000 invested at 5% annually will be worth $1,050 after one year. The next year, you earn interest on $1,050, not just the original $1,000. Over time, this effect snowballs dramatically."
+    },
+    "diversification": {
+        "short": "Spreading investments across different assets to reduce risk.",
+        "detailed": "Diversification means not putting all your eggs in one basket. By spreading investments across various asset classes (stocks, bonds, real estate), sectors, and geographic regions, you can reduce overall portfolio risk. When one investment performs poorly, others might perform well, helping stabilize your returns."
+    },
+    "etf": {
+        "short": "Exchange-Traded Fund, an investment fund traded on stock exchanges that holds assets like stocks, bonds, or commodities.",
+        "detailed": "ETFs combine features of individual stocks (they trade on exchanges) and mutual funds (they represent a basket of securities). They typically have lower expense ratios than mutual funds and offer liquidity, tax efficiency, and exposure to specific indices, sectors, or investing strategies."
+    },
+    "p_e_ratio": {
+        "short": "Price-to-Earnings ratio, a valuation ratio of a company's current share price compared to its per-share earnings.",
+        "detailed": "The P/E ratio helps investors evaluate if a stock is overvalued or undervalued. It's calculated by dividing the market price per share by the earnings per share. A high P/E might suggest investors expect higher growth in the future, while a low P/E might indicate an undervalued stock or concerns about future performance."
+    },
+    "dollar_cost_averaging": {
+        "short": "Investing a fixed amount at regular intervals regardless of market conditions.",
+        "detailed": "Dollar-cost averaging reduces the impact of volatility by spreading purchases over time. When prices are high, your fixed investment buys fewer shares; when prices are low, it buys more. This strategy removes the pressure of trying to time the market and can be particularly effective for long-term investors."
+    },
+    "liquidity": {
+        "short": "The ease with which an asset can be converted to cash without affecting its market price.",
+        "detailed": "Liquidity refers to how quickly you can sell an investment without losing value. Cash is the most liquid asset, while real estate is relatively illiquid. Stocks of large companies traded on major exchanges are quite liquid, while stocks of small companies or those traded on over-the-counter markets may be less liquid."
+    },
+    "rebalancing": {
+        "short": "The process of realigning the weightings of a portfolio of assets to maintain the original desired level of asset allocation.",
+        "detailed": "Rebalancing involves periodically buying or selling assets to maintain your target allocation. For example, if your strategy calls for 60% stocks and 40% bonds, but stock growth has pushed the ratio to 70/30, rebalancing would involve selling some stocks and buying bonds to return to 60/40."
+    }
+}
+
+# Expanded investment strategies
+INVESTMENT_STRATEGIES = {
+    "value_investing": {
+        "name": "Value Investing",
+        "description": "Buying stocks that appear underpriced relative to their intrinsic value",
+        "key_metrics": ["P/E Ratio", "P/B Ratio", "Dividend Yield"],
+        "famous_proponents": ["Warren Buffett", "Benjamin Graham"],
+        "ideal_for": "Patient investors focused on long-term growth",
+        "risk_level": "Moderate"
+    },
+    "growth_investing": {
+        "name": "Growth Investing",
+        "description": "Focusing on companies with strong growth potential, often in expanding sectors",
+        "key_metrics": ["Revenue Growth Rate", "Earnings Growth Rate", "Market Share Trends"],
+        "famous_proponents": ["Peter Lynch", "Philip Fisher"],
+        "ideal_for": "Investors seeking capital appreciation over dividends",
+        "risk_level": "High"
+    },
+    "dividend_investing": {
+        "name": "Dividend Investing",
+        "description": "Investing in stable companies that regularly distribute earnings to shareholders",
+        "key_metrics": ["Dividend Yield", "Dividend Growth Rate", "Payout Ratio"],
+        "famous_proponents": ["John Bogle", "Jeremy Siegel"],
+        "ideal_for": "Income-focused investors, particularly retirees",
+        "risk_level": "Low to Moderate"
+    },
+    "index_investing": {
+        "name": "Index Investing",
+        "description": "Buying funds that track market indices to match market returns",
+        "key_metrics": ["Expense Ratio", "Tracking Error", "Fund Size"],
+        "famous_proponents": ["John Bogle", "Burton Malkiel"],
+        "ideal_for": "Passive investors seeking market returns with minimal research",
+        "risk_level": "Varies with index (generally Moderate)"
+    }
+}
+
+# Enhanced policy and investment product information
+FINANCIAL_PRODUCTS = {
+    "term_insurance": {
+        "type": "Insurance",
+        "description": "Pure life insurance coverage for a specific period",
+        "benefits": ["High coverage at affordable premiums", "Tax benefits on premiums", "Financial security for dependents"],
+        "considerations": ["No maturity benefits", "Coverage ends with term", "Premiums increase with age"],
+        "ideal_for": "Primary breadwinners with dependents"
+    },
+    "ulip": {
+        "type": "Insurance + Investment",
+        "description": "Unit Linked Insurance Plan combining insurance and investment",
+        "benefits": ["Life coverage", "Market-linked returns", "Tax benefits", "Fund switching options"],
+        "considerations": ["Higher charges than pure investments", "Lock-in period", "Market risk"],
+        "ideal_for": "Those looking for insurance with investment potential"
+    },
+    "mutual_funds": {
+        "type": "Investment",
+        "description": "Professionally managed investment funds pooling money from many investors",
+        "benefits": ["Professional management", "Diversification", "Liquidity", "Variety of options"],
+        "considerations": ["Expense ratios", "Market risk", "No guaranteed returns"],
+        "ideal_for": "Most investors seeking market exposure with professional management"
+    },
+    "fixed_deposits": {
+        "type": "Investment",
+        "description": "Time deposits with banks offering fixed interest rates",
+        "benefits": ["Guaranteed returns", "Safety of principal", "Predictable income", "Various tenure options"],
+        "considerations": ["Lower returns than market investments", "Interest rate risk", "Premature withdrawal penalties"],
+        "ideal_for": "Conservative investors seeking capital preservation"
+    },
+    "etfs": {
+        "type": "Investment",
+        "description": "Exchange-traded funds that track indices, sectors, commodities, or other assets",
+        "benefits": ["Low expense ratios", "Trading flexibility", "Tax efficiency", "Diversification"],
+        "considerations": ["Brokerage fees", "Market risk", "Tracking errors"],
+        "ideal_for": "Both beginner and sophisticated investors seeking specific market exposure"
+    }
+}
+
+# Personalization profiles to tailor responses
+PERSONA_PROFILES = {
+    "beginner": {
+        "knowledge_level": "basic",
+        "terminology": "simplified",
+        "depth": "introductory",
+        "focus": ["education", "fundamentals", "risk management"]
+    },
+    "intermediate": {
+        "knowledge_level": "moderate",
+        "terminology": "standard",
+        "depth": "balanced",
+        "focus": ["strategies", "portfolio management", "market analysis"]
+    },
+    "advanced": {
+        "knowledge_level": "sophisticated",
+        "terminology": "technical",
+        "depth": "detailed",
+        "focus": ["advanced strategies", "technical analysis", "macroeconomic impacts"]
+    },
+    "retiree": {
+        "knowledge_level": "varies",
+        "terminology": "standard",
+        "depth": "practical",
+        "focus": ["income generation", "wealth preservation", "estate planning"]
+    },
+    "student": {
+        "knowledge_level": "developing",
+        "terminology": "educational",
+        "depth": "foundational",
+        "focus": ["basics", "learning resources", "gradual introduction"]
+    }
+}
+
+# The knowledge base requests read from; the dicts above are its content unless KNOWLEDGE_DIR
+# provides files. Read KNOWLEDGE.current once per request so every lookup sees the same version
+KNOWLEDGE = KnowledgeBase(
+    KNOWLEDGE_DIR or None,
+    default={
+        "concepts": FINANCIAL_CONCEPTS,
+        "education": FINANCIAL_EDUCATION,
+        "strategies": INVESTMENT_STRATEGIES,
+        "products": FINANCIAL_PRODUCTS,
+        "personas": PERSONA_PROFILES
+    },
+    refresh_seconds=KNOWLEDGE_REFRESH_SECONDS,
+    # Compile the classifier for new concepts in the watcher thread rather than in a request
+    on_swap=lambda knowledge: get_intent_classifier()
+)
+
+# Conversation memory store to maintain context
+class ConversationMemory:
+    # Thousands of these live at once (one per session), so skip the per-instance __dict__
+    __slots__ = ("max_history", "messages", "topics_discussed", "user_interests", "user_profile", "saved_seq",
+                 "queued_seq")
+    
+    def __init__(self, max_history: int = 10):
+        self.max_history = max_history
+        self.messages = MessageRing(max_history)
+        self.topics_discussed = set()
+        self.user_interests = set()
+        self.user_profile = {
+            "persona": "beginner",
+            "interests": [],
+            "knowledge_areas": [],
+            "goals": []
+        }
+        # Number of the last message committed to the durable session log, and of the last one queued for it
+        self.saved_seq = 0
+        self.queued_seq = 0
+    
+    def add_message(self, role: str, content: str):
+        """Add a message to the conversation history"""
+        self.messages.append(role, content)
+        
+        # Extract topics and interests
+        if role == "user":
+            self._extract_topics_and_interests(content)
+    
+    def _extract_topics_and_interests(self, content: str):
+        """Extract topics and interests from user messages"""
+        # Simple keyword-based extraction, one pass over the shared lexicon
+        found = lexicons.scan(content)
+        
+        # Financial topics
+        self.topics_discussed.update(lexicons.labels(found, "topic"))
+                
+        # Risk tolerance indicators
+        risk_level = lexicons.first_label(found, "risk", lexicons.RISK_KEYWORDS)
+        if risk_level:
+            self.user_profile["risk_tolerance"] = risk_level
+    
+    def get_conversation_summary(self) -> Dict[str, Any]:
+        """Return a summary of the conversation context"""
+        return {
+            "topics_discussed": list(self.topics_discussed),
+            "user_profile": self.user_profile,
+            "messages_count": len(self.messages)
+        }
+    
+    def get_recent_messages(self, count: int = 3) -> List[Dict[str, str]]:
+        """Get the most recent messages as role/content dicts; messages.recent() reads them without copying"""
+        return [message.to_dict() for message in self.messages.recent(count)]
+    
+    def approx_size(self) -> int:
+        """Rough number of bytes held by this memory, used by the session store's memory ceiling"""
+        size = sys.getsizeof(self) + self.messages.approx_size()
+        size += sum(sys.getsizeof(topic) for topic in self.topics_discussed)
+        size += sys.getsizeof(self.topics_discussed) + sys.getsizeof(self.user_interests)
+        return size + sys.getsizeof(self.user_profile)
+    
+    def to_state(self) -> Dict[str, Any]:
+        """Everything but the messages, in a JSON-serializable form"""
+        return {
+            "topics_discussed": sorted(self.topics_discussed),
+            "user_interests": sorted(self.user_interests),
+            "user_profile": self.user_profile
+        }
+    
+    @classmethod
+    def restore(cls, state: Dict[str, Any], messages: List[Tuple[int, str, str]],
+                max_history: int = 10) -> "ConversationMemory":
+        """Rebuild a memory from to_state() output and its (seq, role, content) messages, oldest first"""
+        memory = cls(max_history)
+        memory.topics_discussed = set(state.get("topics_discussed", ()))
+        memory.user_interests = set(state.get("user_interests", ()))
+        memory.user_profile.update(state.get("user_profile", {}))
+        for _, role, content in messages:
+            # Appended directly: the topics they mention are already in the restored state
+            memory.messages.append(role, content)
+        if messages:
+            memory.messages.appended = memory.saved_seq = memory.queued_seq = messages[-1][0]
+        return memory
+    
+    def to_bytes(self) -> bytes:
+        """Compact binary form of the whole memory, for session stores shared between processes"""
+        ring = self.messages
+        return encode_session(self.to_state(), ((message.role, message.content) for message in ring),
+                              ring.appended)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, max_history: int = 10) -> "ConversationMemory":
+        return cls.restore(*decode_session(data), max_history=max_history)
+
+
+def get_session_log():
+    """Return the durable session log, opening the database on first use; None when not configured"""
+    if not hasattr(get_session_log, "log"):
+        log = None
+        if SESSION_DB_PATH:
+            import atexit
+            from session_log import SQLiteSessionLog
+            log = SQLiteSessionLog(SESSION_DB_PATH, flush_ms=SESSION_FLUSH_MS)
+            # Commit turns still queued when the process exits
+            atexit.register(log.close)
+        get_session_log.log = log
+    return get_session_log.log
+
+def load_session(session_id: str) -> Optional[ConversationMemory]:
+    """The stored memory of a session not in memory, or None for a new session"""
+    log = get_session_log()
+    saved = log.load(session_id) if log is not None else None
+    return ConversationMemory.restore(*saved) if saved is not None else None
+
+def save_session(session_id: str, memory: ConversationMemory):
+    """Queue the messages added since the last save, with the current profile, for the session log"""
+    log = get_session_log()
+    ring = memory.messages
+    new = min(ring.appended - memory.queued_seq, len(ring))
+    if log is None or new <= 0:
+        return
+    last = ring.appended
+    first = last - new + 1
+    messages = [(first + offset, message.role, message.content)
+                for offset, message in enumerate(ring.recent(new))]
+    
+    def settled(committed: bool):
+        if committed:
+            memory.saved_seq = max(memory.saved_seq, last)
+        else:
+            # Everything after the last commit goes out again with the session's next save
+            memory.queued_seq = min(memory.queued_seq, memory.saved_seq)
+    
+    log.record(session_id, memory.to_state(), messages, last, on_done=settled)
+    memory.queued_seq = last
+
+def forget_session(session_id: str):
+    log = get_session_log()
+    if log is not None:
+        log.delete(session_id)
+
+def create_session_backend():
+    """Build the session store selected by SESSION_BACKEND"""
+    if SESSION_BACKEND == "shared":
+        if not SESSION_DB_PATH:
+            raise ValueError("SESSION_BACKEND=shared needs SESSION_DB_PATH")
+        from shared_sessions import SharedSQLiteStore
+        return SharedSQLiteStore(
+            SESSION_DB_PATH,
+            ConversationMemory,
+            encode=ConversationMemory.to_bytes,
+            decode=ConversationMemory.from_bytes,
+            ttl_seconds=SESSION_TTL_SECONDS,
+            cache_size=SESSION_MAX_SESSIONS
+        )
+    if SESSION_BACKEND != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND!r}")
+    return SessionStore(
+        ConversationMemory,
+        max_sessions=SESSION_MAX_SESSIONS,
+        ttl_seconds=SESSION_TTL_SECONDS,
+        max_bytes=SESSION_MAX_BYTES,
+        load=load_session if SESSION_DB_PATH else None,
+        on_update=save_session if SESSION_DB_PATH else None,
+        on_discard=forget_session if SESSION_DB_PATH else None
+    )
+
+# One ConversationMemory per Gradio session, so concurrent users never share history;
+# with SESSION_DB_PATH set they also survive restarts, and with SESSION_BACKEND=shared
+# every worker process sees them
+SESSIONS = create_session_backend()
+
+# Hot-path latency histograms; cache and session counters are read at scrape time (collectors below)
+STAGE_SECONDS = metrics.REGISTRY.histogram(
+    "chatbot_stage_seconds", "Time spent in each stage of handling a message", ["stage"])
+RESPONSE_SECONDS = metrics.REGISTRY.histogram(
+    "chatbot_response_seconds", "Time until the last chunk of the response, by primary intent", ["intent"])
+SENTIMENT_BACKEND_SECONDS = metrics.REGISTRY.histogram(
+    "chatbot_sentiment_backend_seconds", "Sentiment backend prediction time in analyze_sentiment", ["backend"])
+SENTIMENT_FALLBACKS = metrics.REGISTRY.counter(
+    "chatbot_sentiment_fallbacks_total", "analyze_sentiment answers that fell back to the simulated analysis")
+BUSY_REPLIES = metrics.REGISTRY.counter(
+    "chatbot_busy_total", "Messages answered with BUSY_RESPONSE because their intent was at its limit", ["intent"])
+LLM_FAILURES = metrics.REGISTRY.counter(
+    "chatbot_llm_failures_total", "LLM replies that failed, before the first chunk or mid-stream", ["stage"])
+
+# Admission control for the intents listed in INTENT_CONCURRENCY
+INTENT_LIMITER = ConcurrencyLimiter(INTENT_CONCURRENCY)
+
+
+def get_resource_recommendations(user_query: str, user_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate personalized resource recommendations based on query and user profile"""
+    found = lexicons.scan(user_query)
+    
+    # Find matching topics
+    matched_topics = []
+    for topic in lexicons.ordered_labels(found, "resource_topic", lexicons.RESOURCE_TOPICS):
+        matched_topics.extend(lexicons.RESOURCE_TOPICS[topic])
+    
+    # Get unique recommendations
+    education = KNOWLEDGE.current.education
+    recommendations = []
+    seen_titles = set()
+    
+    # Always add a general resource if available
+    if "personal_finance" in education and "personal_finance" not in seen_titles:
+        recommendations.append(education["personal_finance"])
+        seen_titles.add("personal_finance")
+    
+    # Add topic-specific resources
+    for topic in matched_topics:
+        if topic in education and topic not in seen_titles:
+            recommendations.append(education[topic])
+            seen_titles.add(topic)
+    
+    # If we don't have enough recommendations, add some general ones
+    if len(recommendations) < 2:
+        for topic in ["investing_basics", "stock_market", "retirement_planning"]:
+            if topic in education and topic not in seen_titles:
+                recommendations.append(education[topic])
+                seen_titles.add(topic)
+                if len(recommendations) >= 2:
+                    break
+    
+    return recommendations[:2]  # Limit to 2 recommendations
+
+def generate_dynamic_stock_sentiment(stock_symbol: str) -> Dict[str, Any]:
+    """Generate realistic but dynamic stock sentiment rather than using static data"""
+    sentiments = ["positive", "neutral", "negative"]
+    weights = [0.5, 0.3, 0.2]  # More likely to be positive or neutral
+    
+    # Find stock info
+    record = MARKET_UNIVERSE.index.get(stock_symbol)
+    stock_name = record.name if record else stock_symbol
+    
+    # Generate sentiment data
+    sentiment = random.choices(sentiments, weights=weights)[0]
+    
+    # Score will depend on sentiment
+    score = 0
+    if sentiment == "positive":
+        score = round(random.uniform(0.65, 0.95), 2)
+    elif sentiment == "neutral":
+        score = round(random.uniform(0.45, 0.65), 2)
+    else:
+        score = round(random.uniform(0.15, 0.45), 2)
+    
+    # Generate dynamic news count
+    news_count = random.randint(3, 25)
+    
+    # Generate trending direction
+    trending = "up" if sentiment == "positive" else "down" if sentiment == "negative" else "steady"
+    
+    # Generate reason phrases based on sentiment
+    reasons = []
+    if sentiment == "positive":
+        reasons = [
+            "strong quarterly results",
+            "new product announcements",
+            "expanded market share",
+            "strategic partnerships",
+            "analyst upgrades"
+        ]
+    elif sentiment == "neutral":
+        reasons = [
+            "mixed earnings results",
+            "pending regulatory decisions",
+            "competitive market conditions",
+            "sector rotation",
+            "waiting for upcoming announcements"
+        ]
+    else:
+        reasons = [
+            "missed earnings expectations",
+            "regulatory challenges",
+            "increased competition",
+            "management changes",
+            "sector weakness"
+        ]
+    
+    # Pick 1-2 reasons
+    selected_reasons = random.sample(reasons, k=min(2, len(reasons)))
+    
+    return {
+        "symbol": stock_symbol,
+        "name": stock_name,
+        "sentiment": sentiment,
+        "score": score,
+        "news_count": news_count, 
+        "trending": trending,
+        "key_reasons": selected_reasons
+    }
+
+def generate_market_sentiment() -> Dict[str, Dict[str, Any]]:
+    """Generate dynamic market sentiment data"""
+    sentiments = {}
+    index = MARKET_UNIVERSE.index
+    for sector in index.sectors:
+        # Generate sentiment values
+        sentiment_value = random.choice(["positive", "neutral", "negative"])
+        trending = "up" if sentiment_value == "positive" else "down" if sentiment_value == "negative" else "stable"
+        
+        # Score range based on sentiment
+        score = 0
+        if sentiment_value == "positive":
+            score = round(random.uniform(0.65, 0.95), 2)
+        elif sentiment_value == "neutral":
+            score = round(random.uniform(0.45, 0.65), 2)
+        else:
+            score = round(random.uniform(0.15, 0.45), 2)
+            
+        # Generate some stocks in this sector
+        stocks_in_sector = index.sector_symbols(sector)
+        top_performers = random.sample(stocks_in_sector, k=min(2, len(stocks_in_sector)))
+            
+        sentiments[sector] = {
+            "sentiment": sentiment_value,
+            "score": score,
+            "trending": trending,
+            "top_performers": top_performers
+        }
+    
+    return sentiments
+
+def generate_market_snapshot(seed: Optional[int] = None):
+    """Sentiment for every sector and symbol in the universe, drawn in one vectorized pass"""
+    from market_sentiment import simulate_market_sentiment
+    return simulate_market_sentiment(MARKET_UNIVERSE.index, seed)
+
+# Seeded by bucket number, so every worker process serves the same numbers within a bucket.
+# The snapshot needs NumPy; without it (checked once, without importing it) every request
+# uses the per-request generators
+MARKET_SNAPSHOTS = SnapshotCache(
+    lambda bucket: generate_market_snapshot(seed=bucket),
+    bucket_seconds=MARKET_SNAPSHOT_SECONDS,
+    source=lambda: MARKET_UNIVERSE.index
+) if MARKET_SNAPSHOT_SECONDS > 0 and importlib.util.find_spec("numpy") is not None else None
+
+def current_market_snapshot():
+    """The shared sentiment snapshot, or None when snapshots are disabled or NumPy is unavailable"""
+    return MARKET_SNAPSHOTS.current() if MARKET_SNAPSHOTS is not None else None
+
+def get_market_sentiment() -> Dict[str, Dict[str, Any]]:
+    """Sector sentiment from the current snapshot, generated on the spot without one"""
+    snapshot = current_market_snapshot()
+    return snapshot.sectors() if snapshot is not None else generate_market_sentiment()
+
+def get_stock_sentiment(stock_symbol: str) -> Dict[str, Any]:
+    """Symbol sentiment from the current snapshot; unlisted symbols are generated on the spot"""
+    snapshot = current_market_snapshot()
+    sentiment_data = snapshot.stock(stock_symbol) if snapshot is not None else None
+    return sentiment_data or generate_dynamic_stock_sentiment(stock_symbol)
+
+def get_intent_classifier() -> IntentClassifier:
+    """Intent classifier compiled over the current market universe and concepts, rebuilt when either reloads"""
+    index = MARKET_UNIVERSE.index
+    concepts = KNOWLEDGE.current.concepts
+    compiled_index, compiled_concepts, classifier = get_intent_classifier.compiled
+    if compiled_index is not index or compiled_concepts is not concepts:
+        classifier = IntentClassifier(
+            sectors=index.sectors,
+            symbols=index.symbols,
+            concepts=concepts.keys(),
+            # A full listing has one- and two-letter tickers that the substring rule would find everywhere
+            symbol_finder=index.find_symbols if MARKET_UNIVERSE.path else None
+        )
+        get_intent_classifier.compiled = (index, concepts, classifier)
+    return classifier
+
+get_intent_classifier.compiled = (None, None, None)
+
+def identify_intent(message: str) -> Dict[str, Any]:
+    """Enhanced intent identification with extracted entities and context"""
+    intent_data = get_intent_classifier().classify(message)
+    if intent_data["primary_intent"] == "educational":
+        retrieve_educational_entity(message, intent_data["entities"])
+    elif intent_data["primary_intent"] == "stock_sentiment" and "stocks" not in intent_data["entities"]:
+        stocks = MARKET_UNIVERSE.index.find_symbols_fuzzy(message, min_score=FUZZY_MATCH_MIN_SCORE)
+        if stocks:
+            intent_data["entities"]["stocks"] = stocks
+    return intent_data
+
+# Entity each kind of knowledge base entry is reported under
+KNOWLEDGE_ENTITIES = {"concept": "concept", "education": "topic", "strategy": "strategy", "product": "product"}
+
+def retrieve_educational_entity(message: str, entities: Dict[str, Any]):
+    """Fill in the best knowledge base match when keywords found no concept or topic we have content for"""
+    knowledge = KNOWLEDGE.current
+    if "concept" in entities or entities.get("topic") in knowledge.education:
+        return
+    try:
+        matches = knowledge.index.search(message, limit=1, min_score=KNOWLEDGE_MIN_SCORE)
+    except ImportError:
+        return
+    entities.pop("topic", None)
+    if matches:
+        document = matches[0][0]
+        entities[KNOWLEDGE_ENTITIES[document.kind]] = document.key
+
+def render_product_information(product_type: Optional[str], is_recommendation: bool) -> Tuple[str, ...]:
+    """Candidate responses for a product information query; recommendations offer several"""
+    if product_type == "fixed_deposit":
+        if is_recommendation:
+            fd_options = [
+                {
+                    "tenure": "Short-term (6-12 months)",
+                    "typical_rate": "4.5-5.5%",
+                    "benefits": "Liquidity, guaranteed returns",
+                    "ideal_for": "Emergency funds, short-term goals"
+                },
+                {
+                    "tenure": "Medium-term (1-3 years)",
+                    "typical_rate": "5.5-6.5%",
+                    "benefits": "Better interest rates than short-term",
+                    "ideal_for": "Planned expenses in 1-3 years"
+                },
+                {
+                    "tenure": "Long-term (3-5+ years)",
+                    "typical_rate": "6.5-7.5%",
+                    "benefits": "Higher interest, possible tax benefits",
+                    "ideal_for": "Long-term wealth building, retirement planning"
+                }
+            ]
+            
+            # Render every option once; one is picked at random per request
+            responses = []
+            for recommended_option in fd_options:
+                response = f"Based on general market conditions, {recommended_option['tenure']} fixed deposits might be worth considering. "
+                response += f"They typically offer rates around {recommended_option['typical_rate']} and are particularly good for {recommended_option['ideal_for']}. "
+                response += f"Key benefits include {recommended_option['benefits']}.\n\n"
+                response += "Remember that actual rates vary by bank and economic conditions. What's your timeline for this investment?"
+                responses.append(response)
+            return tuple(responses)
+        else:
+            response = "Fixed Deposits (FDs) are secure investments offered by banks where you deposit money for a fixed period at a guaranteed interest rate. "
+            response += "They're low-risk and provide predictable returns, making them popular for conservative investors. "
+            response += "FDs come in various tenures from a few months to several years, with longer terms generally offering higher interest rates. "
+            response += "Most banks allow premature withdrawals with a small penalty. Are you considering investing in FDs or would you like to know about specific FD options?"
+    elif product_type == "insurance":
+        if is_recommendation:
+            insurance_options = [
+                {
+                    "type": "Term Insurance",
+                    "features": "Pure life coverage, no maturity benefits",
+                    "ideal_for": "Primary income earners with dependents",
+                    "benefits": "Maximum coverage at minimum premium"
+                },
+                {
+                    "type": "Health Insurance",
+                    "features": "Coverage for medical expenses",
+                    "ideal_for": "Everyone, regardless of age",
+                    "benefits": "Financial protection against healthcare costs"
+                },
+                {
+                    "type": "ULIP",
+                    "features": "Insurance + Investment",
+                    "ideal_for": "Those seeking both protection and investment",
+                    "benefits": "Tax benefits, market-linked returns"
+                }
+            ]
+            
+            # Render every option once; one is picked at random per request
+            responses = []
+            for recommended_option in insurance_options:
+                response = f"Many people in similar situations consider {recommended_option['type']} options. "
+                response += f"These provide {recommended_option['features']} and are ideal for {recommended_option['ideal_for']}. "
+                response += f"Key benefits include {recommended_option['benefits']}.\n\n"
+                response += "Insurance needs are highly personal and depend on your specific situation. Would you like to know more about different insurance types or discuss specific protection needs?"
+                responses.append(response)
+            return tuple(responses)
+        else:
+            response = "Insurance policies provide financial protection against various risks. Common types include term insurance (pure protection), "
+            response += "health insurance (medical coverage), ULIPs (insurance + investment), endowment plans (insurance + savings), "
+            response += "and general insurance for assets like homes and vehicles.\n\n"
+            response += "Each type serves different needs and has unique features. What specific aspect of insurance would you like to explore further?"
+    elif product_type in ["mutual_fund", "etf", "ulip"]:
+        product_info = KNOWLEDGE.current.products.get(product_type if product_type != "mutual_fund" else "mutual_funds", {})
+        
+        if product_info:
+            response = f"{product_info['description']}. "
+            response += f"Key benefits include {', '.join(product_info['benefits'][:3])}. "
+            response += f"Important considerations include {', '.join(product_info['considerations'][:2])}. "
+            response += f"This product is typically suitable for {product_info['ideal_for']}."
+            
+            if is_recommendation:
+                response += "\n\nWould you like me to suggest some specific strategies for investing in this product based on your goals?"
+        else:
+            response = f"I'd be happy to provide information about {product_type.replace('_', ' ').upper()}s. "
+            response += "Could you tell me more specifically what you'd like to know about them? For example, their benefits, risks, or how they work?"
+    else:
+        # General financial product information
+        response = "I can provide information on various financial products including fixed deposits, insurance policies, mutual funds, ETFs, and ULIPs. "
+        response += "Each serves different financial needs and goals. Which specific product would you like to learn more about?"
+    
+    return (response,)
+
+def render_investment_recommendation(investment_type: str, risk_preference: str) -> Tuple[str, ...]:
+    """Response for an investment recommendation query"""
+    if investment_type == "stock":
+        # Sample stock recommendation based on risk preference
+        stock_recommendations = {
+            "conservative": ["PG", "JNJ", "KO"],
+            "moderate": ["MSFT", "AAPL", "JPM"],
+            "aggressive": ["NVDA", "AMZN", "GOOGL"]
+        }
+        
+        recommended_stocks = stock_recommendations.get(risk_preference, stock_recommendations["moderate"])
+        index = MARKET_UNIVERSE.index
+        stock_names = [f"{stock} ({index.get(stock).name})" for stock in recommended_stocks if stock in index]
+        
+        response = "While I can't provide personalized investment advice, investors with a "
+        response += f"{risk_preference} risk profile often consider stocks like {', '.join(stock_names)}. "
+        response += "These suggestions are based on general market information, not personalized advice.\n\n"
+        response += "Always research thoroughly and consider consulting with a financial advisor before investing. "
+        response += "Would you like to know more about any of these companies or learn about investment strategies for stocks?"
+    elif investment_type in ["mutual_fund", "etf"]:
+        fund_types = {
+            "conservative": ["Bond funds", "Dividend funds", "Value funds"],
+            "moderate": ["Balanced funds", "Index funds", "Blue-chip funds"],
+            "aggressive": ["Growth funds", "Sector-specific funds", "Small-cap funds"]
+        }
+        
+        recommended_funds = fund_types.get(risk_preference, fund_types["moderate"])
+        
+        response = f"For {risk_preference} investors interested in {investment_type.replace('_', ' ')}s, "
+        response += f"these types are commonly considered: {', '.join(recommended_funds)}. "
+        response += f"Each type has different risk-return characteristics that align with a {risk_preference} approach.\n\n"
+        response += "Would you like more specific information about any of these fund types and their typical performance characteristics?"
+    else:
+        # General investment recommendation
+        strategies = {
+            "conservative": {
+                "allocation": "60-70% bonds, 30-40% stocks",
+                "focus": "Income generation and capital preservation",
+                "products": "Bond funds, dividend stocks, CDs, fixed deposits"
+            },
+            "moderate": {
+                "allocation": "40-60% bonds, 40-60% stocks",
+                "focus": "Balance between growth and income",
+                "products": "Index funds, blue-chip stocks, balanced mutual funds"
+            },
+            "aggressive": {
+                "allocation": "20-30% bonds, 70-80% stocks",
+                "focus": "Long-term growth and capital appreciation",
+                "products": "Growth stocks, sector-specific ETFs, emerging markets"
+            }
+        }
+        
+        strategy = strategies.get(risk_preference, strategies["moderate"])
+        
+        response = f"For investors with a {risk_preference} risk profile, a common approach includes:\n\n"
+        response += f"- Asset allocation: Approximately {strategy['allocation']}\n"
+        response += f"- Focus: {strategy['focus']}\n"
+        response += f"- Financial products to consider: {strategy['products']}\n\n"
+        response += "Remember that investment decisions should be based on your specific financial goals, time horizon, and personal circumstances. "
+        response += "What's your primary investment goal and timeline?"
+    
+    return (response,)
+
+def render_educational(concept: Optional[str], topic: Optional[str], strategy: Optional[str] = None,
+                       product: Optional[str] = None) -> Tuple[str, ...]:
+    """Response for an educational query"""
+    knowledge = KNOWLEDGE.current
+    if concept and concept in knowledge.concepts:
+        concept_info = knowledge.concepts[concept]
+        response = f"{concept_info['detailed']}\n\n"
+        response += "Would you like to know more about how this concept applies to specific financial situations or learn about related concepts?"
+    elif topic and topic in knowledge.education:
+        topic_info = knowledge.education[topic]
+        response = f"{topic_info['title']}: {topic_info['content']}\n\n"
+        response += "Would you like to explore any specific aspect of this topic in more detail?"
+    elif strategy and strategy in knowledge.strategies:
+        strategy_info = knowledge.strategies[strategy]
+        response = f"{strategy_info['name']}: {strategy_info['description']}.\n\n"
+        response += f"- Key metrics: {', '.join(strategy_info['key_metrics'])}\n"
+        response += f"- Well-known proponents: {', '.join(strategy_info['famous_proponents'])}\n"
+        response += f"- Ideal for: {strategy_info['ideal_for']}\n"
+        response += f"- Risk level: {strategy_info['risk_level']}\n\n"
+        response += "Would you like to know how this strategy could fit your own risk profile and goals?"
+    elif product and product in knowledge.products:
+        product_info = knowledge.products[product]
+        response = f"{product_info['type']}: {product_info['description']}.\n\n"
+        response += f"- Benefits: {', '.join(product_info['benefits'])}\n"
+        response += f"- Considerations: {', '.join(product_info['considerations'])}\n"
+        response += f"- Ideal for: {product_info['ideal_for']}\n\n"
+        response += "Would you like to compare this with other financial products?"
+    else:
+        # General educational response
+        response = "I'm happy to help with financial education! I can explain concepts like compound interest, diversification, or P/E ratios. "
+        response += "I can also provide information about investing basics, the stock market, personal finance, or retirement planning. "
+        response += "What specific financial topic or concept would you like to learn about?"
+    
+    return (response,)
+
+RESPONSE_CACHE = TTLCache(maxsize=RESPONSE_CACHE_SIZE)
+
+def cached_response(intent_data: Dict[str, Any], memory: ConversationMemory, render) -> str:
+    """Serve a deterministic intent from the response cache, rendering its candidates on a miss"""
+    entities = intent_data["entities"]
+    key = (
+        intent_data["primary_intent"],
+        intent_data["secondary_intent"],
+        tuple(sorted((name, str(value)) for name, value in entities.items())),
+        memory.user_profile.get("persona"),
+        # Rendered stock recommendations name companies from the current universe, and
+        # educational and product answers quote the current knowledge base
+        MARKET_UNIVERSE.version,
+        KNOWLEDGE.version
+    )
+    candidates = RESPONSE_CACHE.get_or_set(key, render)
+    return candidates[0] if len(candidates) == 1 else random.choice(candidates)
+
+def generate_response(intent_data: Dict[str, Any], message: str, memory: ConversationMemory,
+                      use_llm: bool = True) -> str:
+    """Generate a dynamic, context-aware response based on identified intent and conversation memory"""
+    primary_intent = intent_data["primary_intent"]
+    
+    # Handle basic conversation intents
+    if primary_intent == "greeting":
+        # Check if this is the first interaction
+        if len(memory.messages) <= 1:
+            return random.choice([
+                "Hi there! I'm your friendly financial assistant. How can I help you today?",
+                "Hello! I'm here to help with any financial questions or topics you'd like to discuss. What's on your mind?",
+                "Hey! I'm your AI financial assistant. Whether you're interested in investing, saving, or learning about financial concepts, I'm here to help. What would you like to talk about?"
+            ])
+        else:
+            return random.choice([
+                "Hello again! What financial topic would you like to discuss now?",
+                "Hi there! Ready to continue our financial conversation. What's on your mind?",
+                "Hey! Great to chat again. What financial questions can I help with today?"
+            ])
+    
+    if primary_intent == "how_are_you":
+        return random.choice([
+            "I'm doing great! Ready to talk about markets, investments, or any financial topics you're interested in. What's on your mind?",
+            "I'm excellent, thanks for asking! Always ready to help with financial questions or discussions. What would you like to explore today?"
+            "I'm well, thank you! The world of finance is always changing, and I'm here to help you navigate it. What financial topic would you like to discuss today?"
+        ])
+    
+    if primary_intent == "goodbye":
+        return random.choice([
+            "Goodbye! Remember, the best investment you can make is in yourself. Feel free to come back anytime with your financial questions.",
+            "See you later! I'm here whenever you need guidance on financial matters. Have a great day!",
+            "Take care! Remember that financial knowledge is a journey, not a destination. I'll be here when you want to continue that journey."
+        ])
+    
+    if primary_intent == "thanks":
+        return random.choice([
+            "You're welcome! I'm happy to help with any other financial questions you might have.",
+            "Anytime! Financial literacy is empowering, and I'm glad to be part of your journey.",
+            "My pleasure! If you have more questions in the future, don't hesitate to ask."
+        ])
+    
+    if primary_intent == "joke":
+        finance_jokes = [
+            "Why don't economists like to go to the beach? Because the tide raises their liquidity concerns.",
+            "How many economists does it take to change a light bulb? None. If the light bulb needed changing, the market would have done it by now.",
+            "What do you call a financial instrument that's way too complicated? Probably your bank's newest product.",
+            "I told my wife she was overreacting when she caught me looking at stock charts at 3am. She said I was being defensive. I said no, I was being a contrarian investor.",
+            "Why are Bitcoin investors always calm? Because they've HODL'd onto their feelings.",
+            "What's an actuary's favorite candy? Mortality mints.",
+            "What did the stock broker say to his friend on the ski slope? That dividend is going downhill fast!",
+            "What's a banker's favorite James Bond movie? 'The Spy Who Collateralized Me'.",
+            "What's a venture capitalist's favorite song? 'Don't Stop Believing... in Unicorns'."
+        ]
+        return random.choice(finance_jokes)
+    
+    # Handle sentiment analysis
+    if primary_intent == "analyze_sentiment":
+        statement = intent_data["entities"].get("statement", message)
+        return analyze_sentiment(statement)
+    
+    # Handle market sentiment queries
+    if primary_intent == "market_sentiment":
+        market_data = get_market_sentiment()
+        
+        # Check if specific sectors were mentioned
+        specific_sectors = intent_data["entities"].get("sectors", [])
+        
+        if specific_sectors:
+            # Provide focused information about mentioned sectors
+            sector_insights = []
+            for sector in specific_sectors:
+                if sector in market_data:
+                    sector_info = market_data[sector]
+                    sentiment_desc = f"{sector.title()} sector shows {sector_info['sentiment']} sentiment (score: {sector_info['score']})"
+                    trend_desc = f"and is trending {sector_info['trending']}"
+                    performers = f"Top performers include {', '.join(sector_info['top_performers'])}"
+                    sector_insights.append(f"{sentiment_desc} {trend_desc}. {performers}.")
+            
+            if sector_insights:
+                response = f"Here's the latest sentiment analysis for your requested sectors:\n\n{' '.join(sector_insights)}\n\nThis analysis is based on recent news articles, social media sentiment, and trading patterns. Would you like more specific information about any of these sectors or their top-performing stocks?"
+            else:
+                response = "I don't have specific sentiment data for those sectors. I can provide information about technology, healthcare, finance, energy, and consumer sectors. Which would you like to learn about?"
+        else:
+            # Provide general market sentiment overview
+            positive_sectors = [s for s, data in market_data.items() if data["sentiment"] == "positive"]
+            negative_sectors = [s for s, data in market_data.items() if data["sentiment"] == "negative"]
+            neutral_sectors = [s for s, data in market_data.items() if data["sentiment"] == "neutral"]
+            
+            overall_sentiment = "positive" if len(positive_sectors) > len(negative_sectors) else "mixed" if len(positive_sectors) == len(negative_sectors) else "cautious"
+            
+            response = f"The overall market sentiment is currently {overall_sentiment}. "
+            
+            if positive_sectors:
+                response += f"The {', '.join([s.title() for s in positive_sectors])} {len(positive_sectors) > 1 and 'sectors are' or 'sector is'} showing positive sentiment. "
+            
+            if negative_sectors:
+                response += f"The {', '.join([s.title() for s in negative_sectors])} {len(negative_sectors) > 1 and 'sectors are' or 'sector is'} facing challenges with negative sentiment. "
+            
+            if neutral_sectors:
+                response += f"The {', '.join([s.title() for s in neutral_sectors])} {len(neutral_sectors) > 1 and 'sectors are' or 'sector is'} showing neutral sentiment. "
+            
+            response += "\nWould you like more specific information about any particular sector or stock?"
+        
+        return response
+    
+    # Handle stock sentiment queries
+    if primary_intent == "stock_sentiment":
+        specific_stocks = intent_data["entities"].get("stocks", [])
+        
+        if specific_stocks:
+            # Provide sentiment for specific stocks
+            stock_insights = []
+            for stock in specific_stocks:
+                sentiment_data = get_stock_sentiment(stock)
+                
+                insight = f"{sentiment_data['name']} ({sentiment_data['symbol']}) shows {sentiment_data['sentiment']} sentiment "
+                insight += f"with a score of {sentiment_data['score']:.2f} based on {sentiment_data['news_count']} recent news articles. "
+                insight += f"The stock is trending {sentiment_data['trending']}"
+                
+                if sentiment_data['key_reasons']:
+                    insight += f", influenced by {' and '.join(sentiment_data['key_reasons'])}"
+                insight += "."
+                
+                stock_insights.append(insight)
+            
+            response = "\n\n".join(stock_insights)
+            response += "\n\nWould you like more details about any of these stocks or information about other stocks?"
+        else:
+            # Suggest some stocks to analyze
+            suggested_stocks = []
+            index = MARKET_UNIVERSE.index
+            for sector in index.sectors:
+                stocks = index.sector_symbols(sector)
+                if stocks:
+                    suggested_stocks.append(random.choice(stocks))
+                if len(suggested_stocks) >= 3:
+                    break
+            
+            response = "I'd be happy to analyze stock sentiment for you. Which stocks are you interested in? "
+            response += f"Some popular stocks to analyze include {', '.join(suggested_stocks)}. Just let me know which one(s) you'd like sentiment information for."
+        
+        return response
+    
+    # Handle product information queries
+    if primary_intent == "product_information":
+        product_type = intent_data["entities"].get("product_type")
+        is_recommendation = intent_data["secondary_intent"] == "recommendation"
+        return cached_response(intent_data, memory, lambda: render_product_information(product_type, is_recommendation))
+    
+    # Handle investment recommendation queries
+    if primary_intent == "investment_recommendation":
+        investment_type = intent_data["entities"].get("investment_type", "general")
+        risk_preference = intent_data["entities"].get("risk_preference", "moderate")
+        return cached_response(intent_data, memory, lambda: render_investment_recommendation(investment_type, risk_preference))
+    
+    # Handle educational queries
+    if primary_intent == "educational":
+        concept = intent_data["entities"].get("concept")
+        topic = intent_data["entities"].get("topic")
+        strategy = intent_data["entities"].get("strategy")
+        product = intent_data["entities"].get("product")
+        return cached_response(intent_data, memory, lambda: render_educational(concept, topic, strategy, product))
+    
+    # Handle general queries with improved conversation flow
+    # Extract key financial terms and concepts
+    found_terms = find_financial_terms(message)
+    
+    # Let the LLM answer open-ended financial questions when it is configured
+    if found_terms and LLM_API_ENABLED and use_llm:
+        llm_response = "".join(stream_llm_reply(memory))
+        if llm_response:
+            return llm_response
+    
+    # Get conversation context
+    conversation_summary = memory.get_conversation_summary()
+    recent_topics = conversation_summary.get("topics_discussed", [])
+    
+    # Generate contextual response
+    if found_terms:
+        # Financial topic identified
+        primary_term = found_terms[0]
+        
+        # Check if this is continuing a previous topic
+        continuing_topic = primary_term in recent_topics
+        
+        if continuing_topic:
+            # Continuing previous discussion
+            responses = [
+                f"To continue our discussion about {primary_term}, what specific aspect interests you most?",
+                f"I'd be happy to explore {primary_term} further. Is there a particular element you'd like to focus on?",
+                f"Let's dive deeper into {primary_term}. What questions do you have about this topic?"
+            ]
+        else:
+            # New financial topic
+            responses = [
+                f"That's an interesting question about {primary_term}. To provide the most helpful information, could you share what you're looking to achieve with {primary_term}?",
+                f"When it comes to {primary_term}, there are several approaches to consider. What's your main goal regarding this topic?",
+                f"I'd be happy to discuss {primary_term}. To better assist you, could you share your experience level with this topic?"
+            ]
+        
+        # Get resource recommendations based on query
+        recommendations = get_resource_recommendations(message, conversation_summary.get("user_profile", {}))
+        if recommendations and random.random() < 0.3:  # 30% chance to include a recommendation
+            recommendation = recommendations[0]
+            responses = [r + f" By the way, many people interested in {primary_term} also find '{recommendation['title']}' helpful to understand." for r in responses]
+        
+        return random.choice(responses)
+    
+    # Check if it's a question without financial terms
+    if intent_data["is_question"]:
+        return "That's an interesting question! While I specialize in financial topics, I'd be happy to chat about this. To help focus our conversation, would you like to know how this relates to personal finance or investments?"
+    
+    # For very short messages that don't fit other categories
+    if len(message.split()) <= 3:
+        return "I see! I'm here to chat about financial topics like investing, saving, budgeting, or market trends. What aspect of personal finance or investing would you like to explore today?"
+    
+    # Default response for anything else
+    return "Thanks for sharing that. I'm primarily focused on financial topics, so I'd be happy to discuss anything related to personal finance, investing, or markets. Is there a specific financial topic you'd like to explore today?"
+
+def find_financial_terms(message: str) -> List[str]:
+    """Key financial terms mentioned in a message, in priority order"""
+    return lexicons.ordered_labels(lexicons.scan(message), "financial_term", lexicons.FINANCIAL_TERMS)
+
+def generate_response_stream(intent_data: Dict[str, Any], message: str, memory: ConversationMemory) -> Iterator[str]:
+    """Yield the response in chunks as they are produced; only the LLM path produces more than one"""
+    use_llm = LLM_API_ENABLED and intent_data["primary_intent"] == "general_query" and find_financial_terms(message)
+    if use_llm:
+        streamed = False
+        for chunk in stream_llm_reply(memory):
+            streamed = True
+            yield chunk
+        if streamed:
+            return
+    
+    # The LLM has already been tried (or does not apply), so only the templates are left
+    yield generate_response(intent_data, message, memory, use_llm=False)
+
+async def generate_response_stream_async(intent_data: Dict[str, Any], message: str,
+                                         memory: ConversationMemory) -> AsyncIterator[str]:
+    """Async variant of generate_response_stream; the network-bound paths await instead of blocking a thread"""
+    primary_intent = intent_data["primary_intent"]
+    if primary_intent == "analyze_sentiment":
+        yield await analyze_sentiment_async(intent_data["entities"].get("statement", message))
+        return
+    
+    if LLM_API_ENABLED and primary_intent == "general_query" and find_financial_terms(message):
+        streamed = False
+        try:
+            async for chunk in get_llm_client().stream(build_llm_messages(memory)):
+                streamed = True
+                yield chunk
+        except Exception as exc:
+            # Handled as stream_llm_reply does
+            record_llm_failure(exc, streamed)
+            if streamed:
+                yield LLM_INTERRUPTED_NOTICE
+        if streamed:
+            return
+    
+    # Every other intent is answered from templates and in-memory data in microseconds
+    yield generate_response(intent_data, message, memory, use_llm=False)
+
+def get_llm_client():
+    """Return the shared LLM client, creating it (and importing httpx) on first use"""
+    if not hasattr(get_llm_client, "client"):
+        from llm_client import LLMClient
+        get_llm_client.client = LLMClient(
+            LLM_API_URL,
+            api_key=LLM_API_KEY,
+            model=LLM_MODEL,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            total_timeout=LLM_TOTAL_TIMEOUT,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            max_connections=LLM_POOL_SIZE
+        )
+    return get_llm_client.client
+
+def build_llm_messages(memory: ConversationMemory) -> List[Dict[str, str]]:
+    """System prompt plus the recent conversation, which already ends with the user's message"""
+    messages = [{"role": "system", "content": LLM_SYSTEM_PROMPT}]
+    messages += [message.to_dict() for message in memory.messages.recent(6)]
+    return messages
+
+def stream_llm_reply(memory: ConversationMemory) -> Iterator[str]:
+    """Stream an LLM reply to the conversation so far.
+
+    Yields nothing if the API fails before the first chunk, so callers fall
+    back to the template responses; a reply cut off later ends with
+    LLM_INTERRUPTED_NOTICE rather than passing for a complete answer.
+    """
+    streamed = False
+    try:
+        for chunk in get_llm_client().stream_sync(build_llm_messages(memory)):
+            streamed = True
+            yield chunk
+    except Exception as exc:
+        record_llm_failure(exc, streamed)
+        if streamed:
+            yield LLM_INTERRUPTED_NOTICE
+
+def record_llm_failure(exc: Exception, streamed: bool):
+    """Log and count a failed LLM reply"""
+    stage = "mid_stream" if streamed else "before_first_chunk"
+    LLM_FAILURES.inc(stage)
+    # Only needed when a reply fails, so importing the engine does not pay for logging
+    import logging
+    logging.getLogger(__name__).warning("LLM reply failed %s: %r", stage.replace("_", " "), exc)
+
+def get_sentiment_client():
+    """Return the shared FinBERT client, creating it (and importing requests) on first use"""
+    if not hasattr(get_sentiment_client, "client"):
+        from sentiment_client import CircuitBreaker, FinBertClient
+        get_sentiment_client.client = FinBertClient(
+            API_URL,
+            headers=HEADERS,
+            connect_timeout=FINBERT_CONNECT_TIMEOUT,
+            read_timeout=FINBERT_READ_TIMEOUT,
+            pool_size=FINBERT_POOL_SIZE,
+            wait_for_model=FINBERT_WAIT_FOR_MODEL,
+            cache_size=FINBERT_CACHE_SIZE,
+            cache_ttl=FINBERT_CACHE_TTL,
+            breaker=CircuitBreaker(
+                failure_threshold=FINBERT_BREAKER_THRESHOLD,
+                reset_timeout=FINBERT_BREAKER_RESET,
+                slow_call_seconds=FINBERT_SLOW_CALL_SECONDS
+            )
+        )
+    return get_sentiment_client.client
+
+def get_sentiment_batcher():
+    """Return the shared batching scheduler in front of the FinBERT client"""
+    if not hasattr(get_sentiment_batcher, "batcher"):
+        from sentiment_client import SentimentBatcher
+        get_sentiment_batcher.batcher = SentimentBatcher(
+            get_sentiment_client(),
+            window_ms=FINBERT_BATCH_WINDOW_MS,
+            max_batch=FINBERT_MAX_BATCH,
+            max_in_flight=FINBERT_POOL_SIZE
+        )
+    return get_sentiment_batcher.batcher
+
+def get_sentiment_backend():
+    """Return the configured sentiment backend, or None for the simulated analysis"""
+    if not hasattr(get_sentiment_backend, "backend"):
+        backend = None
+        if SENTIMENT_BACKEND == "finbert":
+            from sentiment_backends import FinBertBackend
+            batcher = get_sentiment_batcher() if FINBERT_BATCH_WINDOW_MS > 0 else None
+            timeout = FINBERT_BATCH_WINDOW_MS / 1000 + FINBERT_CONNECT_TIMEOUT + FINBERT_READ_TIMEOUT
+            backend = FinBertBackend(get_sentiment_client(), batcher, timeout=timeout)
+        elif SENTIMENT_BACKEND == "local":
+            from local_sentiment import HashedLinearBackend
+            if SENTIMENT_MODEL_PATH:
+                backend = HashedLinearBackend.load(SENTIMENT_MODEL_PATH)
+            else:
+                backend = HashedLinearBackend.from_lexicon(lexicons.POSITIVE_WORDS, lexicons.NEGATIVE_WORDS)
+        elif SENTIMENT_BACKEND != "simulated":
+            raise ValueError(f"Unknown SENTIMENT_BACKEND: {SENTIMENT_BACKEND!r}")
+        get_sentiment_backend.backend = backend
+    return get_sentiment_backend.backend
+
+def analyze_sentiment(statement: str) -> str:
+    """Analyze sentiment of financial text"""
+    backend = get_sentiment_backend()
+    if backend is None:
+        return generate_simulated_sentiment(statement)
+    start = time.perf_counter()
+    prediction = backend.predict(statement)
+    return render_sentiment_prediction(statement, backend.name, prediction, time.perf_counter() - start)
+
+async def analyze_sentiment_async(statement: str) -> str:
+    """Async variant of analyze_sentiment that awaits the backend instead of blocking on it"""
+    backend = get_sentiment_backend()
+    if backend is None:
+        return generate_simulated_sentiment(statement)
+    start = time.perf_counter()
+    prediction = await backend.predict_async(statement)
+    return render_sentiment_prediction(statement, backend.name, prediction, time.perf_counter() - start)
+
+def render_sentiment_prediction(statement: str, backend_name: str, prediction, elapsed: float) -> str:
+    """Record the backend call and format its prediction"""
+    SENTIMENT_BACKEND_SECONDS.labels(backend_name).observe(elapsed)
+    if prediction is not None:
+        return format_sentiment_response(statement, *prediction)
+    
+    # Fallback to simulated response when the backend has no answer
+    SENTIMENT_FALLBACKS.inc()
+    return generate_simulated_sentiment(statement)
+
+def format_sentiment_response(statement: str, sentiment: str, score: float) -> str:
+    """Render a FinBERT prediction as a chat response"""
+    sentiment_descriptions = {
+        "positive": "optimistic, which suggests potential upside",
+        "neutral": "balanced, without strong positive or negative indicators",
+        "negative": "cautious or concerned, which suggests potential challenges"
+    }
+    
+    return f"""I analyzed the financial sentiment of: "{statement}"
+
+Financial sentiment: **{sentiment.title()}** ({score:.1%} confidence)
+
+This statement appears {sentiment_descriptions.get(sentiment.lower(), "neutral")} from a financial perspective. Financial markets and investors would likely interpret this as {sentiment.lower()}.
+
+Would you like me to explain what aspects of the statement might contribute to this sentiment analysis?"""
+
+def generate_simulated_sentiment(statement: str) -> str:
+    """Generate a simulated sentiment analysis for financial text"""
+    # Weighted, negation-aware lexicon scoring in a single pass over the words
+    result = lexicons.SENTIMENT_SCORER.score(statement)
+    sentiment = result.sentiment
+    
+    # Determine overall sentiment
+    if sentiment == "neutral":
+        score = 0.5 + random.uniform(-0.1, 0.1)
+    else:
+        score = min(0.5 + abs(result.net) * 0.1, 0.95)
+    
+    sentiment_descriptions = {
+        "positive": "optimistic, which suggests potential upside",
+        "neutral": "balanced, without strong positive or negative indicators",
+        "negative": "cautious or concerned, which suggests potential challenges"
+    }
+    
+    # Key phrases that influenced the sentiment, limited to 2
+    key_phrases = result.key_phrases(limit=2)
+    
+    response = f"""I analyzed the financial sentiment of: "{statement}"
+
+Financial sentiment: **{sentiment.title()}** ({score:.1%} confidence)
+
+This statement appears {sentiment_descriptions[sentiment]} from a financial perspective. Financial markets and investors would likely interpret this as {sentiment}.
+"""
+    
+    if key_phrases:
+        response += f"\nKey phrases that influenced this analysis:\n- {'\n- '.join(key_phrases)}"
+    
+    response += "\n\nWould you like me to explain what other aspects of the statement might contribute to this sentiment analysis?"
+    
+    return response
+
+def collect_cache_stats(counter: str):
+    """``counter`` ("hits" or "misses") of the response cache and, once it exists, the FinBERT client cache"""
+    caches = [("response", RESPONSE_CACHE)]
+    if hasattr(get_sentiment_client, "client"):
+        caches.append(("finbert", get_sentiment_client.client.cache))
+    return [((("cache", name),), cache.stats()[counter]) for name, cache in caches]
+
+metrics.REGISTRY.collector("chatbot_cache_hits_total", "Cache hits", "counter", lambda: collect_cache_stats("hits"))
+metrics.REGISTRY.collector("chatbot_cache_misses_total", "Cache misses", "counter",
+                           lambda: collect_cache_stats("misses"))
+metrics.REGISTRY.collector("chatbot_sessions", "Sessions held in memory", "gauge",
+                           lambda: [((), SESSIONS.stats()["sessions"])])
+metrics.REGISTRY.collector("chatbot_session_bytes", "Approximate memory held by sessions", "gauge",
+                           lambda: [((), SESSIONS.stats()["approx_bytes"])])
+metrics.REGISTRY.collector("chatbot_session_evictions_total", "Sessions evicted for age or size", "counter",
+                           lambda: [((), SESSIONS.stats()["evictions"])])
+metrics.REGISTRY.collector("chatbot_market_snapshot_builds_total", "Market sentiment snapshots built", "counter",
+                           lambda: [((), MARKET_SNAPSHOTS.builds)] if MARKET_SNAPSHOTS is not None else [])
+metrics.REGISTRY.collector("chatbot_session_writes_pending", "Session writes queued for the SQLite log", "gauge",
+                           lambda: [((), get_session_log.log.pending)] if getattr(get_session_log, "log", None) else [])
+metrics.REGISTRY.collector("chatbot_session_write_batches_total", "Batches committed to the SQLite session log",
+                           "counter", lambda: [((), get_session_log.log.batches_written)]
+                           if getattr(get_session_log, "log", None) else [])
+
+def chatbot(message: str, chat_history: List[Tuple[str, str]], session_id: Optional[str] = None) -> str:
+    """Main chatbot function with conversation memory and improved context handling"""
+    response = ""
+    for response in chatbot_stream(message, chat_history, session_id):
+        pass
+    return response
+
+def chatbot_stream(message: str, chat_history: List[Tuple[str, str]], session_id: Optional[str] = None) -> Iterator[str]:
+    """Streaming variant of chatbot() that yields the response accumulated so far after every chunk"""
+    turn = begin_turn(message, session_id)
+    intent = turn["intent_data"]["primary_intent"]
+    if not INTENT_LIMITER.try_acquire(intent):
+        BUSY_REPLIES.inc(intent)
+        yield BUSY_RESPONSE
+        finish_turn(turn, BUSY_RESPONSE)
+        return
+    
+    response = ""
+    try:
+        for chunk in generate_response_stream(turn["intent_data"], message, turn["memory"]):
+            response += chunk
+            yield response
+    finally:
+        INTENT_LIMITER.release(intent)
+    finish_turn(turn, response)
+
+async def chatbot_stream_async(message: str, chat_history: List[Tuple[str, str]],
+                               session_id: Optional[str] = None) -> AsyncIterator[str]:
+    """Async variant of chatbot_stream for handlers running on an event loop"""
+    turn = await run_session_step(begin_turn, message, session_id)
+    intent = turn["intent_data"]["primary_intent"]
+    if not INTENT_LIMITER.try_acquire(intent):
+        BUSY_REPLIES.inc(intent)
+        yield BUSY_RESPONSE
+        await run_session_step(finish_turn, turn, BUSY_RESPONSE)
+        return
+    
+    response = ""
+    try:
+        async for chunk in generate_response_stream_async(turn["intent_data"], message, turn["memory"]):
+            response += chunk
+            yield response
+    finally:
+        INTENT_LIMITER.release(intent)
+    await run_session_step(finish_turn, turn, response)
+
+async def run_session_step(step, *args):
+    """Run begin_turn/finish_turn, in the loop's default executor when the session store may block on I/O"""
+    if not SESSIONS.blocking:
+        return step(*args)
+    import asyncio
+    return await asyncio.get_running_loop().run_in_executor(None, step, *args)
+
+def begin_turn(message: str, session_id: Optional[str]) -> Dict[str, Any]:
+    """Record the user's message in its session and classify it"""
+    start = time.perf_counter()
+    
+    # Retrieve (or create) the conversation memory for this session
+    session_key = session_id or "default"
+    memory = SESSIONS.get(session_key)
+    
+    # Add user message to memory
+    memory.add_message("user", message)
+    remembered = time.perf_counter()
+    STAGE_SECONDS.labels("session").observe(remembered - start)
+    
+    intent_data = identify_intent(message)
+    classified = time.perf_counter()
+    STAGE_SECONDS.labels("identify_intent").observe(classified - remembered)
+    return {"session_key": session_key, "memory": memory, "intent_data": intent_data,
+            "start": start, "classified": classified}
+
+def finish_turn(turn: Dict[str, Any], response: str):
+    """Record the response time and the assistant's reply"""
+    generated = time.perf_counter()
+    STAGE_SECONDS.labels("generate_response").observe(generated - turn["classified"])
+    RESPONSE_SECONDS.labels(turn["intent_data"]["primary_intent"]).observe(generated - turn["classified"])
+    
+    # Add assistant response to memory
+    turn["memory"].add_message("assistant", response)
+    SESSIONS.touch(turn["session_key"], turn["memory"])
+    STAGE_SECONDS.labels("total").observe(time.perf_counter() - turn["start"])
@@ -0,0 +1,170 @@
+"""Typo-tolerant lookup of short names (tickers, company names) through a character trigram index"""
+import heapq
+import re
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Words that are never part of a company mention; spans made only of these are not looked up
+COMMON_WORDS = frozenset("""
+a about all an and any are as at be buy by can could do does for from give good has have how i in is it its
+me my of on opinion or outlook price right sell sentiment share shares should stock stocks tell than that the
+their them there think this to today view what whats which will with would you your feeling mood news
+""".split())
+
+
+def normalize(text: str) -> str:
+    """Lower-case ``text``, spell out "&" and reduce everything else that is not alphanumeric to single spaces"""
+    return _NON_ALNUM.sub(" ", text.lower().replace("&", " and ")).strip()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of an already normalized string, padded so that its start and end count double"""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str, min_score: float = 0.0) -> float:
+    """1 minus the optimal string alignment distance (edits, with adjacent swaps) over the longer length.
+
+    Returns 0.0 as soon as the result is certain to fall below ``min_score``.
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    longest = max(len(a), len(b))
+    max_distance = (1.0 - min_score) * longest
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if before is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        # Distances never shrink from one row to the next but one (a swap reaches back two rows)
+        if min(current) > max_distance and (before is None or min(previous) > max_distance):
+            return 0.0
+        before, previous = previous, current
+    return 1.0 - previous[-1] / longest
+
+
+class TrigramIndex:
+    """Finds entries within a few typos of a query without comparing it to every entry.
+
+    Every entry text is split into trigrams once; each trigram maps to the
+    entries containing it. A query only visits the posting lists of its own
+    trigrams, and trigrams shared by more than ``max_postings`` entries (" in",
+    "inc", ...) are skipped, so collecting candidates is bounded by the query
+    length times ``max_postings`` however large the universe grows. The
+    ``candidates`` entries with the highest trigram (Dice) overlap are then
+    scored by :func:`similarity`, which, unlike trigram overlap, is not thrown
+    off by a typo in a short word ("appel" is 0.8 similar to "apple").
+
+    ``words`` entries stand for part of a name ("exxon" for "Exxon Mobil");
+    they are only looked up for one-word queries that match no full entry,
+    so they never crowd full names out of the candidates.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]], max_postings: int = 1000, candidates: int = 8,
+                 words: Iterable[Tuple[str, str]] = ()):
+        self.max_postings = max_postings
+        self.candidates = candidates
+        self.texts: List[str] = []
+        self.keys: List[str] = []
+        self._sizes: List[int] = []
+        postings: Dict[str, List[int]] = {}
+        word_postings: Dict[str, List[int]] = {}
+        seen = set()
+        for target, pairs in ((postings, entries), (word_postings, words)):
+            for text, key in pairs:
+                text = normalize(text)
+                if not text or (text, key) in seen:
+                    continue
+                seen.add((text, key))
+                entry = len(self.texts)
+                self.texts.append(text)
+                self.keys.append(key)
+                grams = trigrams(text)
+                self._sizes.append(len(grams))
+                for gram in grams:
+                    target.setdefault(gram, []).append(entry)
+        self._postings = {gram: tuple(entries) for gram, entries in postings.items()}
+        self._word_postings = {gram: tuple(entries) for gram, entries in word_postings.items()}
+        self.max_words = max((text.count(" ") + 1 for text in self.texts), default=0)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.75) -> List[Tuple[str, float, str]]:
+        """Up to ``limit`` (key, similarity, matched text) for entries at least ``min_score`` similar, best first;
+        each key appears once, with its best-matching text"""
+        text = normalize(query)
+        if not text:
+            return []
+        grams = trigrams(text)
+        ranked = self._rank(text, grams, self._postings, limit, min_score)
+        if not ranked and self._word_postings and " " not in text:
+            ranked = self._rank(text, grams, self._word_postings, limit, min_score)
+        return ranked
+
+    def _rank(self, text: str, grams: FrozenSet[str], postings: Dict[str, Tuple[int, ...]], limit: int,
+              min_score: float) -> List[Tuple[str, float, str]]:
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            entries = postings.get(gram)
+            if entries is None or len(entries) > self.max_postings:
+                continue
+            for entry in entries:
+                shared[entry] = shared.get(entry, 0) + 1
+
+        size = len(grams)
+        sizes = self._sizes
+        overlap = heapq.nlargest(self.candidates, shared,
+                                 key=lambda entry: shared[entry] / (size + sizes[entry]))
+        best: Dict[str, Tuple[float, int]] = {}
+        for entry in overlap:
+            candidate = self.texts[entry]
+            # Every extra character is an edit, so a length gap alone can rule a candidate out
+            if 1.0 - abs(len(candidate) - len(text)) / max(len(candidate), len(text)) < min_score:
+                continue
+            score = similarity(text, candidate, min_score)
+            key = self.keys[entry]
+            if score >= min_score and score > best.get(key, (0.0, 0))[0]:
+                best[key] = (score, entry)
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1]))[:limit]
+        return [(key, score, self.texts[entry]) for key, (score, entry) in ranked]
+
+    def find(self, text: str, min_score: float = 0.75, ignore: FrozenSet[str] = COMMON_WORDS) -> List[str]:
+        """Keys mentioned in free ``text``, typos allowed, in order of mention.
+
+        Every run of up to ``max_words`` words is looked up, except runs that
+        start or end on an ``ignore`` word or are shorter than three letters.
+        Overlapping mentions are resolved in favour of the better match.
+        """
+        words = normalize(text).split()
+        mentions: List[Tuple[float, int, int, str]] = []
+        for start in range(len(words)):
+            if words[start] in ignore:
+                continue
+            for end in range(start + 1, min(start + self.max_words, len(words)) + 1):
+                if words[end - 1] in ignore:
+                    continue
+                span = " ".join(words[start:end])
+                if len(span) < 3:
+                    continue
+                for key, score, _ in self.search(span, limit=1, min_score=min_score):
+                    mentions.append((score, start, end, key))
+
+        taken = [False] * len(words)
+        chosen: List[Tuple[int, str]] = []
+        # Best matches first; a longer span wins a tie, so "johnson and johnson" beats "johnson"
+        for score, start, end, key in sorted(mentions, key=lambda item: (-item[0], item[1] - item[2], item[1])):
+            if any(taken[start:end]):
+                continue
+            taken[start:end] = [True] * (end - start)
+            chosen.append((start, key))
+        chosen.sort()
+        seen = set()
+        return [key for _, key in chosen if not (key in seen or seen.add(key))]
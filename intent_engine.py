@@ -0,0 +1,292 @@
+"""Precompiled single-pass intent classifier"""
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from keyword_matcher import KeywordMatcher
+
+# Match modes mirroring the regular expressions the classifier replaces
+ANYWHERE = "anywhere"    # plain substring, as in `keyword in message_lower`
+WORD = "word"            # \bkeyword\b
+WORD_END = "word_end"    # keyword\b
+PREFIX = "prefix"        # ^keyword
+SUFFIX = "suffix"        # keyword$
+
+QUESTION_WORDS = ["what", "how", "why", "when", "where", "who", "can", "could", "would", "will", "should",
+                  "is", "are", "do", "does"]
+POSITIVE_MOOD_WORDS = ["happy", "excited", "pleased", "good", "great"]
+NEGATIVE_MOOD_WORDS = ["sad", "unhappy", "disappointed", "frustrated", "bad", "awful"]
+
+GREETINGS = ["hi", "hello", "hey", "greetings", "good morning", "good afternoon", "good evening"]
+GOODBYES = ["bye", "goodbye", "farewell", "see you", "talk to you later"]
+THANKS = ["thanks", "thank you", "appreciate it", "thx"]
+JOKE_WORDS = ["joke", "funny", "make me laugh"]
+
+ANALYZE_OBJECTS = ["this", "the", "my", "following"]
+ANALYZE_SUBJECTS = ["statement", "sentence", "text", "news"]
+
+OPINION_WORDS = ["sentiment", "feeling", "opinion", "mood"]
+MARKET_WORDS = ["market", "markets", "sector", "sectors", "industry", "industries"]
+STOCK_WORDS = ["stock", "ticker", "company", "symbol"]
+
+PRODUCT_WORDS = ["fd", "fixed deposit", "deposits", "deposit rates", "insurance", "policy", "policies", "plan",
+                 "protection", "mutual fund", "etf", "ulip"]
+PRODUCT_KEYWORDS = {
+    "fixed_deposit": ["fd", "fixed deposit", "deposits", "deposit rates"],
+    "insurance": ["insurance", "policy", "protection", "coverage"],
+    "mutual_fund": ["mutual fund", "mf", "fund"],
+    "etf": ["etf", "exchange traded fund", "exchange-traded fund"],
+    "ulip": ["ulip", "unit linked", "unit-linked"]
+}
+# "should I" can never match the lower-cased message; it is kept for parity with
+# the original pattern
+RECOMMENDATION_WORDS = ["recommend", "suggest", "best", "top", "good", "should I", "which one", "better",
+                        "compare"]
+
+INVESTMENT_WORDS = ["recommend", "suggest", "buy", "invest", "good stock", "pick", "advice", "strategy",
+                    "approach"]
+INVESTMENT_TYPES = {
+    "stock": ["stock", "share", "equity"],
+    "mutual_fund": ["mutual fund", "fund"],
+    "etf": ["etf", "exchange traded"],
+    "bond": ["bond", "fixed income"],
+    "real_estate": ["real estate", "property", "reit"],
+    "crypto": ["crypto", "bitcoin", "ethereum", "digital currency"]
+}
+RISK_LEVELS = {
+    "conservative": ["safe", "low risk", "conservative", "secure"],
+    "moderate": ["balanced", "moderate", "medium risk"],
+    "aggressive": ["aggressive", "high risk", "growth"]
+}
+
+EDUCATION_WORDS = ["how to", "get into", "start", "begin", "learn about", "explain", "what is", "what are"]
+EDU_TOPICS = {
+    "investing_basics": ["investing basics", "start investing", "begin investing"],
+    "stock_market": ["stock market", "how stocks work", "buying stocks"],
+    "retirement": ["retirement", "retirement planning", "retirement account"],
+    "personal_finance": ["personal finance", "budgeting", "saving money"]
+}
+
+_STATEMENT_PATTERN = re.compile(r'analyze (this|the|my|following).*?[:\-] *(.*)')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _full_phrases(heads: Iterable[str], tails: Iterable[str] = ("",)) -> frozenset:
+    """Every message accepted by ^(heads)(tails)[.!]?$"""
+    return frozenset(head + tail + end for head in heads for tail in tails for end in ("", ".", "!"))
+
+
+class IntentClassifier:
+    """Identifies the intent of a message with one keyword scan.
+
+    Every keyword the original regex cascade looked for is registered in a
+    single :class:`KeywordMatcher`, tagged with the rule it belongs to and the
+    anchoring it needs. ``classify`` scans the lower-cased message once, keeps
+    the hits whose anchoring holds and then applies the rules in the original
+    precedence order, so the result matches the old ``identify_intent``.
+
+    Symbols are matched as lower-case substrings like the original. For large
+    universes, where short tickers would match inside ordinary words, pass a
+    ``symbol_finder`` (e.g. ``MarketIndex.find_symbols``) to detect them instead.
+    """
+
+    def __init__(self, sectors: Iterable[str], symbols: Iterable[str], concepts: Iterable[str],
+                 symbol_finder: Optional[Callable[[str], List[str]]] = None):
+        self.sectors = list(sectors)
+        self.symbols = list(symbols)
+        self.concepts = list(concepts)
+        self.symbol_finder = symbol_finder
+
+        self._greetings = _full_phrases(GREETINGS, ("", " there"))
+        self._goodbyes = _full_phrases(GOODBYES)
+        self._thanks = _full_phrases(THANKS)
+
+        rules: List[Tuple[str, Optional[str], Iterable[str], str]] = [
+            ("question", None, QUESTION_WORDS, PREFIX),
+            ("mood", "positive", POSITIVE_MOOD_WORDS, WORD),
+            ("mood", "negative", NEGATIVE_MOOD_WORDS, WORD),
+            ("how_are_you", None, ["how are you"], PREFIX),
+            ("how_are_you", None, ["how it going", "how's it going", "how have you been"], ANYWHERE),
+            ("how_are_you", None, ["what up", "what's up"], SUFFIX),
+            ("joke", None, JOKE_WORDS, WORD),
+            ("analyze", None, [f"analyze {obj} {subj}" for obj in ANALYZE_OBJECTS for subj in ANALYZE_SUBJECTS],
+             ANYWHERE),
+            ("opinion", None, OPINION_WORDS, WORD),
+            ("market", None, MARKET_WORDS, WORD),
+            ("stock", None, STOCK_WORDS, WORD),
+            ("product", None, PRODUCT_WORDS, WORD),
+            ("recommendation", None, RECOMMENDATION_WORDS, WORD),
+            ("investment", None, INVESTMENT_WORDS, WORD),
+            ("education", None, EDUCATION_WORDS, WORD_END),
+        ]
+        rules += [("sector", sector, [sector.lower()], ANYWHERE) for sector in self.sectors]
+        if symbol_finder is None:
+            rules += [("symbol", symbol, [symbol.lower()], ANYWHERE) for symbol in self.symbols]
+        rules += [("concept", concept, [concept.replace('_', ' ')], ANYWHERE) for concept in self.concepts]
+        rules += [("product_type", label, terms, ANYWHERE) for label, terms in PRODUCT_KEYWORDS.items()]
+        rules += [("investment_type", label, terms, ANYWHERE) for label, terms in INVESTMENT_TYPES.items()]
+        rules += [("risk", label, terms, ANYWHERE) for label, terms in RISK_LEVELS.items()]
+        rules += [("edu_topic", label, terms, ANYWHERE) for label, terms in EDU_TOPICS.items()]
+
+        self._matcher = KeywordMatcher(
+            (term, (rule, label, mode)) for rule, label, terms, mode in rules for term in terms
+        )
+        # The scan loop is inlined in _scan, with each state's hits as (length, rule, label, mode)
+        transitions, outputs = self._matcher.automaton()
+        self._transitions = transitions
+        self._outputs = [tuple((len(term),) + category for term, category in output) for output in outputs]
+
+    def classify(self, message: str) -> Dict[str, Any]:
+        """Return the intent, secondary intent, entities, sentiment and question flag of a message"""
+        text = message.lower()
+        found = self._scan(text)
+
+        intent_data = {
+            "primary_intent": "general_query",
+            "secondary_intent": None,
+            "entities": {},
+            "sentiment": "neutral",
+            "is_question": False
+        }
+
+        if "question" in found or text.endswith("?") or text.endswith("?\n"):
+            intent_data["is_question"] = True
+
+        moods = found.get("mood", ())
+        if "positive" in moods:
+            intent_data["sentiment"] = "positive"
+        elif "negative" in moods:
+            intent_data["sentiment"] = "negative"
+
+        if self._is_full(text, self._greetings):
+            intent_data["primary_intent"] = "greeting"
+            return intent_data
+        if "how_are_you" in found:
+            intent_data["primary_intent"] = "how_are_you"
+            return intent_data
+        if self._is_full(text, self._goodbyes):
+            intent_data["primary_intent"] = "goodbye"
+            return intent_data
+        if self._is_full(text, self._thanks):
+            intent_data["primary_intent"] = "thanks"
+            return intent_data
+        if "joke" in found:
+            intent_data["primary_intent"] = "joke"
+            return intent_data
+
+        entities = intent_data["entities"]
+
+        if "analyze" in found:
+            intent_data["primary_intent"] = "analyze_sentiment"
+            match = _STATEMENT_PATTERN.search(text)
+            if match and match.group(2):
+                entities["statement"] = match.group(2)
+            return intent_data
+
+        if "opinion" in found:
+            if "market" in found:
+                intent_data["primary_intent"] = "market_sentiment"
+                sectors = found.get("sector")
+                if sectors:
+                    entities["sectors"] = [sector for sector in self.sectors if sector in sectors]
+                return intent_data
+            elif "stock" in found:
+                intent_data["primary_intent"] = "stock_sentiment"
+                if self.symbol_finder is not None:
+                    stocks = self.symbol_finder(message)
+                else:
+                    symbols = found.get("symbol") or ()
+                    stocks = [symbol for symbol in self.symbols if symbol in symbols]
+                if stocks:
+                    entities["stocks"] = stocks
+                return intent_data
+
+        if "product" in found:
+            intent_data["primary_intent"] = "product_information"
+            product_type = self._first(found, "product_type", PRODUCT_KEYWORDS)
+            if product_type:
+                entities["product_type"] = product_type
+            if "recommendation" in found:
+                intent_data["secondary_intent"] = "recommendation"
+            return intent_data
+
+        if "investment" in found:
+            intent_data["primary_intent"] = "investment_recommendation"
+            investment_type = self._first(found, "investment_type", INVESTMENT_TYPES)
+            if investment_type:
+                entities["investment_type"] = investment_type
+            risk = self._first(found, "risk", RISK_LEVELS)
+            if risk:
+                entities["risk_preference"] = risk
+            return intent_data
+
+        if "education" in found:
+            intent_data["primary_intent"] = "educational"
+            concept = self._first(found, "concept", self.concepts)
+            if concept:
+                entities["concept"] = concept
+                return intent_data
+            topic = self._first(found, "edu_topic", EDU_TOPICS)
+            if topic:
+                entities["topic"] = topic
+            return intent_data
+
+        return intent_data
+
+    def _scan(self, text: str) -> Dict[str, Set[Optional[str]]]:
+        """Run the automaton once and keep the hits whose anchoring holds, grouped by rule"""
+        found: Dict[str, Set[Optional[str]]] = {}
+        length = len(text)
+        transitions = self._transitions
+        outputs = self._outputs
+        root = transitions[0]
+        boundary = self._boundary
+        state = 0
+        for index, char in enumerate(text):
+            state = transitions[state].get(char) or root.get(char, 0)
+            hits = outputs[state]
+            if not hits:
+                continue
+            end = index + 1
+            for size, rule, label, mode in hits:
+                if mode is not ANYWHERE:
+                    start = end - size
+                    if mode is WORD:
+                        if not (boundary(text, start) and boundary(text, end)):
+                            continue
+                    elif mode is WORD_END:
+                        if not boundary(text, end):
+                            continue
+                    elif mode is PREFIX:
+                        if start != 0:
+                            continue
+                    elif not (end == length or (end == length - 1 and text[end] == "\n")):
+                        continue
+                labels = found.get(rule)
+                if labels is None:
+                    found[rule] = {label}
+                else:
+                    labels.add(label)
+        return found
+
+    @staticmethod
+    def _boundary(text: str, index: int) -> bool:
+        """Equivalent of the regex \\b assertion at ``index``"""
+        before = index > 0 and _is_word_char(text[index - 1])
+        after = index < len(text) and _is_word_char(text[index])
+        return before != after
+
+    @staticmethod
+    def _is_full(text: str, phrases: frozenset) -> bool:
+        """Whether the whole message is one of ``phrases`` (``$`` also matches before a final newline)"""
+        return text in phrases or (text.endswith("\n") and text[:-1] in phrases)
+
+    @staticmethod
+    def _first(found: Dict[str, Set[Optional[str]]], rule: str, order: Iterable[str]) -> Optional[str]:
+        """The first label of ``rule`` in priority order that was seen in the message"""
+        labels = found.get(rule)
+        if not labels:
+            return None
+        return next((label for label in order if label in labels), None)
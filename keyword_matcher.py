@@ -0,0 +1,121 @@
+"""Aho-Corasick multi-keyword matcher shared by the intent and lexicon scanners"""
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Hit(NamedTuple):
+    """A single keyword occurrence: ``text[start:end] == term``"""
+    start: int
+    end: int
+    term: str
+    category: Hashable
+
+
+class KeywordMatcher:
+    """Finds every occurrence of every registered keyword in one pass over the text.
+
+    Keywords are compiled into an Aho-Corasick automaton whose transitions are
+    fully resolved ahead of time, so scanning costs one dict lookup per input
+    character no matter how many keywords are registered. Overlapping and nested
+    matches are all reported, and a keyword may be registered under several
+    categories. Matching is case-sensitive; callers lower-case both sides.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]] = ()):
+        self._patterns: Dict[str, List[Hashable]] = {}
+        self._transitions: List[Dict[str, int]] = []
+        self._outputs: List[Tuple[Tuple[str, Hashable], ...]] = []
+        self._built = False
+        for term, category in patterns:
+            self.add(term, category)
+        self.build()
+
+    def add(self, term: str, category: Hashable):
+        """Register ``term`` under ``category``; the automaton is rebuilt on next use"""
+        if not term:
+            raise ValueError("Keywords must be non-empty strings")
+        categories = self._patterns.setdefault(term, [])
+        if category not in categories:
+            categories.append(category)
+            self._built = False
+
+    def build(self):
+        """Compile the registered keywords into a deterministic automaton"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, Hashable]]] = [[]]
+        for term, categories in self._patterns.items():
+            state = 0
+            for char in term:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].extend((term, category) for category in categories)
+
+        # Breadth-first pass computing failure links and folding them into the
+        # transition table, so the scan loop never has to follow failure chains.
+        # Edges inherited from the root are left out and looked up on a miss,
+        # which keeps the table proportional to the trie for large vocabularies.
+        root = goto[0]
+        transitions: List[Dict[str, int]] = [dict(edges) for edges in goto]
+        fail = [0] * len(goto)
+        queue = deque(root.values())
+        while queue:
+            state = queue.popleft()
+            fallback = fail[state]
+            outputs[state].extend(outputs[fallback])
+            if fallback:
+                for char, inherited in transitions[fallback].items():
+                    transitions[state].setdefault(char, inherited)
+            for char, child in goto[state].items():
+                fail[child] = (fallback and transitions[fallback].get(char)) or root.get(char, 0)
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs = [tuple(output) for output in outputs]
+        self._built = True
+
+    def finditer(self, text: str) -> Iterator[Hit]:
+        """Yield every keyword occurrence in ``text``, ordered by end offset"""
+        if not self._built:
+            self.build()
+        transitions = self._transitions
+        outputs = self._outputs
+        root = transitions[0]
+        state = 0
+        for index, char in enumerate(text):
+            state = transitions[state].get(char) or root.get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for term, category in outputs[state]:
+                    yield Hit(end - len(term), end, term, category)
+
+    def automaton(self) -> Tuple[List[Dict[str, int]], List[Tuple[Tuple[str, Hashable], ...]]]:
+        """The (transitions, outputs) tables, for hot paths that inline the :meth:`finditer` loop"""
+        if not self._built:
+            self.build()
+        return self._transitions, self._outputs
+
+    def findall(self, text: str) -> List[Hit]:
+        """Return every keyword occurrence in ``text`` as a list"""
+        return list(self.finditer(text))
+
+    def categories(self, text: str) -> Dict[Hashable, List[Hit]]:
+        """Group every occurrence in ``text`` by category"""
+        grouped: Dict[Hashable, List[Hit]] = {}
+        for hit in self.finditer(text):
+            grouped.setdefault(hit.category, []).append(hit)
+        return grouped
+
+    def first(self, text: str) -> Optional[Hit]:
+        """Return the earliest-ending occurrence in ``text``, if any"""
+        return next(self.finditer(text), None)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._patterns
+
+    def __len__(self) -> int:
+        return len(self._patterns)
@@ -0,0 +1,201 @@
+"""Knowledge base content loaded from a directory of JSON files, rebuilt off the request path and swapped atomically"""
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# Section name -> file in the content directory; sections without a file keep their default content
+SECTION_FILES = {
+    "concepts": "concepts.json",
+    "education": "education.json",
+    "strategies": "strategies.json",
+    "products": "products.json",
+    "personas": "personas.json",
+}
+
+# Which sections are searchable, and the document kind their entries are indexed as
+INDEXED_SECTIONS = {"concepts": "concept", "education": "education", "strategies": "strategy", "products": "product"}
+
+# Fields every entry of a section must have for the engine to render it; a list holds strings
+REQUIRED_FIELDS: Dict[str, Dict[str, type]] = {
+    "concepts": {"short": str, "detailed": str},
+    "education": {"title": str, "content": str},
+    "strategies": {"name": str, "description": str, "key_metrics": list, "famous_proponents": list,
+                   "ideal_for": str, "risk_level": str},
+    "products": {"type": str, "description": str, "benefits": list, "considerations": list, "ideal_for": str},
+}
+
+Section = Dict[str, Dict[str, Any]]
+
+
+def read_section(path: str, required: Optional[Mapping[str, type]] = None) -> Section:
+    """Read one section file: a JSON object mapping each entry key to an object with the ``required`` fields"""
+    with open(path, encoding="utf-8") as handle:
+        section = json.load(handle)
+    if not isinstance(section, dict) or not all(isinstance(entry, dict) for entry in section.values()):
+        raise ValueError(f"{path}: expected an object of objects")
+    for key, entry in section.items():
+        for field, kind in (required or {}).items():
+            value = entry.get(field)
+            if not isinstance(value, kind) or (kind is list and not all(isinstance(item, str) for item in value)):
+                expected = "a list of strings" if kind is list else "a string"
+                raise ValueError(f"{path}: entry {key!r} needs {field!r} as {expected}")
+    return section
+
+
+class KnowledgeSnapshot:
+    """One immutable version of every section plus the indexes derived from it"""
+
+    __slots__ = ("version", "concepts", "education", "strategies", "products", "personas", "_index", "_lock")
+
+    def __init__(self, version: int, sections: Mapping[str, Section]):
+        self.version = version
+        self.concepts = sections["concepts"]
+        self.education = sections["education"]
+        self.strategies = sections["strategies"]
+        self.products = sections["products"]
+        self.personas = sections["personas"]
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        """TF-IDF index over the searchable sections, built on first use (importing NumPy)"""
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    from knowledge_index import KnowledgeIndex, build_documents
+                    self._index = KnowledgeIndex(build_documents(
+                        {kind: getattr(self, section) for section, kind in INDEXED_SECTIONS.items()}))
+                index = self._index
+        return index
+
+    def warm(self):
+        """Build the derived indexes now; without NumPy they stay unbuilt"""
+        try:
+            self.index
+        except ImportError:
+            pass
+
+
+class KnowledgeBase:
+    """Holds the current :class:`KnowledgeSnapshot`.
+
+    Reading :attr:`current` is a single attribute load and never touches the
+    disk. The snapshot is loaded on first use, from ``path`` when configured
+    (files missing from the directory fall back to ``default``). After
+    :meth:`start`, a daemon thread re-stats the directory every
+    ``refresh_seconds``; when anything changed it reads every section, builds
+    the derived indexes and only then swaps the new snapshot in with one
+    assignment, so requests never see a half-built knowledge base or pay for
+    the rebuild. A failed reload keeps the previous snapshot and records the
+    error in :attr:`last_error`. ``on_swap`` is called from the same thread
+    with each new snapshot to warm anything else derived from it.
+    """
+
+    def __init__(self, path: Optional[str] = None, default: Optional[Mapping[str, Section]] = None,
+                 refresh_seconds: float = 5.0, on_swap: Optional[Callable[[KnowledgeSnapshot], None]] = None):
+        self.path = path or None
+        self.default = {section: dict((default or {}).get(section, {})) for section in SECTION_FILES}
+        self.refresh_seconds = refresh_seconds
+        self.on_swap = on_swap
+        self.last_error: Optional[Exception] = None
+        self._snapshot: Optional[KnowledgeSnapshot] = None
+        self._signature = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> KnowledgeSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load(self._signature_of())
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        return self.current.version
+
+    def reload(self, force: bool = False) -> KnowledgeSnapshot:
+        """Load the content directory again if it changed (or always, with ``force``)"""
+        with self._lock:
+            previous = self._snapshot
+            try:
+                signature = self._signature_of()
+                if force or previous is None or signature != self._signature:
+                    self._load(signature, warm=True)
+                    self.last_error = None
+            except Exception as exc:
+                self.last_error = exc
+                if self._snapshot is None:
+                    raise
+            snapshot = self._snapshot
+        if snapshot is not previous and self.on_swap is not None:
+            self.on_swap(snapshot)
+        return snapshot
+
+    def _signature_of(self):
+        if self.path is None:
+            return None
+        signature = []
+        for section, filename in SECTION_FILES.items():
+            try:
+                stat = os.stat(os.path.join(self.path, filename))
+            except FileNotFoundError:
+                continue
+            signature.append((section, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load(self, signature, warm: bool = False):
+        sections = dict(self.default)
+        if self.path is not None:
+            if not os.path.isdir(self.path):
+                raise FileNotFoundError(f"Knowledge directory not found: {self.path}")
+            for section, filename in SECTION_FILES.items():
+                file_path = os.path.join(self.path, filename)
+                if os.path.exists(file_path):
+                    sections[section] = read_section(file_path, REQUIRED_FIELDS.get(section))
+        snapshot = KnowledgeSnapshot(self._version + 1, sections)
+        if warm:
+            snapshot.warm()
+        # Everything is built; publishing it is one reference assignment
+        self._snapshot = snapshot
+        self._signature = signature
+        self._version = snapshot.version
+
+    def start(self):
+        """Start the background watcher, which first loads and warms the current snapshot (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="knowledge-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # The snapshot may already have been loaded lazily by a request; warm it like a reloaded one
+        try:
+            previous = self._snapshot
+            snapshot = self.reload()
+            if snapshot is previous:
+                snapshot.warm()
+                if self.on_swap is not None:
+                    self.on_swap(snapshot)
+        except Exception as exc:
+            self.last_error = exc
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.reload()
+            except Exception as exc:
+                self.last_error = exc
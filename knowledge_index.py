@@ -0,0 +1,133 @@
+"""TF-IDF retrieval over the knowledge base: an inverted index of L2-normalised sparse document vectors"""
+import math
+import re
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Question and filler words that say nothing about which article is wanted
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can could do does for from get give has have how i if in into is it
+its learn like me more my of on or please should so some tell than that the their them there these they this
+to understand vs was we what when where which who why will with would you your explain work works mean means
+""".split())
+
+# Scoring only the touched documents costs a sort of the postings; a dense bincount over every
+# document is cheaper until the collection is larger than SPARSE_MIN_DOCUMENTS plus DENSE_RATIO
+# times the number of postings (measured: ~0.5us per 1,000 documents vs ~30us per 1,000 postings)
+SPARSE_MIN_DOCUMENTS = 16384
+DENSE_RATIO = 64
+
+
+class Document(NamedTuple):
+    kind: str
+    key: str
+    title: str
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric tokens without stopwords; a trailing plural "s" is dropped"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _flatten(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+
+
+def build_documents(sources: Mapping[str, Mapping[str, Mapping[str, Any]]]) -> List[Document]:
+    """One Document per entry of every ``{kind: {key: entry}}`` knowledge dict, with all its text fields"""
+    documents = []
+    for kind, entries in sources.items():
+        for key, entry in entries.items():
+            title = entry.get("title") or entry.get("name") or key.replace("_", " ")
+            documents.append(Document(kind, key, title, " ".join(_flatten(entry))))
+    return documents
+
+
+class KnowledgeIndex:
+    """Ranks documents against a query by cosine similarity of TF-IDF vectors.
+
+    Each term keeps a posting list (document ids and weights) as NumPy arrays,
+    so a query only touches the postings of its own terms. In a large
+    collection the documents they name are numbered with ``unique`` and scored
+    with one ``bincount`` over those numbers, so the cost grows with how common
+    the query terms are rather than with the size of the collection; up to a
+    few ten thousand documents a dense ``bincount`` over every id is cheaper. Titles
+    count ``title_weight`` times towards their document's term frequencies.
+    """
+
+    def __init__(self, documents: Iterable[Document], title_weight: int = 3):
+        self.documents = tuple(documents)
+        counts: List[Dict[str, int]] = []
+        document_frequency: Dict[str, int] = {}
+        for document in self.documents:
+            terms: Dict[str, int] = {}
+            for token in tokenize(document.title) * title_weight + tokenize(document.text):
+                terms[token] = terms.get(token, 0) + 1
+            counts.append(terms)
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        total = len(self.documents)
+        self.idf = {term: math.log((1 + total) / (1 + frequency)) + 1
+                    for term, frequency in document_frequency.items()}
+
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for doc_id, terms in enumerate(counts):
+            weights = {term: (1 + math.log(count)) * self.idf[term] for term, count in terms.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for term, weight in weights.items():
+                ids, values = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                values.append(weight / norm)
+        self._postings = {term: (np.array(ids, dtype=np.int32), np.array(values))
+                          for term, (ids, values) in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, limit: int = 3, min_score: float = 0.0) -> List[Tuple[Document, float]]:
+        """The best ``limit`` documents scoring above ``min_score``, best first"""
+        terms: Dict[str, int] = {}
+        for token in tokenize(query):
+            if token in self._postings:
+                terms[token] = terms.get(token, 0) + 1
+        if not terms:
+            return []
+
+        weights = {term: (1 + math.log(count)) * self.idf[term] for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        ids = np.concatenate([self._postings[term][0] for term in weights])
+        contributions = np.concatenate([self._postings[term][1] * (weight / norm)
+                                        for term, weight in weights.items()])
+        if len(self.documents) <= SPARSE_MIN_DOCUMENTS + len(ids) * DENSE_RATIO:
+            touched, slots = None, ids
+        else:
+            # Scores only for the documents the postings touch, in doc id order
+            touched, slots = np.unique(ids, return_inverse=True)
+        scores = np.bincount(slots, weights=contributions)
+
+        candidates = np.flatnonzero(scores > min_score)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if touched is not None:
+            return [(self.documents[touched[slot]], float(scores[slot])) for slot in ranked]
+        return [(self.documents[doc_id], float(scores[doc_id])) for doc_id in ranked]
@@ -0,0 +1,121 @@
+"""Single-pass weighted lexicon scorer for financial statements"""
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+_STRIP_CHARS = ".,!?;:\"'()[]"
+
+
+class LexiconScore(NamedTuple):
+    """Result of scoring one statement"""
+    positive: float
+    negative: float
+    # (token index, matched term, signed weight after negation) for every lexicon hit
+    hits: Tuple[Tuple[int, str, float], ...]
+    # Whitespace tokens of the statement, kept so key phrases can be cut out of it
+    tokens: Tuple[str, ...]
+
+    @property
+    def net(self) -> float:
+        return self.positive - self.negative
+
+    @property
+    def sentiment(self) -> str:
+        if self.positive > self.negative:
+            return "positive"
+        if self.negative > self.positive:
+            return "negative"
+        return "neutral"
+
+    def key_phrases(self, limit: int = 2, radius: int = 2) -> List[str]:
+        """Up to ``limit`` windows of text around the hits that agree with the overall sentiment"""
+        sentiment = self.sentiment
+        if sentiment == "neutral":
+            return []
+        want_positive = sentiment == "positive"
+        phrases = []
+        for index, _, weight in self.hits:
+            if (weight > 0) == want_positive:
+                start = max(0, index - radius)
+                phrases.append(" ".join(self.tokens[start:index + radius + 1]))
+                if len(phrases) >= limit:
+                    break
+        return phrases
+
+
+class LexiconScorer:
+    """Scores statements against a term -> weight map in one pass over their tokens.
+
+    Statements are split on whitespace and each token is stripped of
+    punctuation and looked up in a precomputed hash map, so only whole words
+    (or whole two-word phrases) count and the cost is linear in the number of
+    tokens regardless of lexicon size. A negation word flips the sign of the
+    hits in the next ``negation_window`` tokens.
+    """
+
+    def __init__(self, weights: Dict[str, float], negations: Iterable[str] = (), negation_window: int = 3):
+        self.unigrams: Dict[str, float] = {}
+        self.bigrams: Dict[str, float] = {}
+        for term, weight in weights.items():
+            words = term.lower().split()
+            if len(words) == 1:
+                self.unigrams[words[0]] = weight
+            elif len(words) == 2:
+                self.bigrams[" ".join(words)] = weight
+            else:
+                raise ValueError(f"Lexicon terms may have at most two words: {term!r}")
+        self._bigram_heads = frozenset(term.split()[0] for term in self.bigrams)
+        self.negations = frozenset(word.lower() for word in negations)
+        self.negation_window = negation_window
+
+    def score(self, statement: str) -> LexiconScore:
+        """Score one statement"""
+        tokens = statement.split()
+        unigrams = self.unigrams
+        bigrams = self.bigrams
+        bigram_heads = self._bigram_heads
+        negations = self.negations
+        hits = []
+        positive = negative = 0.0
+        negated_until = -1
+        previous = ""
+
+        for index, word in enumerate(statement.lower().split()):
+            word = word.strip(_STRIP_CHARS)
+            if word in negations:
+                negated_until = index + self.negation_window
+                previous = word
+                continue
+
+            weight = None
+            if previous in bigram_heads:
+                term = f"{previous} {word}"
+                weight = bigrams.get(term)
+            if weight is not None and hits and hits[-1][0] == index - 1:
+                # The phrase replaces the hit on its first word
+                _, _, replaced = hits.pop()
+                if replaced > 0:
+                    positive -= replaced
+                else:
+                    negative += replaced
+            if weight is None:
+                term = word
+                weight = unigrams.get(word)
+            if weight is not None:
+                if index <= negated_until:
+                    weight = -weight
+                if weight > 0:
+                    positive += weight
+                else:
+                    negative -= weight
+                hits.append((index, term, weight))
+            previous = word
+
+        return LexiconScore(positive, negative, tuple(hits), tuple(tokens))
+
+    def score_batch(self, statements: Sequence[str]) -> List[LexiconScore]:
+        """Score many statements, e.g. a feed of headlines"""
+        score = self.score
+        return [score(statement) for statement in statements]
+
+    def net_scores(self, statements: Sequence[str]) -> List[float]:
+        """Only the net (positive minus negative) weight of each statement"""
+        return [result.net for result in self.score_batch(statements)]
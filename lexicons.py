@@ -0,0 +1,99 @@
+"""Keyword vocabularies and the shared matcher built over them at import time"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from keyword_matcher import Hit, KeywordMatcher
+from lexicon_scorer import LexiconScorer
+
+# Financial topics tracked in the conversation memory
+TOPIC_KEYWORDS = {
+    "stocks": ["stock", "equity", "shares", "nasdaq", "nyse"],
+    "retirement": ["retire", "401k", "pension", "ira"],
+    "budgeting": ["budget", "spending", "expense", "income"],
+    "investing": ["invest", "portfolio", "asset", "allocation"],
+    "taxes": ["tax", "deduction", "write-off", "filing"]
+}
+
+# Risk tolerance indicators, in priority order
+RISK_KEYWORDS = {
+    "conservative": ["safe", "secure", "low risk", "conservative", "preserve"],
+    "moderate": ["balanced", "moderate", "middle ground"],
+    "aggressive": ["aggressive", "growth", "high risk", "high return"]
+}
+
+# Maps query topics to relevant FINANCIAL_EDUCATION resources
+RESOURCE_TOPICS = {
+    "stocks": ["stock_market", "investing_basics"],
+    "investing": ["investing_basics", "stock_market"],
+    "retirement": ["retirement_planning", "personal_finance"],
+    "budget": ["personal_finance"],
+    "saving": ["personal_finance"],
+    "finance": ["personal_finance", "investing_basics"]
+}
+
+# Words that move the simulated sentiment of a statement
+POSITIVE_WORDS = ["growth", "profit", "increase", "gain", "positive", "up", "bullish", "opportunity",
+                  "succeed", "success", "strong", "strengthen", "improved", "improving", "outperform"]
+NEGATIVE_WORDS = ["decline", "decrease", "loss", "debt", "risk", "bearish", "down", "fail", "weak",
+                  "negative", "problem", "issue", "challenge", "underperform", "concern"]
+
+# Weights used by the simulated sentiment scorer: every word above counts 1.0 towards
+# its side, with stronger signals and two-word phrases weighted individually
+SENTIMENT_WEIGHTS = {
+    **{word: 1.0 for word in POSITIVE_WORDS},
+    **{word: -1.0 for word in NEGATIVE_WORDS},
+    "bullish": 1.5, "outperform": 1.5, "surge": 1.5, "record": 0.5, "beat": 1.0,
+    "bearish": -1.5, "underperform": -1.5, "plunge": -1.5, "loss": -1.2, "miss": -1.0,
+    "beat expectations": 1.5, "record high": 1.5, "raised guidance": 1.5,
+    "missed expectations": -1.5, "profit warning": -2.0, "cut guidance": -1.5
+}
+NEGATION_WORDS = ["not", "no", "never", "without", "hardly", "isn't", "wasn't", "didn't", "won't", "can't"]
+
+# Key financial terms recognised in general queries, in priority order
+FINANCIAL_TERMS = [
+    "stocks", "bonds", "invest", "market", "finance", "money", "saving",
+    "retirement", "budget", "debt", "credit", "loan", "mortgage", "bank",
+    "interest", "dividend", "portfolio", "fund"
+]
+
+
+def _vocabulary():
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        yield from ((keyword, ("topic", topic)) for keyword in keywords)
+    for risk_level, keywords in RISK_KEYWORDS.items():
+        yield from ((keyword, ("risk", risk_level)) for keyword in keywords)
+    yield from ((topic, ("resource_topic", topic)) for topic in RESOURCE_TOPICS)
+    yield from ((term, ("financial_term", term)) for term in FINANCIAL_TERMS)
+
+
+# A single automaton over every vocabulary above; each hit carries a
+# (group, label) category, e.g. ("topic", "retirement") for "401k"
+LEXICON = KeywordMatcher(_vocabulary())
+
+
+# Whole-word weighted scorer for the simulated sentiment analysis
+SENTIMENT_SCORER = LexiconScorer(SENTIMENT_WEIGHTS, negations=NEGATION_WORDS)
+
+
+def scan(text: str) -> Dict[str, List[Hit]]:
+    """Find every vocabulary hit in ``text`` in one pass, grouped by vocabulary name"""
+    grouped: Dict[str, List[Hit]] = {}
+    for hit in LEXICON.finditer(text.lower()):
+        grouped.setdefault(hit.category[0], []).append(hit)
+    return grouped
+
+
+def labels(found: Dict[str, List[Hit]], group: str) -> Set[str]:
+    """The distinct labels of ``group`` present in a scan result"""
+    return {hit.category[1] for hit in found.get(group, ())}
+
+
+def ordered_labels(found: Dict[str, List[Hit]], group: str, order: Iterable[str]) -> List[str]:
+    """The labels of ``group`` present in a scan result, in vocabulary order"""
+    present = labels(found, group)
+    return [label for label in order if label in present] if present else []
+
+
+def first_label(found: Dict[str, List[Hit]], group: str, order: Iterable[str]) -> Optional[str]:
+    """The highest-priority label of ``group`` present in a scan result"""
+    matched = ordered_labels(found, group, order)
+    return matched[0] if matched else None
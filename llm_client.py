@@ -0,0 +1,192 @@
+"""Pooled async streaming client for an OpenAI-compatible chat completions endpoint"""
+import asyncio
+import json
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+# Marks the end of a relayed stream
+_END = object()
+
+
+def parse_sse_line(line: str) -> Optional[str]:
+    """Extract the text delta from one server-sent event line, if it carries any"""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    event = json.loads(data)
+    choices = event.get("choices") or []
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or choices[0].get("message") or {}
+    return delta.get("content") or choices[0].get("text") or None
+
+
+class _Broadcast:
+    """Chunks of one upstream stream, replayable to any number of subscribers"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class LLMClient:
+    """Streams chat completions over a pooled ``httpx.AsyncClient``.
+
+    All network I/O runs on the client's own event loop thread, so the one
+    connection pool is shared by sync callers (:meth:`stream_sync`, e.g. Gradio
+    worker threads) and by coroutines on any other loop (:meth:`stream`).
+    At most ``max_concurrency`` upstream requests run at once, every request
+    has connect/read timeouts plus an overall deadline, and identical prompts
+    issued while one is already streaming share that single upstream request.
+    """
+
+    def __init__(self, url: str, api_key: str = "", model: str = "", connect_timeout: float = 2.0,
+                 read_timeout: float = 30.0, total_timeout: float = 60.0, max_concurrency: int = 8,
+                 max_connections: int = 20):
+        self.url = url
+        self.model = model
+        self.total_timeout = total_timeout
+        self.max_concurrency = max_concurrency
+        self.deduplicated = 0
+        self._headers = {"Accept": "text/event-stream"}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=connect_timeout,
+                                      pool=total_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._inflight: Dict[str, _Broadcast] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+
+    def stream_sync(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Yield the reply chunk by chunk from a regular (non-async) thread"""
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        self._start(messages, chunks.put)
+        while True:
+            item = chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Yield the reply chunk by chunk on the caller's event loop"""
+        caller_loop = asyncio.get_running_loop()
+        chunks: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._start(messages, lambda item: caller_loop.call_soon_threadsafe(chunks.put_nowait, item))
+        while True:
+            item = await chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def complete(self, messages: List[Dict[str, str]]) -> str:
+        """The whole reply as one string"""
+        return "".join([chunk async for chunk in self.stream(messages)])
+
+    def close(self):
+        """Close the connection pool and stop the client's event loop"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def _start(self, messages: List[Dict[str, str]], sink: Callable[[Any], None]):
+        loop = self._ensure_loop()
+        asyncio.run_coroutine_threadsafe(self._relay(messages, sink), loop)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="llm-client", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def _relay(self, messages: List[Dict[str, str]], sink: Callable[[Any], None]):
+        """Subscribe to the (possibly shared) upstream stream and hand every chunk to ``sink``"""
+        key = json.dumps([self.model, messages], sort_keys=True)
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._inflight[key] = broadcast
+            asyncio.ensure_future(self._produce(key, messages, broadcast))
+        else:
+            self.deduplicated += 1
+        try:
+            async for chunk in broadcast.subscribe():
+                sink(chunk)
+        except Exception as exc:
+            sink(exc)
+        sink(_END)
+
+    async def _produce(self, key: str, messages: List[Dict[str, str]], broadcast: _Broadcast):
+        payload: Dict[str, Any] = {"messages": messages, "stream": True}
+        if self.model:
+            payload["model"] = self.model
+        try:
+            async with self._semaphore:
+                async with asyncio.timeout(self.total_timeout):
+                    async with self._client.stream("POST", self.url, json=payload,
+                                                   headers=self._headers) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if line == "data: [DONE]":
+                                break
+                            chunk = parse_sse_line(line) if line else None
+                            if chunk:
+                                broadcast.publish(chunk)
+        except Exception as exc:
+            broadcast.finish(exc)
+        else:
+            broadcast.finish()
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,200 @@
+"""Immutable lookup index over the stock universe"""
+import re
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from fuzzy_matcher import COMMON_WORDS, TrigramIndex, normalize
+from keyword_matcher import KeywordMatcher
+
+# Corporate suffixes dropped to derive the short alias of a company name ("Apple Inc." -> "apple")
+_NAME_SUFFIXES = re.compile(
+    r"[\s,]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|holdings|group|class [a-z])\.?$"
+)
+# Left dangling once a suffix is gone ("Merck & Co." -> "merck &"), dropped along with it
+_DANGLING_CONJUNCTION = re.compile(r"(\s*&|\s+and)$")
+# Web-era names are also written without their domain ("Amazon.com" -> "amazon")
+_NAME_DOMAIN = re.compile(r"\.(com|net|org|io)$")
+
+# Tickers this short are also ordinary capitalised words ("A", "I", "IT", "ON"), so free text only
+# counts them written as a cashtag ("$IT") or next to one of these words ("IT stock")
+SHORT_TICKER_LENGTH = 2
+TICKER_CONTEXT_WORDS = frozenset({"stock", "stocks", "share", "shares", "ticker", "symbol"})
+_NEXT_WORD = re.compile(r" (\w+)")
+# First words of names ("exxon" of "Exxon Mobil") shorter than this ("bank", "first") are too
+# generic to stand for one company in the fuzzy lookup
+MIN_LEADING_WORD = 5
+_PREVIOUS_WORD = re.compile(r"(\w+) $")
+
+
+class StockRecord(NamedTuple):
+    """Everything the chatbot knows about one listed symbol"""
+    symbol: str
+    sector: str
+    name: str
+    description: str
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _name_aliases(name: str) -> List[str]:
+    """The lower-cased company name and its shorter forms, each also with "&" spelled "and"
+
+    Trailing corporate suffixes, a leading "the" and a domain are dropped one
+    at a time: "The Merck & Co., Inc." gives "merck & co." and "merck", and
+    "Amazon.com, Inc." gives "amazon.com" and "amazon".
+    """
+    alias = name.lower().strip()
+    aliases = [alias]
+    if alias.startswith("the "):
+        alias = alias[4:]
+        aliases.append(alias)
+    while True:
+        shorter = _NAME_SUFFIXES.sub("", alias)
+        if shorter == alias:
+            shorter = _NAME_DOMAIN.sub("", alias)
+        shorter = _DANGLING_CONJUNCTION.sub("", shorter).strip()
+        if shorter == alias or not shorter:
+            break
+        alias = shorter
+        aliases.append(alias)
+    aliases += [alias.replace(" & ", " and ") for alias in aliases if " & " in alias]
+    return aliases
+
+
+def _in_ticker_context(text: str, start: int, end: int) -> bool:
+    """Whether the ticker at ``text[start:end]`` is a cashtag or has a word like "stock" next to it"""
+    if start > 0 and text[start - 1] == "$":
+        return True
+    after = _NEXT_WORD.match(text, end)
+    before = _PREVIOUS_WORD.search(text, max(0, start - 24), start)
+    return any(word is not None and word.group(1).lower() in TICKER_CONTEXT_WORDS for word in (after, before))
+
+
+class MarketIndex:
+    """Symbol, name and sector maps built once over a ``{sector: {symbol: info}}`` universe.
+
+    All lookups are dictionary hits, so their cost does not depend on the
+    number of listings. Mentions of tickers and company names in free text are
+    found by :meth:`find_symbols` with one Aho-Corasick pass per case form:
+    tickers are matched as written (so "KO" is found but "ko" in "know" is
+    not) and names are matched case-insensitively, both on word boundaries.
+    Tickers of up to SHORT_TICKER_LENGTH letters also need a "$" or a word
+    like "stock" next to them, since "A", "I" or "IT" open ordinary sentences.
+    :meth:`find_symbols_fuzzy` also tolerates typos and names given by their
+    first word only, through a trigram index built by :meth:`warm` or on its
+    first call. The maps are read-only views; build a new index
+    to change the universe.
+    """
+
+    def __init__(self, universe: Mapping[str, Mapping[str, Mapping[str, str]]],
+                 aliases: Optional[Mapping[str, Iterable[str]]] = None):
+        records: Dict[str, StockRecord] = {}
+        sectors: Dict[str, List[str]] = {}
+        for sector, stocks in universe.items():
+            members = sectors.setdefault(sector, [])
+            for symbol, info in stocks.items():
+                if symbol in records:
+                    raise ValueError(f"Symbol {symbol!r} is listed in more than one sector")
+                records[symbol] = StockRecord(symbol, sector, info.get("name", symbol), info.get("description", ""))
+                members.append(symbol)
+
+        by_alias: Dict[str, str] = {}
+        for symbol, record in records.items():
+            extra = list(aliases.get(symbol, ())) if aliases else []
+            for alias in [symbol.lower()] + _name_aliases(record.name) + [alias.lower() for alias in extra]:
+                by_alias.setdefault(alias, symbol)
+
+        self.by_symbol: Mapping[str, StockRecord] = MappingProxyType(records)
+        self.by_alias: Mapping[str, str] = MappingProxyType(by_alias)
+        self.by_sector: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {sector: tuple(members) for sector, members in sectors.items()}
+        )
+        self.symbols: Tuple[str, ...] = tuple(records)
+        self.sectors: Tuple[str, ...] = tuple(sectors)
+        # Row positions for column-wise data aligned with ``symbols`` and ``sectors``
+        self.rows: Mapping[str, int] = MappingProxyType({symbol: row for row, symbol in enumerate(self.symbols)})
+        sector_rows = {sector: row for row, sector in enumerate(self.sectors)}
+        self.sector_codes: Tuple[int, ...] = tuple(sector_rows[record.sector] for record in records.values())
+
+        self._tickers = KeywordMatcher((symbol, symbol) for symbol in records)
+        self._names = KeywordMatcher(
+            (alias, symbol) for alias, symbol in by_alias.items() if alias != symbol.lower()
+        )
+        self._fuzzy: Optional[TrigramIndex] = None
+        self._fuzzy_lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[StockRecord]:
+        """The record for ``symbol``, or None if it is not listed"""
+        return self.by_symbol.get(symbol)
+
+    def resolve(self, text: str) -> Optional[str]:
+        """The symbol for a ticker, company name or alias, in any case"""
+        return self.by_alias.get(text.strip().lower())
+
+    def sector_of(self, symbol: str) -> Optional[str]:
+        record = self.by_symbol.get(symbol)
+        return record.sector if record else None
+
+    def sector_symbols(self, sector: str) -> Tuple[str, ...]:
+        """Symbols listed under ``sector``, in universe order"""
+        return self.by_sector.get(sector, ())
+
+    def find_symbols(self, text: str) -> List[str]:
+        """Symbols mentioned in ``text`` by ticker or company name, in order of first mention"""
+        mentions = []
+        for hit in self._tickers.finditer(text):
+            if self._on_boundaries(text, hit.start, hit.end) and (
+                    hit.end - hit.start > SHORT_TICKER_LENGTH or _in_ticker_context(text, hit.start, hit.end)):
+                mentions.append((hit.start, hit.category))
+        lowered = text.lower()
+        for hit in self._names.finditer(lowered):
+            if self._on_boundaries(lowered, hit.start, hit.end):
+                mentions.append((hit.start, hit.category))
+        mentions.sort()
+        seen = set()
+        return [symbol for _, symbol in mentions if not (symbol in seen or seen.add(symbol))]
+
+    def find_symbols_fuzzy(self, text: str, min_score: float = 0.75) -> List[str]:
+        """Symbols whose ticker, name or alias appears in ``text`` with a few typos at most ("microsft")"""
+        return self.fuzzy.find(text, min_score=min_score)
+
+    @property
+    def fuzzy(self) -> TrigramIndex:
+        """Trigram index over every ticker, name and alias plus distinctive leading words, built once"""
+        if self._fuzzy is None:
+            with self._fuzzy_lock:
+                if self._fuzzy is None:
+                    self._fuzzy = TrigramIndex(self.by_alias.items(), words=self._leading_words())
+        return self._fuzzy
+
+    def warm(self):
+        """Build the indexes that are otherwise built on first use"""
+        self.fuzzy
+
+    def _leading_words(self) -> List[Tuple[str, str]]:
+        """(word, symbol) for each first word of a name that no other listing's name starts with,
+        so that a partial mention such as "exxon" finds Exxon Mobil"""
+        owners: Dict[str, Set[str]] = {}
+        for alias, symbol in self.by_alias.items():
+            words = normalize(alias).split()
+            owners.setdefault(words[0] if words else "", set()).add(symbol)
+        return [(word, symbols.pop()) for word, symbols in owners.items()
+                if len(symbols) == 1 and len(word) >= MIN_LEADING_WORD and word not in COMMON_WORDS
+                and word not in self.by_alias]
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int) -> bool:
+        return ((start == 0 or not _is_word_char(text[start - 1]))
+                and (end == len(text) or not _is_word_char(text[end])))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.by_symbol
+
+    def __iter__(self) -> Iterator[StockRecord]:
+        return iter(self.by_symbol.values())
+
+    def __len__(self) -> int:
+        return len(self.by_symbol)
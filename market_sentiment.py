@@ -0,0 +1,113 @@
+"""Vectorized simulation of sector and symbol sentiment for the whole market universe"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from market_index import MarketIndex
+
+SENTIMENTS = ("positive", "neutral", "negative")
+# Symbols lean positive or neutral; sectors are drawn uniformly
+STOCK_WEIGHTS = (0.5, 0.3, 0.2)
+# Score range [low, high) for each sentiment, in SENTIMENTS order
+SCORE_RANGES = np.array([[0.65, 0.95], [0.45, 0.65], [0.15, 0.45]])
+STOCK_TRENDS = ("up", "steady", "down")
+SECTOR_TRENDS = ("up", "stable", "down")
+
+# Reasons a symbol's sentiment might be what it is, indexed like SENTIMENTS
+STOCK_REASONS = (
+    ("strong quarterly results", "new product announcements", "expanded market share",
+     "strategic partnerships", "analyst upgrades"),
+    ("mixed earnings results", "pending regulatory decisions", "competitive market conditions",
+     "sector rotation", "waiting for upcoming announcements"),
+    ("missed earnings expectations", "regulatory challenges", "increased competition",
+     "management changes", "sector weakness"),
+)
+REASONS_PER_STOCK = 2
+TOP_PERFORMERS_PER_SECTOR = 2
+
+
+def _draw_scores(rng: np.random.Generator, labels: np.ndarray) -> np.ndarray:
+    low = SCORE_RANGES[labels, 0]
+    high = SCORE_RANGES[labels, 1]
+    return np.round(low + (high - low) * rng.random(len(labels)), 2)
+
+
+class MarketSentiment:
+    """Sentiment of every sector and symbol at one point in time, stored column-wise.
+
+    Built by :func:`simulate_market_sentiment`; :meth:`stock` and
+    :meth:`sectors` render the same dictionaries as the per-request
+    ``generate_dynamic_stock_sentiment`` and ``generate_market_sentiment``.
+    """
+
+    def __init__(self, index: MarketIndex, stock_labels: np.ndarray, stock_scores: np.ndarray,
+                 news_counts: np.ndarray, reasons: np.ndarray, sector_labels: np.ndarray,
+                 sector_scores: np.ndarray, top_performers: Tuple[Tuple[str, ...], ...], seed: Optional[int] = None):
+        self.index = index
+        self.stock_labels = stock_labels
+        self.stock_scores = stock_scores
+        self.news_counts = news_counts
+        self.reasons = reasons
+        self.sector_labels = sector_labels
+        self.sector_scores = sector_scores
+        self.top_performers = top_performers
+        self.seed = seed
+
+    def stock(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Sentiment of one listed symbol, or None if it is not in the universe"""
+        row = self.index.rows.get(symbol)
+        if row is None:
+            return None
+        label = int(self.stock_labels[row])
+        return {
+            "symbol": symbol,
+            "name": self.index.by_symbol[symbol].name,
+            "sentiment": SENTIMENTS[label],
+            "score": float(self.stock_scores[row]),
+            "news_count": int(self.news_counts[row]),
+            "trending": STOCK_TRENDS[label],
+            "key_reasons": [STOCK_REASONS[label][reason] for reason in self.reasons[row].tolist()]
+        }
+
+    def sector(self, position: int) -> Dict[str, Any]:
+        label = int(self.sector_labels[position])
+        return {
+            "sentiment": SENTIMENTS[label],
+            "score": float(self.sector_scores[position]),
+            "trending": SECTOR_TRENDS[label],
+            "top_performers": list(self.top_performers[position])
+        }
+
+    def sectors(self) -> Dict[str, Dict[str, Any]]:
+        """Sentiment of every sector, keyed by sector name"""
+        return {sector: self.sector(position) for position, sector in enumerate(self.index.sectors)}
+
+
+def simulate_market_sentiment(index: MarketIndex, seed: Optional[int] = None) -> MarketSentiment:
+    """Draw sentiment for every symbol and sector of ``index`` in one pass of array operations"""
+    rng = np.random.default_rng(seed)
+    n_symbols = len(index.symbols)
+    n_sectors = len(index.sectors)
+
+    stock_labels = rng.choice(len(SENTIMENTS), size=n_symbols, p=STOCK_WEIGHTS).astype(np.int8)
+    stock_scores = _draw_scores(rng, stock_labels)
+    news_counts = rng.integers(3, 26, size=n_symbols, dtype=np.int16)
+    # A random permutation per row; its first columns are a sample without replacement
+    reasons = rng.random((n_symbols, len(STOCK_REASONS[0]))).argsort(axis=1)[:, :REASONS_PER_STOCK]
+
+    sector_labels = rng.integers(0, len(SENTIMENTS), size=n_sectors, dtype=np.int8)
+    sector_scores = _draw_scores(rng, sector_labels)
+
+    # Each sector's top performers are its highest-scoring symbols
+    sector_codes = np.asarray(index.sector_codes, dtype=np.intp)
+    order = np.lexsort((-stock_scores, sector_codes))
+    starts = np.searchsorted(sector_codes[order], np.arange(n_sectors + 1))
+    symbols = np.asarray(index.symbols, dtype=object)
+    top: List[Tuple[str, ...]] = []
+    for position in range(n_sectors):
+        start = starts[position]
+        end = min(starts[position + 1], start + TOP_PERFORMERS_PER_SECTOR)
+        top.append(tuple(symbols[order[start:end]].tolist()))
+
+    return MarketSentiment(index, stock_labels, stock_scores, news_counts, reasons, sector_labels,
+                           sector_scores, tuple(top), seed)
@@ -0,0 +1,177 @@
+"""Market universe loaded from an on-disk listing file, rebuilt off the request path and swapped atomically"""
+import csv
+import os
+import threading
+from typing import Callable, Dict, Mapping, Optional
+
+from market_index import MarketIndex
+
+# Columns every listing file must provide; "description" is optional
+REQUIRED_COLUMNS = ("symbol", "sector", "name")
+
+Universe = Dict[str, Dict[str, Dict[str, str]]]
+
+
+def _rows_to_universe(symbols, sectors, names, descriptions) -> Universe:
+    universe: Universe = {}
+    for symbol, sector, name, description in zip(symbols, sectors, names, descriptions):
+        if not symbol or not sector:
+            continue
+        universe.setdefault(sector, {})[symbol] = {"name": name or symbol, "description": description or ""}
+    return universe
+
+
+def read_csv(path: str) -> Universe:
+    """Read a ``symbol,sector,name[,description]`` CSV listing"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+        rows = [(row["symbol"].strip(), row["sector"].strip(), row["name"].strip(),
+                 (row.get("description") or "").strip()) for row in reader]
+    return _rows_to_universe(*zip(*rows)) if rows else {}
+
+
+def read_arrow(path: str) -> Universe:
+    """Read a Parquet file, or memory-map an Arrow IPC/Feather file, with the listing columns"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError(f"Reading {path} requires pyarrow; install it or use a CSV listing") from exc
+
+    if path.endswith(".parquet"):
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    missing = [column for column in REQUIRED_COLUMNS if column not in table.column_names]
+    if missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+    columns = [table.column(column).to_pylist() for column in REQUIRED_COLUMNS]
+    if "description" in table.column_names:
+        descriptions = table.column("description").to_pylist()
+    else:
+        descriptions = [""] * table.num_rows
+    return _rows_to_universe(*columns, descriptions)
+
+
+READERS = {
+    ".csv": read_csv,
+    ".parquet": read_arrow,
+    ".arrow": read_arrow,
+    ".feather": read_arrow,
+}
+
+
+class MarketUniverse:
+    """Holds the current :class:`MarketIndex`.
+
+    Reading :attr:`index` is a single attribute load and never touches the
+    disk; the index is built on first use, from ``path`` when configured and
+    from the ``default`` mapping otherwise. After :meth:`start`, a daemon
+    thread warms the typo-tolerant lookup, then re-stats the file every
+    ``refresh_seconds`` and, when its modification time or size changed,
+    reads it and builds the new index (lookups included) before swapping it
+    in with one assignment, so requests always see a complete universe and
+    never pay for the rebuild. A failed reload keeps serving the previous
+    index and records the error in :attr:`last_error`.
+    ``on_swap`` is called from the same thread with each new index to warm
+    anything else derived from it.
+    """
+
+    def __init__(self, path: Optional[str] = None, default: Optional[Mapping] = None,
+                 refresh_seconds: float = 60.0, on_swap: Optional[Callable[[MarketIndex], None]] = None):
+        if path and os.path.splitext(path)[1].lower() not in READERS:
+            raise ValueError(f"Unsupported universe format: {path} (expected one of {', '.join(READERS)})")
+        self.path = path or None
+        self.default = default or {}
+        self.refresh_seconds = refresh_seconds
+        self.on_swap = on_swap
+        self.version = 0
+        self.last_error: Optional[Exception] = None
+        self._index: Optional[MarketIndex] = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def index(self) -> MarketIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load(self._signature_of())
+                index = self._index
+        return index
+
+    def reload(self, force: bool = False) -> MarketIndex:
+        """Rebuild the index if the listing changed on disk (or always, with ``force``)"""
+        with self._lock:
+            previous = self._index
+            try:
+                signature = self._signature_of()
+                if force or previous is None or signature != self._signature:
+                    self._load(signature, warm=True)
+                    self.last_error = None
+            except Exception as exc:
+                self.last_error = exc
+                if self._index is None:
+                    raise
+            index = self._index
+        if index is not previous and self.on_swap is not None:
+            self.on_swap(index)
+        return index
+
+    def _signature_of(self):
+        if self.path is None:
+            return None
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, signature, warm: bool = False):
+        if self.path is None:
+            index = MarketIndex(self.default)
+        else:
+            index = MarketIndex(READERS[os.path.splitext(self.path)[1].lower()](self.path))
+        if warm:
+            index.warm()
+        # Everything is built; publishing it is one reference assignment
+        self._index = index
+        self._signature = signature
+        self.version += 1
+
+    def start(self):
+        """Start the background watcher, which first loads and warms the current index (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="universe-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # The index may already have been loaded lazily by a request; warm it like a reloaded one
+        try:
+            previous = self._index
+            index = self.reload()
+            if index is previous:
+                index.warm()
+                if self.on_swap is not None:
+                    self.on_swap(index)
+        except Exception as exc:
+            self.last_error = exc
+        if self.path is None:
+            return
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.reload()
+            except Exception as exc:
+                self.last_error = exc
@@ -0,0 +1,131 @@
+"""Fixed-capacity ring buffer of conversation messages with O(1) append/evict and zero-copy views"""
+import sys
+from typing import Dict, Iterator, List, Optional
+
+
+class Message:
+    """One conversation turn; also readable as ``message["role"]`` / ``message["content"]`` like the old dicts"""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        # Roles repeat on every turn of every session; interning keeps a single copy of each
+        self.role = sys.intern(role)
+        self.content = content
+
+    def __getitem__(self, key: str) -> str:
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Message):
+            return self.role == other.role and self.content == other.content
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Message({self.role!r}, {self.content!r})"
+
+
+class MessageRing:
+    """The last ``capacity`` messages, oldest first; appending to a full ring overwrites the oldest slot.
+
+    ``appended`` counts every message ever added, so the message at ring
+    position ``i`` is number ``appended - len(ring) + i + 1`` of the conversation.
+    """
+
+    __slots__ = ("_slots", "_start", "_count", "appended")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._slots: List[Optional[Message]] = [None] * capacity
+        self._start = 0
+        self._count = 0
+        self.appended = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots)
+
+    def append(self, role: str, content: str) -> Optional[Message]:
+        """Add a message and return the one it evicted, if the ring was full"""
+        message = Message(role, content)
+        self.appended += 1
+        capacity = len(self._slots)
+        if self._count < capacity:
+            self._slots[(self._start + self._count) % capacity] = message
+            self._count += 1
+            return None
+        evicted = self._slots[self._start]
+        self._slots[self._start] = message
+        self._start = (self._start + 1) % capacity
+        return evicted
+
+    def recent(self, count: int) -> "RingView":
+        """The newest ``count`` messages (or all of them, if there are fewer) without copying"""
+        count = max(0, min(count, self._count))
+        return RingView(self, self._count - count, count)
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+        self._start = 0
+        self._count = 0
+
+    def approx_size(self) -> int:
+        """Bytes held by the slot array, the records and their contents; interned roles are shared"""
+        size = sys.getsizeof(self) + sys.getsizeof(self._slots)
+        for message in self:
+            size += sys.getsizeof(message) + sys.getsizeof(message.content)
+        return size
+
+    def _at(self, offset: int) -> Message:
+        return self._slots[(self._start + offset) % len(self._slots)]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Message]:
+        for offset in range(self._count):
+            yield self._at(offset)
+
+    def __getitem__(self, index: int) -> Message:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("message index out of range")
+        return self._at(index)
+
+
+class RingView:
+    """A read-only window onto consecutive messages of a MessageRing.
+
+    The view reads straight from the ring, so it is only meaningful until the
+    next ``append``; call ``list(view)`` to keep the messages beyond that.
+    """
+
+    __slots__ = ("_ring", "_offset", "_count")
+
+    def __init__(self, ring: MessageRing, offset: int, count: int):
+        self._ring = ring
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Message]:
+        for offset in range(self._offset, self._offset + self._count):
+            yield self._ring._at(offset)
+
+    def __getitem__(self, index: int) -> Message:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("message index out of range")
+        return self._ring._at(self._offset + index)
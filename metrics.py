@@ -0,0 +1,205 @@
+"""Lightweight in-process metrics with a Prometheus text endpoint"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond template replies up to slow network calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (label pairs, value) as produced by collectors at scrape time
+Sample = Tuple[Tuple[Tuple[str, str], ...], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + rendered + "}" if rendered else ""
+
+
+class _HistogramChild:
+    """One label combination of a histogram; ``observe`` is a bisect and three additions under a lock"""
+
+    __slots__ = ("_bounds", "_counts", "_sum", "_count", "_lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self._bounds, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def labels(self, *values: str) -> _HistogramChild:
+        """The series for ``values``; callers on a hot path can keep the returned child"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, seconds: float):
+        self._unlabelled.observe(seconds)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for values, child in sorted(self._children.items()):
+            pairs = list(zip(self.labelnames, values))
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def value(self, *values: str) -> float:
+        """The count for one combination of label values"""
+        with self._lock:
+            return self._values.get(values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_format_labels(zip(self.labelnames, values))} {value!r}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus collectors that read existing counters (cache stats, queue sizes) at scrape time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, documentation, labelnames))
+
+    def collector(self, name: str, documentation: str, kind: str, collect: Callable[[], Iterable[Sample]]):
+        """Register ``collect``, called on every scrape for the samples of ``name`` (a gauge or counter)"""
+        with self._lock:
+            self._collectors.append((name, documentation, kind, collect))
+
+    def _register(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, documentation, kind, collect in collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            try:
+                samples = list(collect())
+            except Exception:
+                # A broken collector must not take the whole endpoint down
+                continue
+            for pairs, value in samples:
+                lines.append(f"{name}{_format_labels(pairs)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Serve ``/metrics`` from a daemon thread and return the server; port 0 picks a free port"""
+    # Imported here so that importing the engine does not pay for http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+
+def route(path: str = "/metrics", registry: Registry = REGISTRY):
+    """A Starlette route serving ``registry``, to mount on the app that already serves the UI"""
+    # Imported here for the same reason; only the UI process has starlette loaded anyway
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    async def endpoint(request):
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    return Route(path, endpoint, methods=["GET"])
@@ -0,0 +1,56 @@
+"""Pluggable sentiment backends behind analyze_sentiment; the NumPy model lives in local_sentiment"""
+import asyncio
+from typing import List, Optional, Sequence
+
+from sentiment_client import FinBertClient, SentimentBatcher, SentimentPrediction
+
+LABELS = ("positive", "negative", "neutral")
+
+
+class SentimentBackend:
+    """Turns statements into (label, score) predictions.
+
+    Implementations override :meth:`predict_batch`; a None entry means the
+    backend had no prediction for that statement and the caller should fall
+    back to the simulated analysis.
+    """
+
+    name = "base"
+
+    def predict(self, statement: str) -> Optional[SentimentPrediction]:
+        return self.predict_batch([statement])[0]
+
+    def predict_batch(self, statements: Sequence[str]) -> List[Optional[SentimentPrediction]]:
+        raise NotImplementedError
+
+    async def predict_async(self, statement: str) -> Optional[SentimentPrediction]:
+        """Asyncio entry point for :meth:`predict`; runs it in the loop's default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.predict, statement)
+
+
+class FinBertBackend(SentimentBackend):
+    """Remote FinBERT inference, optionally through the micro-batching scheduler"""
+
+    name = "finbert"
+
+    def __init__(self, client: FinBertClient, batcher: Optional[SentimentBatcher] = None,
+                 timeout: Optional[float] = None):
+        self.client = client
+        self.batcher = batcher
+        self.timeout = timeout
+
+    def predict(self, statement: str) -> Optional[SentimentPrediction]:
+        if self.batcher is not None:
+            return self.batcher.classify(statement, timeout=self.timeout)
+        return self.client.classify(statement)
+
+    async def predict_async(self, statement: str) -> Optional[SentimentPrediction]:
+        if self.batcher is None:
+            return await self.client.classify_async(statement)
+        try:
+            return await asyncio.wait_for(self.batcher.classify_async(statement), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def predict_batch(self, statements: Sequence[str]) -> List[Optional[SentimentPrediction]]:
+        return self.client.classify_batch(statements)
@@ -0,0 +1,307 @@
+"""Pooled, cached FinBERT inference client with a circuit breaker and request batching"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+
+# (label, score) as returned by FinBERT, e.g. ("positive", 0.93)
+SentimentPrediction = Tuple[str, float]
+
+
+def normalize_statement(statement: str) -> str:
+    """Cache key for a statement: case-folded with whitespace collapsed"""
+    return " ".join(statement.casefold().split())
+
+
+def parse_prediction(result: Any) -> Optional[SentimentPrediction]:
+    """Pick the top label out of one FinBERT output (a list of label/score dicts); None for any other shape"""
+    if isinstance(result, list) and len(result) > 0:
+        if isinstance(result[0], list):
+            result = result[0]
+        if result and all(isinstance(item, dict) and isinstance(item.get('label'), str)
+                          and isinstance(item.get('score'), (int, float)) for item in result):
+            top_sentiment = max(result, key=lambda x: x['score'])
+            return top_sentiment['label'].lower(), float(top_sentiment['score'])
+    return None
+
+
+class CircuitBreaker:
+    """Stops calling a failing or slow backend for a cool-down period.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow()`` returns False until ``reset_timeout`` seconds have passed. Then
+    a single trial call is let through: success closes the breaker again, a
+    failure re-opens it. Calls slower than ``slow_call_seconds`` count as failures.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 slow_call_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be made to the backend right now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self, elapsed: float = 0.0):
+        if self.slow_call_seconds is not None and elapsed > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class FinBertClient:
+    """Client for the FinBERT inference endpoint.
+
+    Connections are pooled and kept alive in one ``requests.Session``, every
+    call has connect and read timeouts, and predictions are cached by the
+    normalized statement. ``classify`` returns None whenever no prediction is
+    available (error, timeout, open circuit breaker or unexpected payload) so
+    the caller can fall back to the simulated analysis.
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, connect_timeout: float = 2.0,
+                 read_timeout: float = 5.0, pool_size: int = 10, wait_for_model: bool = False,
+                 cache_size: int = 1024, cache_ttl: Optional[float] = 300.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.wait_for_model = wait_for_model
+        self.cache = TTLCache(maxsize=cache_size, ttl_seconds=cache_ttl)
+        self.breaker = breaker or CircuitBreaker()
+
+        self._session = requests.Session()
+        self._session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="finbert")
+
+    def classify(self, statement: str) -> Optional[SentimentPrediction]:
+        """Return the (label, score) FinBERT assigns to ``statement``, or None"""
+        key = normalize_statement(statement)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self._fetch(statement, key)
+
+    async def classify_async(self, statement: str) -> Optional[SentimentPrediction]:
+        """Asyncio entry point for :meth:`classify`, run on the client's own worker pool"""
+        key = normalize_statement(statement)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch, statement, key)
+
+    def classify_batch(self, statements: Sequence[str]) -> List[Optional[SentimentPrediction]]:
+        """Classify several statements, sending the uncached ones in a single request"""
+        keys = [normalize_statement(statement) for statement in statements]
+        results: List[Optional[SentimentPrediction]] = [self.cache.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            fetched = self.fetch_batch([statements[index] for index in missing], [keys[index] for index in missing])
+            for index, prediction in zip(missing, fetched):
+                results[index] = prediction
+        return results
+
+    def fetch_batch(self, statements: Sequence[str],
+                    keys: Optional[Sequence[str]] = None) -> List[Optional[SentimentPrediction]]:
+        """Send statements already missing from the cache in a single request (each distinct one once)
+        and cache the predictions; ``keys`` are their normalized forms, if already computed"""
+        if keys is None:
+            keys = [normalize_statement(statement) for statement in statements]
+        pending: Dict[str, List[int]] = {}
+        for index, key in enumerate(keys):
+            pending.setdefault(key, []).append(index)
+        results: List[Optional[SentimentPrediction]] = [None] * len(statements)
+        if not pending:
+            return results
+
+        predictions = self._post([statements[indexes[0]] for indexes in pending.values()])
+        for (key, indexes), prediction in zip(pending.items(), predictions):
+            if prediction is not None:
+                self.cache.set(key, prediction)
+            for index in indexes:
+                results[index] = prediction
+        return results
+
+    def _fetch(self, statement: str, key: str) -> Optional[SentimentPrediction]:
+        prediction = self._post([statement])[0]
+        if prediction is not None:
+            self.cache.set(key, prediction)
+        return prediction
+
+    def _post(self, statements: List[str]) -> List[Optional[SentimentPrediction]]:
+        """Send one inference request for ``statements``; a None per statement on any failure"""
+        failed: List[Optional[SentimentPrediction]] = [None] * len(statements)
+        if not self.breaker.allow():
+            return failed
+
+        inputs = statements[0] if len(statements) == 1 else statements
+        payload = {"inputs": inputs, "options": {"wait_for_model": self.wait_for_model}}
+        start = time.monotonic()
+        succeeded = False
+        try:
+            response = self._session.post(self.url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            if len(statements) == 1:
+                predictions = [parse_prediction(result)]
+            elif isinstance(result, list) and len(result) == len(statements):
+                predictions = [parse_prediction(item) for item in result]
+            else:
+                predictions = failed
+            succeeded = True
+        except Exception:
+            # Whatever the endpoint sent back, the caller falls back to the simulated analysis
+            return failed
+        finally:
+            # Recorded on every exit, or a failed half-open trial would leave the breaker open for good
+            if succeeded:
+                self.breaker.record_success(time.monotonic() - start)
+            else:
+                self.breaker.record_failure()
+        return predictions
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
+
+class SentimentBatcher:
+    """Coalesces concurrent sentiment requests into batched FinBERT calls.
+
+    Callers submit single statements and get a future back. A background
+    thread collects submissions for up to ``window_ms`` milliseconds (or until
+    ``max_batch`` are waiting), sends them to the endpoint as one list of
+    ``inputs`` and resolves each caller's future with its own prediction.
+    Up to ``max_in_flight`` batches are sent concurrently, so a slow batch does
+    not hold back the next window. Cached statements are answered immediately
+    without joining a batch, and the cache is consulted once per statement.
+    Statements submitted after :meth:`close` get None right away.
+    """
+
+    def __init__(self, client: FinBertClient, window_ms: float = 15.0, max_batch: int = 32,
+                 max_in_flight: int = 4):
+        self.client = client
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches_sent = 0
+        self._senders = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="finbert-batch")
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Future]]]" = queue.Queue()
+        # Held while queueing and while closing, so nothing is queued behind the stop marker
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="finbert-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, statement: str) -> "Future[Optional[SentimentPrediction]]":
+        """Queue ``statement`` for the next batch and return a future for its prediction"""
+        future: Future = Future()
+        key = normalize_statement(statement)
+        cached = self.client.cache.get(key)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+        with self._lock:
+            if not self._closed:
+                self._queue.put((statement, key, future))
+                return future
+        future.set_result(None)
+        return future
+
+    def classify(self, statement: str, timeout: Optional[float] = None) -> Optional[SentimentPrediction]:
+        """Blocking helper: submit and wait, returning None if no prediction arrives in time"""
+        try:
+            return self.submit(statement).result(timeout=timeout)
+        except TimeoutError:
+            return None
+
+    async def classify_async(self, statement: str) -> Optional[SentimentPrediction]:
+        """Asyncio entry point for :meth:`submit`"""
+        return await asyncio.wrap_future(self.submit(statement))
+
+    def close(self):
+        """Stop the batching thread after flushing what is already queued"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+        self._senders.shutdown(wait=True)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._senders.submit(self._dispatch, batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[str, str, Future]]):
+        # Every statement missed the cache in submit, so they go straight to the endpoint
+        try:
+            predictions = self.client.fetch_batch([item[0] for item in batch], [item[1] for item in batch])
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        self.batches_sent += 1
+        for (_, _, future), prediction in zip(batch, predictions):
+            future.set_result(prediction)
@@ -0,0 +1,112 @@
+"""Compact binary encoding of a conversation memory, for stores shared between worker processes"""
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Tuple
+
+FORMAT_VERSION = 1
+# Set on the version byte when the rest of the payload is zlib-compressed
+COMPRESSED = 0x80
+# Shorter payloads are not worth a zlib call (and rarely get smaller)
+COMPRESS_MIN_BYTES = 256
+
+# Roles are one byte on the wire; anything else is spelled out after OTHER_ROLE
+ROLES = ("user", "assistant")
+OTHER_ROLE = 0xFF
+
+
+def encode_session(state: Dict[str, Any], messages: Iterable[Tuple[str, str]], appended: int) -> bytes:
+    """Pack ConversationMemory.to_state() output, its (role, content) messages oldest first and the
+    number of messages ever appended.
+
+    Layout: a version byte, then varint counts and length-prefixed UTF-8
+    strings for the message count so far, topics, interests, the profile (as
+    compact JSON, since its values are free-form) and the messages. Bodies
+    of COMPRESS_MIN_BYTES or more are zlib-compressed when that makes them smaller.
+    """
+    body = bytearray()
+    _put_varint(body, appended)
+    for values in (state.get("topics_discussed", ()), state.get("user_interests", ())):
+        values = list(values)
+        _put_varint(body, len(values))
+        for value in values:
+            _put_string(body, value)
+    _put_string(body, json.dumps(state.get("user_profile", {}), separators=(",", ":")))
+    messages = list(messages)
+    _put_varint(body, len(messages))
+    for role, content in messages:
+        if role in ROLES:
+            body.append(ROLES.index(role))
+        else:
+            body.append(OTHER_ROLE)
+            _put_string(body, role)
+        _put_string(body, content)
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(body, 1)
+        if len(packed) < len(body):
+            return bytes([FORMAT_VERSION | COMPRESSED]) + packed
+    return bytes([FORMAT_VERSION]) + bytes(body)
+
+
+def decode_session(data: bytes) -> Tuple[Dict[str, Any], List[Tuple[int, str, str]]]:
+    """The (state, [(seq, role, content), ...] oldest first) packed by :func:`encode_session`"""
+    if not data or data[0] & ~COMPRESSED != FORMAT_VERSION:
+        raise ValueError(f"unsupported session encoding {data[:1]!r}")
+    body = zlib.decompress(data[1:]) if data[0] & COMPRESSED else memoryview(data)[1:]
+    reader = _Reader(body)
+    appended = reader.varint()
+    topics = [reader.string() for _ in range(reader.varint())]
+    interests = [reader.string() for _ in range(reader.varint())]
+    profile = json.loads(reader.string())
+    count = reader.varint()
+    messages = []
+    for offset in range(count):
+        code = reader.byte()
+        role = ROLES[code] if code < len(ROLES) else reader.string()
+        messages.append((appended - count + offset + 1, role, reader.string()))
+    state = {"topics_discussed": topics, "user_interests": interests, "user_profile": profile}
+    return state, messages
+
+
+def _put_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_string(out: bytearray, text: str):
+    encoded = text.encode()
+    _put_varint(out, len(encoded))
+    out += encoded
+
+
+class _Reader:
+    __slots__ = ("data", "position")
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def byte(self) -> int:
+        value = self.data[self.position]
+        self.position += 1
+        return value
+
+    def varint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def string(self) -> str:
+        length = self.varint()
+        end = self.position + length
+        if end > len(self.data):
+            raise ValueError("truncated session encoding")
+        text = bytes(self.data[self.position:end]).decode()
+        self.position = end
+        return text
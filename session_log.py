@@ -0,0 +1,199 @@
+"""Durable session state in SQLite (WAL mode), written behind the request path in batches"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    last_seq INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# (session id, state JSON, last sequence number, [(seq, role, content), ...], called with whether it was
+# committed); state None deletes the session
+Write = Tuple[str, Optional[str], int, List[Tuple[int, str, str]], Optional[Callable[[bool], None]]]
+
+
+class SQLiteSessionLog:
+    """Write-behind store of each session's recent messages and profile state.
+
+    :meth:`record` only puts the new messages and a JSON copy of the state on
+    a queue. A background thread drains it every ``flush_ms`` milliseconds (or
+    once ``max_batch`` writes are waiting) and commits the whole batch in one
+    transaction, keeping the newest ``keep_messages`` messages per session. The
+    database runs in WAL mode, so :meth:`load` (used on a session's first
+    access) reads without waiting for the writer; a load for a session that
+    still has queued writes waits for them to be committed first.
+
+    Writes queued when the process exits are flushed by :meth:`close`. A
+    batch that fails to commit is dropped and reported to each write's
+    ``on_done`` callback, so the caller can send those messages again.
+    """
+
+    def __init__(self, path: str, flush_ms: float = 50.0, max_batch: int = 512, keep_messages: int = 10):
+        self.path = path
+        self.window = flush_ms / 1000
+        self.max_batch = max_batch
+        self.keep_messages = keep_messages
+        self.batches_written = 0
+        self.writes_committed = 0
+        self.last_error: Optional[Exception] = None
+        self._queue: "queue.Queue[Optional[Write]]" = queue.Queue()
+        # session id -> writes queued but not yet committed
+        self._pending: Dict[str, int] = {}
+        self._pending_lock = threading.Condition()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @property
+    def pending(self) -> int:
+        """Writes queued and not yet committed"""
+        return self._queue.qsize()
+
+    def record(self, session_id: Hashable, state: Dict[str, Any], messages: List[Tuple[int, str, str]],
+               last_seq: int, on_done: Optional[Callable[[bool], None]] = None):
+        """Queue the messages added since the last record (as (seq, role, content)) and the current state;
+        ``on_done(committed)`` is called from the writer thread once the batch holding them is settled"""
+        self._enqueue((str(session_id), json.dumps(state, separators=(",", ":")), last_seq, messages, on_done))
+
+    def delete(self, session_id: Hashable):
+        """Queue the removal of a session and all its messages"""
+        self._enqueue((str(session_id), None, 0, [], None))
+
+    def load(self, session_id: Hashable) -> Optional[Tuple[Dict[str, Any], List[Tuple[int, str, str]]]]:
+        """The stored (state, messages oldest first) of a session, or None if it was never recorded"""
+        key = str(session_id)
+        with self._pending_lock:
+            self._pending_lock.wait_for(lambda: not self._pending.get(key))
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            row = self._reader.execute("SELECT state FROM sessions WHERE session_id = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            messages = self._reader.execute(
+                "SELECT seq, role, content FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (key, self.keep_messages)
+            ).fetchall()
+        return json.loads(row[0]), messages[::-1]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is committed; False if ``timeout`` ran out first"""
+        with self._pending_lock:
+            return self._pending_lock.wait_for(lambda: not self._pending, timeout)
+
+    def close(self):
+        """Commit what is queued and stop the writer thread"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def _enqueue(self, write: Write):
+        if self._worker is None:
+            self._start()
+        with self._pending_lock:
+            self._pending[write[0]] = self._pending.get(write[0], 0) + 1
+        self._queue.put(write)
+
+    def _start(self):
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.window
+                stop = False
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._commit(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _commit(self, connection: sqlite3.Connection, batch: List[Write]):
+        now = time.time()
+        committed = False
+        try:
+            with connection:
+                for session_id, state, last_seq, messages, _ in batch:
+                    if state is None:
+                        connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                        connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                        continue
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                        [(session_id, seq, role, content) for seq, role, content in messages]
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO sessions (session_id, state, last_seq, updated_at) VALUES (?, ?, ?, ?)",
+                        (session_id, state, last_seq, now)
+                    )
+                    connection.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?",
+                                       (session_id, last_seq - self.keep_messages))
+            self.batches_written += 1
+            self.writes_committed += len(batch)
+            committed = True
+        except sqlite3.Error as exc:
+            # The sessions stay in memory; on_done(False) has their next record resend these messages
+            self.last_error = exc
+        finally:
+            for write in batch:
+                if write[4] is not None:
+                    write[4](committed)
+            with self._pending_lock:
+                for write in batch:
+                    remaining = self._pending[write[0]] - 1
+                    if remaining:
+                        self._pending[write[0]] = remaining
+                    else:
+                        del self._pending[write[0]]
+                self._pending_lock.notify_all()
@@ -0,0 +1,192 @@
+"""Session-keyed conversation memory stores: the backend interface and the in-process LRU store"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SessionBackend(ABC):
+    """Where conversation memory lives between turns.
+
+    A turn calls :meth:`get` for the session's memory, updates it and then
+    calls :meth:`touch`, which is where a backend that keeps sessions outside
+    the process writes them back. :meth:`discard` forgets a session.
+    """
+
+    name = "base"
+    # True when get or touch may wait on I/O; async callers then run them off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, session_id: Hashable) -> Any:
+        """The session's memory, created if the session is new"""
+
+    @abstractmethod
+    def touch(self, session_id: Hashable, memory: Any = None):
+        """``memory`` is what :meth:`get` returned, so that a session evicted mid-turn is still saved"""
+
+    @abstractmethod
+    def discard(self, session_id: Hashable):
+        """Forget the session"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """At least "sessions", "approx_bytes" and "evictions" for what this process holds"""
+
+
+class SessionStore(SessionBackend):
+    """Thread-safe map of session id -> memory object.
+
+    Sessions are kept in least-recently-used order and evicted when any of
+    these limits is exceeded:
+      - ``max_sessions``: hard cap on the number of live sessions
+      - ``ttl_seconds``: sessions idle for longer than this are dropped
+      - ``max_bytes``: ceiling on the summed ``approx_size()`` of all sessions
+
+    With a durable backing store, ``load(session_id)`` is tried before
+    ``factory`` on a session's first access (it runs outside the store lock),
+    ``on_update(session_id, memory)`` is called by :meth:`touch` after every
+    turn and ``on_discard(session_id)`` by :meth:`discard`. Evicting a session
+    only drops it from memory.
+    """
+
+    name = "memory"
+
+    @property
+    def blocking(self) -> bool:
+        # Loading a session that is not in memory reads the backing store
+        return self.load is not None
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int = 10000,
+                 ttl_seconds: Optional[float] = 1800.0, max_bytes: Optional[int] = 256 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic,
+                 load: Optional[Callable[[Hashable], Optional[Any]]] = None,
+                 on_update: Optional[Callable[[Hashable, Any], None]] = None,
+                 on_discard: Optional[Callable[[Hashable], None]] = None):
+        self.factory = factory
+        self.load = load
+        self.on_update = on_update
+        self.on_discard = on_discard
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session_id -> [memory, last_access, size_in_bytes]
+        self._sessions: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = 0
+
+    def get(self, session_id: Hashable) -> Any:
+        """Return the memory for a session, creating it on first access"""
+        now = self._clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and self._expired(entry, now):
+                self._remove(session_id)
+                entry = None
+            if entry is not None or self.load is None:
+                return self._admit(session_id, entry, self.factory, now)
+
+        # Reading the backing store must not hold up every other session
+        memory = self.load(session_id)
+        with self._lock:
+            return self._admit(session_id, self._sessions.get(session_id),
+                               (lambda: memory) if memory is not None else self.factory, now)
+
+    def _admit(self, session_id: Hashable, entry: Optional[list], factory: Callable[[], Any], now: float) -> Any:
+        if entry is None:
+            memory = factory()
+            size = _approx_size(memory)
+            entry = [memory, now, size]
+            self._sessions[session_id] = entry
+            self._total_bytes += size
+        else:
+            entry[1] = now
+            self._sessions.move_to_end(session_id)
+        self._enforce_limits(now, keep=session_id)
+        return entry[0]
+
+    def touch(self, session_id: Hashable, memory: Any = None):
+        """Refresh a session's idle timer and re-measure it after it has been updated"""
+        now = self._clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                size = _approx_size(entry[0])
+                self._total_bytes += size - entry[2]
+                entry[1] = now
+                entry[2] = size
+                self._sessions.move_to_end(session_id)
+                self._enforce_limits(now, keep=session_id)
+                memory = entry[0]
+        # A session evicted during the turn has nothing to re-measure, but its turn is still reported
+        if memory is not None and self.on_update is not None:
+            self.on_update(session_id, memory)
+
+    def discard(self, session_id: Hashable):
+        """Forget a session, e.g. when the user clears the conversation"""
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+        if self.on_discard is not None:
+            self.on_discard(session_id)
+
+    def evict_expired(self) -> int:
+        """Drop every idle session past its TTL and return how many were removed"""
+        if self.ttl_seconds is None:
+            return 0
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            # Entries are in access order, so the idle ones are all at the front
+            while self._sessions:
+                session_id, entry = next(iter(self._sessions.items()))
+                if not self._expired(entry, now):
+                    break
+                self._remove(session_id)
+                removed += 1
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current size of the store"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "approx_bytes": self._total_bytes,
+                "evictions": self.evictions
+            }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: Hashable) -> bool:
+        return session_id in self._sessions
+
+    def _expired(self, entry: list, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry[1] > self.ttl_seconds
+
+    def _remove(self, session_id: Hashable):
+        entry = self._sessions.pop(session_id)
+        self._total_bytes -= entry[2]
+
+    def _enforce_limits(self, now: float, keep: Hashable):
+        """Evict least-recently-used sessions until every limit holds, never evicting ``keep``"""
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            over_count = len(self._sessions) > self.max_sessions
+            over_bytes = self.max_bytes is not None and self._total_bytes > self.max_bytes
+            if not (over_count or over_bytes or self._expired(entry, now)):
+                break
+            if session_id == keep:
+                break
+            self._remove(session_id)
+            self.evictions += 1
+
+
+def _approx_size(memory: Any) -> int:
+    """Best-effort size of a memory object in bytes"""
+    approx_size = getattr(memory, "approx_size", None)
+    return approx_size() if approx_size is not None else 0
@@ -0,0 +1,208 @@
+"""Conversation memory shared by worker processes through one SQLite file, so any worker can serve any session"""
+import logging
+import sqlite3
+import threading
+import zlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from session_store import SessionBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_sessions (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shared_sessions_updated_at ON shared_sessions (updated_at);
+"""
+
+# What decoding a truncated or garbled blob can raise
+DECODE_ERRORS = (ValueError, IndexError, TypeError, zlib.error)
+
+logger = logging.getLogger(__name__)
+
+
+class SharedSQLiteStore(SessionBackend):
+    """Sessions kept in a SQLite database (WAL mode) that every worker process opens.
+
+    :meth:`touch` writes the encoded memory and bumps the session's version
+    in one statement before the turn returns, so the user's next message sees
+    it whichever worker it lands on. :meth:`get` keeps the memories it decoded
+    in a per-process LRU of ``cache_size`` sessions and asks the database for
+    the blob only when another worker has written a newer version since, so
+    a session that keeps hitting the same worker costs one indexed lookup per
+    turn. Both may wait on another worker's write lock, so the store is
+    ``blocking`` and the async chatbot path runs them off the event loop.
+
+    Two messages of one session handled at the same moment by two workers
+    both start from the same history and the later write wins, just as the
+    in-process store interleaves them. Sessions idle for ``ttl_seconds`` are
+    treated as new and deleted every ``purge_every`` writes, and so is a
+    session whose stored blob no longer decodes (it is logged and deleted).
+
+    This shares conversation memory only. A Gradio app keeps each queued
+    event (its join request and the stream of results) in the process that
+    accepted it, so workers behind a load balancer still need sticky routing
+    for the UI; the shared store lets them fail over or restart without
+    losing history.
+    """
+
+    name = "shared"
+    blocking = True
+
+    def __init__(self, path: str, factory: Callable[[], Any], encode: Callable[[Any], bytes],
+                 decode: Callable[[bytes], Any], ttl_seconds: Optional[float] = 1800.0, cache_size: int = 10000,
+                 purge_every: int = 1000, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.factory = factory
+        self.encode = encode
+        self.decode = decode
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self.purge_every = purge_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session id -> [version, memory, encoded size]; version 0 means never written
+        self._cache: "OrderedDict[str, list]" = OrderedDict()
+        self._cache_bytes = 0
+        self.evictions = 0
+        self.corrupt = 0
+        self.loads = 0
+        self.reuses = 0
+        self.writes = 0
+        # One connection per thread; SQLite serializes a shared one
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        connection = self._connection()
+        # WAL is a property of the file, so it is set once; workers starting together may find it
+        # locked while another one switches it, and the busy timeout does not cover that
+        deadline = time.monotonic() + 30.0
+        while True:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                break
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            # With WAL, NORMAL only risks the last commits on power loss, never corruption
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, session_id: Hashable) -> Any:
+        """Return the memory for a session: the cached copy if it is still current, else the stored one"""
+        key = str(session_id)
+        with self._lock:
+            entry = self._cache.get(key)
+        cached_version = entry[0] if entry is not None else -1
+        # The blob only crosses over when this process's copy is out of date
+        row = self._connection().execute(
+            "SELECT version, CASE WHEN version = ? THEN NULL ELSE data END, updated_at "
+            "FROM shared_sessions WHERE session_id = ?", (cached_version, key)
+        ).fetchone()
+
+        if row is None or (self.ttl_seconds is not None and self._clock() - row[2] > self.ttl_seconds):
+            version, memory, size = 0, self.factory(), 0
+        elif row[1] is None:
+            version, memory, size = entry
+            self.reuses += 1
+        else:
+            try:
+                version, memory, size = row[0], self.decode(row[1]), len(row[1])
+                self.loads += 1
+            except DECODE_ERRORS as exc:
+                # Never decodable, so start the session over rather than fail every turn
+                logger.warning("Dropping session %s: stored version %d does not decode (%r)", key, row[0], exc)
+                self._connection().execute(
+                    "DELETE FROM shared_sessions WHERE session_id = ? AND version = ?", (key, row[0]))
+                version, memory, size = 0, self.factory(), 0
+                with self._lock:
+                    self.corrupt += 1
+        self._cache_put(key, [version, memory, size])
+        return memory
+
+    def touch(self, session_id: Hashable, memory: Any = None):
+        """Write the session's memory after a turn so that every worker sees it"""
+        key = str(session_id)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or (memory is not None and entry[1] is not memory):
+            if memory is None:
+                return
+            # Dropped from the cache during the turn: write the memory the turn used and cache it again
+            entry = [0, memory, 0]
+            self._cache_put(key, entry)
+        data = self.encode(entry[1])
+        now = self._clock()
+        connection = self._connection()
+        # A row deleted (discarded, expired or corrupt) and written again must not restart at a
+        # version another worker still has cached, so new rows start from the nanosecond clock
+        entry[0] = connection.execute(
+            "INSERT INTO shared_sessions (session_id, version, data, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET version = version + 1, data = excluded.data, "
+            "updated_at = excluded.updated_at RETURNING version", (key, time.time_ns(), data, now)
+        ).fetchone()[0]
+        with self._lock:
+            self._cache_bytes += len(data) - entry[2]
+            entry[2] = len(data)
+            self.writes += 1
+            purge = self.ttl_seconds is not None and self.writes % self.purge_every == 0
+        if purge:
+            connection.execute("DELETE FROM shared_sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def discard(self, session_id: Hashable):
+        """Forget a session in every worker, e.g. when the user clears the conversation"""
+        key = str(session_id)
+        self._connection().execute("DELETE FROM shared_sessions WHERE session_id = ?", (key,))
+        with self._lock:
+            entry = self._cache.pop(key, None)
+            if entry is not None:
+                self._cache_bytes -= entry[2]
+
+    def stats(self) -> Dict[str, Any]:
+        """Sessions cached by this process (approx_bytes counts their encoded size) and traffic counters"""
+        with self._lock:
+            return {
+                "sessions": len(self._cache),
+                "approx_bytes": self._cache_bytes,
+                "evictions": self.evictions,
+                "corrupt": self.corrupt,
+                "loads": self.loads,
+                "reuses": self.reuses,
+                "writes": self.writes
+            }
+
+    def close(self):
+        """Close every thread's connection; the data is already committed"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _cache_put(self, key: str, entry: list):
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= previous[2]
+            self._cache[key] = entry
+            self._cache_bytes += entry[2]
+            while len(self._cache) > self.cache_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted[2]
+                self.evictions += 1
@@ -0,0 +1,146 @@
+"""Time-bucketed snapshots shared by every session, refreshed in the background"""
+import threading
+import time
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Snapshot(Generic[T]):
+    __slots__ = ("bucket", "source", "value")
+
+    def __init__(self, bucket: int, source: Hashable, value: T):
+        self.bucket = bucket
+        self.source = source
+        self.value = value
+
+
+class SnapshotCache(Generic[T]):
+    """Computes a value once per time bucket and serves it to every caller until the bucket ends.
+
+    Time is cut into buckets of ``bucket_seconds``; ``build(bucket)`` is called
+    with the bucket number, so a builder that seeds its randomness from it gives
+    the same snapshot in every process. ``source``, if given, is checked on each
+    read and a change (e.g. a reloaded universe) also triggers a rebuild.
+
+    :meth:`current` is a clock read and a comparison when the snapshot is fresh.
+    Only the very first snapshot is built by a caller, which the others wait
+    for. After that a stale snapshot keeps being served while a new one is
+    built: by the daemon thread of :meth:`start`, which rebuilds right at every
+    bucket boundary and is woken early by a source change, or without it by
+    whichever caller gets there first. A failed build keeps the previous
+    snapshot, records the error in :attr:`last_error` and is retried after
+    ``retry_seconds``.
+
+    :meth:`pin` fixes the bucket readers get, so a batch run that seeds the
+    rest of its randomness also gets the same snapshot whenever it runs.
+    """
+
+    def __init__(self, build: Callable[[int], T], bucket_seconds: float = 300.0,
+                 source: Optional[Callable[[], Hashable]] = None, clock: Callable[[], float] = time.time,
+                 retry_seconds: float = 1.0):
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self.build = build
+        self.bucket_seconds = bucket_seconds
+        self.source = source
+        self.retry_seconds = retry_seconds
+        self.builds = 0
+        self.pinned: Optional[int] = None
+        self.last_error: Optional[Exception] = None
+        self._clock = clock
+        self._snapshot: Optional[_Snapshot[T]] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def bucket(self, now: Optional[float] = None) -> int:
+        """The bucket number containing ``now`` (default: the current time, or the pinned bucket)"""
+        if now is None and self.pinned is not None:
+            return self.pinned
+        return int((self._clock() if now is None else now) // self.bucket_seconds)
+
+    def pin(self, bucket: Optional[int]):
+        """Serve the snapshot of ``bucket`` whatever the time; None follows the clock again"""
+        with self._lock:
+            self.pinned = bucket
+            if bucket is not None and self._snapshot is not None and self._snapshot.bucket != bucket:
+                # Otherwise the next read would still get the other bucket's snapshot while it rebuilds
+                self._snapshot = None
+
+    def current(self) -> T:
+        """The snapshot for the current bucket, or the previous one while it is being rebuilt"""
+        snapshot = self._snapshot
+        bucket = self.bucket()
+        source = self.source() if self.source else None
+        if snapshot is None:
+            # Nothing to serve yet: build it here, raising if that fails
+            return self._refresh(bucket, source).value
+        if snapshot.bucket != bucket or snapshot.source is not source:
+            if self._thread is not None:
+                self._wake.set()
+            elif self._retry_due() and self._lock.acquire(blocking=False):
+                try:
+                    snapshot = self._refresh_locked(bucket, source)
+                except Exception:
+                    pass
+                finally:
+                    self._lock.release()
+        return snapshot.value
+
+    def refresh(self) -> T:
+        """Rebuild the snapshot for the current bucket now, raising if the build fails"""
+        return self._refresh(self.bucket(), self.source() if self.source else None, force=True).value
+
+    def _retry_due(self) -> bool:
+        return self._failed_at is None or self._clock() - self._failed_at >= self.retry_seconds
+
+    def _refresh(self, bucket: int, source: Any, force: bool = False) -> _Snapshot[T]:
+        with self._lock:
+            return self._refresh_locked(bucket, source, force)
+
+    def _refresh_locked(self, bucket: int, source: Any, force: bool = False) -> _Snapshot[T]:
+        snapshot = self._snapshot
+        if force or snapshot is None or snapshot.bucket != bucket or snapshot.source is not source:
+            try:
+                value = self.build(bucket)
+            except Exception as exc:
+                self.last_error = exc
+                self._failed_at = self._clock()
+                raise
+            snapshot = _Snapshot(bucket, source, value)
+            self._snapshot = snapshot
+            self.builds += 1
+            self.last_error = None
+            self._failed_at = None
+        return snapshot
+
+    def start(self):
+        """Start the background refresher (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self._refresh(self.bucket(), self.source() if self.source else None)
+            except Exception:
+                # Keep serving the previous snapshot and try again shortly
+                self._stop.wait(self.retry_seconds)
+                continue
+            now = self._clock()
+            next_boundary = (self.bucket(now) + 1) * self.bucket_seconds
+            self._wake.wait(max(next_boundary - now, 0.01))
@@ -0,0 +1,116 @@
+"""LLM replies streamed from a local server-sent events stub: complete, cut off and stalled"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import engine
+from llm_client import LLMClient
+
+MESSAGE = "I am worried about my debt"
+WORDS = ["Paying ", "down ", "debt ", "first ", "helps."]
+# Longer than the client's read timeout
+STALL_SECONDS = 1.0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Streams WORDS as chat completion deltas; the path picks how the stream goes wrong"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        mode = self.path.strip("/")
+        try:
+            if mode == "stall":
+                time.sleep(STALL_SECONDS)
+            for number, word in enumerate(WORDS):
+                if number == 2 and mode == "disconnect":
+                    # Drop the connection without the chunked terminator
+                    self.close_connection = True
+                    return
+                if number == 2 and mode == "stall-mid":
+                    time.sleep(STALL_SECONDS)
+                self._send_event(json.dumps({"choices": [{"delta": {"content": word}}]}))
+            self._send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _send_event(self, data: str):
+        event = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["sync", "async"])
+def reply(request, server_url, monkeypatch):
+    """Collect the chunks of the reply to MESSAGE when the stub streams in ``mode``"""
+    clients = []
+
+    def run(mode):
+        client = LLMClient(f"{server_url}/{mode}", read_timeout=0.3, total_timeout=5.0)
+        clients.append(client)
+        monkeypatch.setattr(engine, "LLM_API_ENABLED", True)
+        monkeypatch.setattr(engine.get_llm_client, "client", client, raising=False)
+        memory = engine.ConversationMemory()
+        memory.add_message("user", MESSAGE)
+        intent_data = engine.identify_intent(MESSAGE)
+        if request.param == "sync":
+            return list(engine.generate_response_stream(intent_data, MESSAGE, memory))
+
+        async def collect():
+            return [chunk async for chunk in engine.generate_response_stream_async(intent_data, MESSAGE, memory)]
+        return asyncio.run(collect())
+
+    yield run
+    for client in clients:
+        client.close()
+
+
+def failures(stage):
+    return engine.LLM_FAILURES.value(stage)
+
+
+def test_complete_stream(reply):
+    before = failures("mid_stream") + failures("before_first_chunk")
+    assert reply("ok") == WORDS
+    assert failures("mid_stream") + failures("before_first_chunk") == before
+
+
+def test_disconnect_mid_stream_ends_with_notice(reply):
+    before = failures("mid_stream")
+    assert reply("disconnect") == WORDS[:2] + [engine.LLM_INTERRUPTED_NOTICE]
+    assert failures("mid_stream") == before + 1
+
+
+def test_stall_mid_stream_ends_with_notice(reply):
+    assert reply("stall-mid") == WORDS[:2] + [engine.LLM_INTERRUPTED_NOTICE]
+
+
+def test_timeout_before_first_chunk_falls_back_to_template(reply):
+    before = failures("before_first_chunk")
+    chunks = reply("stall")
+    assert len(chunks) == 1
+    assert chunks[0] not in WORDS and engine.LLM_INTERRUPTED_NOTICE not in chunks[0]
+    assert failures("before_first_chunk") == before + 1
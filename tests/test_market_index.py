@@ -0,0 +1,90 @@
+"""Company names and tickers found in free text by MarketIndex"""
+import pytest
+
+from market_index import MarketIndex
+
+UNIVERSE = {
+    "Technology": {
+        "AMZN": {"name": "Amazon.com, Inc."},
+        "IT": {"name": "Gartner, Inc."},
+        "A": {"name": "Agilent Technologies, Inc."},
+    },
+    "Healthcare": {
+        "MRK": {"name": "Merck & Co., Inc."},
+        "JNJ": {"name": "Johnson & Johnson"},
+    },
+    "Financial": {
+        "JPM": {"name": "JPMorgan Chase & Co."},
+        "WFC": {"name": "Wells Fargo & Company"},
+    },
+    "Energy": {
+        "XOM": {"name": "Exxon Mobil Corporation"},
+        "ON": {"name": "ON Semiconductor Corporation"},
+    },
+    "Consumer": {
+        "KO": {"name": "The Coca-Cola Company"},
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return MarketIndex(UNIVERSE)
+
+
+@pytest.mark.parametrize("name, symbol", [
+    ("Merck", "MRK"),
+    ("Merck & Co.", "MRK"),
+    ("JPMorgan Chase", "JPM"),
+    ("Amazon", "AMZN"),
+    ("amazon.com", "AMZN"),
+    ("Wells Fargo", "WFC"),
+    ("Exxon Mobil", "XOM"),
+    ("Johnson and Johnson", "JNJ"),
+])
+def test_resolve_short_names(index, name, symbol):
+    assert index.resolve(name) == symbol
+
+
+def test_dangling_ampersand_is_not_an_alias(index):
+    assert index.resolve("merck &") is None
+    assert index.resolve("jpmorgan chase &") is None
+
+
+def test_find_names_in_a_sentence(index):
+    text = "how about Merck and Amazon and Exxon Mobil, or Coca-Cola"
+    assert index.find_symbols(text) == ["MRK", "AMZN", "XOM", "KO"]
+
+
+def test_find_names_joined_by_and(index):
+    assert index.find_symbols("JPMorgan Chase and Wells Fargo vs Johnson & Johnson") == ["JPM", "WFC", "JNJ"]
+
+
+def test_short_tickers_need_stock_context(index):
+    assert index.find_symbols("A friend said IT is ON fire, I think") == []
+    assert index.find_symbols("Is $IT a buy?") == ["IT"]
+    assert index.find_symbols("How is ON stock doing?") == ["ON"]
+    assert index.find_symbols("ticker A please") == ["A"]
+
+
+def test_longer_tickers_match_as_written(index):
+    assert index.find_symbols("MRK and XOM") == ["MRK", "XOM"]
+    assert index.find_symbols("mrk and xom") == []
+
+
+@pytest.mark.parametrize("text, symbols", [
+    ("company sentiment for apple and amazon", ["AAPL", "AMZN"]),
+    ("how about Merck and Amazon and Exxon, or Coca-Cola", ["MRK", "AMZN", "XOM", "KO"]),
+    ("what about exxn and jpmorgan stock", ["XOM", "JPM"]),
+])
+def test_fuzzy_finds_partial_names(text, symbols):
+    index = MarketIndex(dict(UNIVERSE, Technology=dict(UNIVERSE["Technology"], AAPL={"name": "Apple Inc."})))
+    assert index.find_symbols_fuzzy(text) == symbols
+
+
+def test_ambiguous_leading_words_are_not_aliases():
+    index = MarketIndex({"Financial": {"BAC": {"name": "Bank of America Corp."},
+                                       "FHN": {"name": "First Horizon Corp."},
+                                       "FCNCA": {"name": "First Citizens BancShares"}}})
+    assert index.find_symbols_fuzzy("first and bank stocks") == []
+    assert index.find_symbols_fuzzy("first horizon stock") == ["FHN"]
@@ -0,0 +1,133 @@
+"""FinBertClient and SentimentBatcher against an in-process stub of the inference endpoint"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sentiment_client import CircuitBreaker, FinBertClient, SentimentBatcher
+
+
+class StubServer(ThreadingHTTPServer):
+    """Answers every input as positive; ``delay`` and ``status`` make it slow or failing"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = 0.0
+        self.status = 200
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/finbert"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        inputs = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["inputs"]
+        with self.server.lock:
+            self.server.requests.append(inputs)
+            self.server.connections.add(self.client_address)
+        time.sleep(self.server.delay)
+        prediction = [{"label": "Positive", "score": 0.9}, {"label": "Negative", "score": 0.1}]
+        body = json.dumps([prediction] if isinstance(inputs, str) else [prediction] * len(inputs)).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = FinBertClient(server.url, read_timeout=0.5, pool_size=4,
+                           breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    yield client
+    client.close()
+
+
+def test_connections_are_pooled(server, client):
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(client.classify, [f"statement {number}" for number in range(40)]))
+    assert results == [("positive", 0.9)] * 40
+    assert len(server.requests) == 40
+    # Kept-alive connections are reused: no more than the concurrent callers, not one per request
+    assert len(server.connections) <= 4
+
+
+def test_timeout_returns_none_and_counts_as_failure(server, client):
+    server.delay = 1.0
+    assert client.classify("slow statement") is None
+    assert client.breaker.state == "closed"
+    # The second timeout reaches failure_threshold
+    assert client.classify("another slow statement") is None
+    assert client.breaker.state == "open"
+
+
+def test_breaker_trips_and_stops_calling_the_endpoint(server, client):
+    server.status = 500
+    assert client.classify("first") is None
+    assert client.classify("second") is None
+    assert client.breaker.state == "open"
+    assert client.classify("third") is None
+    assert len(server.requests) == 2
+
+
+def test_batcher_coalesces_and_counts_each_miss_once(server, client):
+    batcher = SentimentBatcher(client, window_ms=50, max_batch=16)
+    try:
+        futures = [batcher.submit(f"statement {number}") for number in range(10)]
+        assert [future.result(timeout=5) for future in futures] == [("positive", 0.9)] * 10
+        assert len(server.requests) < 10 and sum(map(len, server.requests)) == 10
+        assert client.cache.misses == 10
+        # Now cached: answered without a request, one hit each
+        assert batcher.classify("statement 3", timeout=5) == ("positive", 0.9)
+        assert (client.cache.hits, len(server.requests)) == (1, batcher.batches_sent)
+    finally:
+        batcher.close()
+
+
+def test_batcher_timeout_returns_none(server, client):
+    server.delay = 0.3
+    batcher = SentimentBatcher(client, window_ms=1)
+    try:
+        assert batcher.classify("slow statement", timeout=0.05) is None
+    finally:
+        batcher.close()
+
+
+def test_submit_racing_close_always_resolves(server, client):
+    batcher = SentimentBatcher(client, window_ms=1)
+    futures = []
+
+    def submit_many():
+        for number in range(200):
+            futures.append(batcher.submit(f"race {number}"))
+
+    submitter = threading.Thread(target=submit_many)
+    submitter.start()
+    batcher.close()
+    submitter.join()
+    # Each one was either flushed before the batcher stopped or answered None at once
+    assert all(future.result(timeout=5) in (None, ("positive", 0.9)) for future in futures)
+    assert batcher.submit("after close").result(timeout=0) is None
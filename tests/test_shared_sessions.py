@@ -0,0 +1,72 @@
+"""SharedSQLiteStore round trips and its handling of blobs that no longer decode"""
+import sqlite3
+
+import pytest
+
+from engine import ConversationMemory
+from session_store import SessionBackend
+from shared_sessions import SharedSQLiteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SharedSQLiteStore(str(tmp_path / "sessions.db"), ConversationMemory, encode=ConversationMemory.to_bytes,
+                              decode=ConversationMemory.from_bytes)
+    yield store
+    store.close()
+
+
+def other_worker(store):
+    """A second store on the same file, as another worker process would open it"""
+    return SharedSQLiteStore(store.path, ConversationMemory, encode=ConversationMemory.to_bytes,
+                             decode=ConversationMemory.from_bytes)
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SessionBackend()
+
+
+def test_other_worker_sees_the_turn(store):
+    memory = store.get("s1")
+    memory.add_message("user", "hello")
+    store.touch("s1", memory)
+    worker = other_worker(store)
+    assert worker.get("s1").get_recent_messages(5) == [{"role": "user", "content": "hello"}]
+    worker.close()
+
+
+@pytest.mark.parametrize("blob", [b"", b"\x01\x05", b"\x81not zlib", b"\x7f"])
+def test_corrupt_blob_starts_the_session_over(store, blob):
+    memory = store.get("s1")
+    memory.add_message("user", "hello")
+    store.touch("s1", memory)
+    connection = sqlite3.connect(store.path)
+    connection.execute("UPDATE shared_sessions SET data = ?, version = version + 1", (blob,))
+    connection.commit()
+    connection.close()
+
+    worker = other_worker(store)
+    assert len(worker.get("s1").get_recent_messages(5)) == 0
+    assert worker.stats()["corrupt"] == 1
+    # The bad row is gone, so the next turn is stored and read back normally
+    fresh = worker.get("s1")
+    fresh.add_message("user", "again")
+    worker.touch("s1", fresh)
+    assert [message["content"] for message in store.get("s1").get_recent_messages(5)] == ["again"]
+    worker.close()
+
+
+def test_discarded_session_written_again_is_not_served_stale(store):
+    worker = other_worker(store)
+    memory = worker.get("s1")
+    memory.add_message("user", "old")
+    worker.touch("s1", memory)
+    assert len(store.get("s1").get_recent_messages(5)) == 1
+
+    worker.discard("s1")
+    fresh = worker.get("s1")
+    fresh.add_message("user", "new")
+    worker.touch("s1", fresh)
+    assert [message["content"] for message in store.get("s1").get_recent_messages(5)] == ["new"]
+    worker.close()
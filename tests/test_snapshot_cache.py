@@ -0,0 +1,100 @@
+"""SnapshotCache serving stale snapshots while a new bucket is built"""
+import threading
+import time
+
+import pytest
+
+from snapshot_cache import SnapshotCache
+
+
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_first_snapshot_is_built_by_the_caller_and_errors_raise():
+    def build(bucket):
+        raise RuntimeError("no data")
+
+    cache = SnapshotCache(build, bucket_seconds=10, clock=Clock())
+    with pytest.raises(RuntimeError):
+        cache.current()
+
+
+def test_failed_rebuild_keeps_serving_the_last_snapshot():
+    clock = Clock()
+    fail = []
+
+    def build(bucket):
+        if fail:
+            raise RuntimeError("upstream down")
+        return bucket
+
+    cache = SnapshotCache(build, bucket_seconds=10, clock=clock, retry_seconds=5)
+    assert cache.current() == 0
+    clock.now, fail[:] = 10, [True]
+    assert cache.current() == 0
+    assert isinstance(cache.last_error, RuntimeError)
+    builds = cache.builds
+    # Not retried before retry_seconds have passed, then picked up once the build works again
+    fail.clear()
+    clock.now = 12
+    assert cache.current() == 0 and cache.builds == builds
+    clock.now = 15
+    assert cache.current() == 1 and cache.last_error is None
+
+
+def test_stale_snapshot_served_while_the_refresher_builds():
+    clock = Clock()
+    release = threading.Event()
+    started = threading.Event()
+
+    def build(bucket):
+        if bucket:
+            started.set()
+            release.wait(5)
+        return bucket
+
+    cache = SnapshotCache(build, bucket_seconds=10, clock=clock)
+    assert cache.current() == 0
+    cache.start()
+    try:
+        clock.now = 10
+        # The read wakes the refresher and returns at once with the previous bucket
+        assert cache.current() == 0
+        assert started.wait(5)
+        assert cache.current() == 0
+        release.set()
+        deadline = time.monotonic() + 5
+        while cache.current() != 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.current() == 1
+    finally:
+        release.set()
+        cache.stop(5)
+
+
+def test_source_change_triggers_a_rebuild():
+    clock = Clock()
+    source = [object()]
+    cache = SnapshotCache(lambda bucket: source[0], bucket_seconds=10, clock=clock, source=lambda: source[0])
+    first = cache.current()
+    source[0] = object()
+    assert cache.current() is source[0] is not first
+
+
+def test_pinned_bucket_ignores_the_clock():
+    clock = Clock(25)
+    cache = SnapshotCache(lambda bucket: bucket, bucket_seconds=10, clock=clock)
+    assert cache.current() == 2
+    cache.pin(7)
+    # The wall-clock snapshot is never served once pinned, even while stale
+    assert cache.current() == 7
+    clock.now = 1000
+    assert cache.current() == 7
+    cache.pin(None)
+    assert cache.current() in (7, 100)
+    assert cache.current() == 100